@@ -3,4 +3,6 @@ python -m PyQt5.uic.pyuic "designer/tf_window.ui" -o "src/ui/tf_window.py"
 python -m PyQt5.uic.pyuic "designer/case_window.ui" -o "src/ui/case_window.py"
 python -m PyQt5.uic.pyuic "designer/response_window.ui" -o "src/ui/response_window.py"
 python -m PyQt5.uic.pyuic "designer/prompt.ui" -o "src/ui/prompt.py"
+python -m PyQt5.uic.pyuic "designer/import_window.ui" -o "src/ui/import_window.py"
+python -m PyQt5.uic.pyuic "designer/variable_window.ui" -o "src/ui/variable_window.py"
 echo "DONE"
\ No newline at end of file
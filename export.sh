@@ -2,4 +2,6 @@ pyuic5 -x "designer/MainWindow.ui" -o "src/ui/MainWindow.py"
 pyuic5 -x "designer/tf_window.ui" -o "src/ui/tf_window.py"
 pyuic5 -x "designer/case_window.ui" -o "src/ui/case_window.py"
 pyuic5 -x "designer/response_window.ui" -o "src/ui/response_window.py"
+pyuic5 -x "designer/import_window.ui" -o "src/ui/import_window.py"
+pyuic5 -x "designer/variable_window.ui" -o "src/ui/variable_window.py"
 echo "DONE"
\ No newline at end of file
@@ -1,5 +1,4 @@
-# Project modules
-from src.app import main
-
 if __name__ == "__main__":
+    # Project modules, adentro del if: los procesos de importación (spawn) vuelven a ejecutar este archivo y no deben cargar la GUI
+    from src.app import main
     main()
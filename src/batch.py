@@ -0,0 +1,103 @@
+# Exporta los gráficos de proyectos .pto sin abrir la interfaz, desde la raíz del repositorio:
+#     python render.py proyecto.pto [...] [-o carpeta] [-f pdf,png,pgf] [-j procesos] [--autoscale]
+import argparse
+import os
+import pickle
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import matplotlib
+matplotlib.use('Agg')
+from matplotlib.figure import Figure
+
+from src.package.PlotRenderer import PlotRenderer
+from src.package.figure import FIGURE_RC, LINE_STYLES, MARKER_STYLES, PLOT_TABS, render_axes, restore_axes_properties
+from src.package.pipeline import TransformPipeline, source_pyramid, view_curve
+from src.package.transforms import load_user_transforms
+
+# Tamaño de cada gráfico en pulgadas, las pestañas con dos gráficos los apilan
+PLOT_SIZE = (6.4, 4.8)
+
+EXPORT_FORMATS = ['pdf', 'png', 'pgf']
+
+
+def render_project(filepath, outdir=None, formats=('pdf',), dpi=150, autoscale=False):
+    """Saves every tab of a .pto project with datalines as <project>_plot<tab>.<format>, returns the paths written."""
+    with open(filepath, 'rb') as f:
+        datasets, datalines, plots_data, general_config = pickle.load(f)
+    matplotlib.rcParams.update(FIGURE_RC)
+    renderer = PlotRenderer(TransformPipeline().run, LINE_STYLES, MARKER_STYLES, source_pyramid, view_curve)
+    outdir = outdir or os.path.dirname(os.path.abspath(filepath))
+    name = os.path.splitext(os.path.basename(filepath))[0]
+
+    written = []
+    for tab, plots in enumerate(PLOT_TABS):
+        # Los datasets del proyecto son copias sin datalines, los de verdad son los de cada dataline
+        entries = [[(dl.dataset, dl) for group in datalines for dl in group if dl.plots == plot] for plot in plots]
+        if(not any(entries)):
+            continue
+        fig = Figure(figsize=(PLOT_SIZE[0], PLOT_SIZE[1] * len(plots)))
+        fig.set_tight_layout(True)
+        for ax, plot, plot_entries in zip(fig.subplots(len(plots), 1, squeeze=False)[:, 0], plots, entries):
+            restore_axes_properties(ax, plots_data[plot])
+            failed = render_axes(renderer, ax, plot_entries, general_config)
+            if(failed):
+                raise ValueError(f'Wrong data source matching in {", ".join(dl.name for dl in failed)}')
+            if(autoscale):
+                ax.margins(general_config['marginx'], general_config['marginy'])
+                renderer.relim(ax)
+                ax.autoscale()
+        for fmt in formats:
+            path = os.path.join(outdir, f'{name}_plot{tab + 1}.{fmt}')
+            fig.savefig(path, format=fmt, dpi=dpi)
+            written.append(path)
+    return written
+
+
+def timed_render(filepath, outdir, formats, dpi, autoscale):
+    """render_project for the process pool: never raises, returns (filepath, written, seconds, error)."""
+    start = time.perf_counter()
+    try:
+        load_user_transforms()
+        written = render_project(filepath, outdir, formats, dpi, autoscale)
+        return (filepath, written, time.perf_counter() - start, None)
+    except Exception as e:
+        return (filepath, [], time.perf_counter() - start, f'{type(e).__name__}: {e}')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Exports the plots of .pto projects without opening the interface.')
+    parser.add_argument('projects', nargs='+', help='.pto files')
+    parser.add_argument('-o', '--output', help='folder for the figures, next to each project by default')
+    parser.add_argument('-f', '--formats', default='pdf', help=f'comma separated, any of {", ".join(EXPORT_FORMATS)}')
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count(), help='projects rendered at once')
+    parser.add_argument('--dpi', type=int, default=150, help='resolution of the png files')
+    parser.add_argument('--autoscale', action='store_true', help='fit the limits to the data instead of using the saved ones')
+    args = parser.parse_args(argv)
+
+    formats = [fmt.strip().lower() for fmt in args.formats.split(',') if fmt.strip()]
+    unknown = [fmt for fmt in formats if fmt not in EXPORT_FORMATS]
+    if(unknown or not formats):
+        parser.error(f'unknown format {", ".join(unknown)}' if unknown else 'no formats given')
+    if(args.output):
+        os.makedirs(args.output, exist_ok=True)
+
+    start = time.perf_counter()
+    results = []
+    with ProcessPoolExecutor(max_workers=max(1, min(args.jobs, len(args.projects)))) as pool:
+        futures = [pool.submit(timed_render, path, args.output, formats, args.dpi, args.autoscale) for path in args.projects]
+        for future in as_completed(futures):
+            filepath, written, elapsed, error = future.result()
+            results.append((filepath, written, elapsed, error))
+            status = f'error: {error}' if error else f'{len(written)} files'
+            print(f'{elapsed:8.3f} s  {filepath}  {status}', flush=True)
+
+    failed = [result for result in results if result[3]]
+    total = sum(result[2] for result in results)
+    print(f'{len(results) - len(failed)}/{len(results)} projects in {time.perf_counter() - start:.3f} s ({total:.3f} s of rendering)')
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,96 @@
+# Throughput benchmark of the file parsers, run from the repository root with:
+#     python -m src.benchmark [size in MB]
+import os
+import sys
+import tempfile
+import time
+from collections import defaultdict
+import numpy as np
+
+from src.package.txt_reader import read_txt
+
+
+# Parser de txt de LTspice previo a txt_reader, se mantiene sólo como referencia para comparar
+def legacy_parse_txt(filepath):
+    has_cases = False
+    casenames = []
+    data = [{}]
+    with open(filepath, mode='r') as file:
+        for line in file.readlines():
+            if('Step Information:' in line):
+                has_cases = True
+                break
+
+    with open(filepath, mode='r') as file:
+        fields = file.readline().replace('\n', '').split('\t')
+        for field in fields:
+            data[0][field] = []
+        case = -1
+        if(has_cases):
+            for line in file.readlines():
+                if('Step Information:' in line):
+                    data.append(defaultdict(list))
+                    if('Run:' in line):
+                        casenames.append(line[18:line.index('  (Run: ')])
+                    elif('Step:' in line):
+                        casenames.append(line[18:line.index('  (Step: ')])
+                    case += 1
+                else:
+                    linedata = line.replace('\n', '').split('\t')
+                    for x in range(len(fields)):
+                        if('i' in linedata[x]):
+                            data[case][fields[x]].append(np.complex128(linedata[x]))
+                        else:
+                            data[case][fields[x]].append(float(linedata[x]))
+        else:
+            for line in file.readlines():
+                linedata = line.replace('\n', '').split('\t')
+                for x in range(len(fields)):
+                    if('dB' in linedata[x]):
+                        newlindata = linedata[x][1:-2].split('dB,')
+                        data[0][fields[x]].append(float(newlindata[0]))
+                        try:
+                            data[0][fields[x] + ' deg'].append(float(newlindata[1]))
+                        except KeyError:
+                            data[0][fields[x] + ' deg'] = [float(newlindata[1]),]
+                    elif(',' in linedata[x]):
+                        data[0][fields[x]].append(complex(linedata[x].replace(',','+').replace('+-','-') + 'j'))
+                    else:
+                        data[0][fields[x]].append(float(linedata[x]))
+    return data, casenames
+
+
+def write_txt_export(filepath, size_mb, steps=1):
+    """Writes a synthetic AC export with a polar and a cartesian column of roughly size_mb megabytes."""
+    rows = int(size_mb * 1e6 / 70 / steps)
+    f = np.logspace(0, 6, rows)
+    with open(filepath, mode='w', encoding='utf-8') as file:
+        file.write('Freq.\tV(out)\tI(R1)\n')
+        for step in range(steps):
+            if(steps > 1):
+                file.write(f'Step Information: R1={step + 1}K  (Step: {step + 1}/{steps})\n')
+            g = -10 * np.log10(1 + (f / (step + 1)) ** 2)
+            ph = -np.degrees(np.arctan(f / (step + 1)))
+            lines = [f'{fi:.15e}\t({gi:.15e}dB,{phi:.15e}°)\t{gi:.15e},{phi:.15e}\n' for fi, gi, phi in zip(f, g, ph)]
+            file.writelines(lines)
+
+
+def measure(parser, filepath):
+    start = time.perf_counter()
+    parser(filepath)
+    elapsed = time.perf_counter() - start
+    return elapsed, os.path.getsize(filepath) / 1e6 / elapsed
+
+
+def main(size_mb=20):
+    with tempfile.TemporaryDirectory() as tmp:
+        filepath = os.path.join(tmp, 'export.txt')
+        write_txt_export(filepath, size_mb)
+        print(f'LTspice txt export, {os.path.getsize(filepath) / 1e6:.1f} MB')
+        for (name, parser) in [('legacy', legacy_parse_txt), ('txt_reader', read_txt)]:
+            elapsed, throughput = measure(parser, filepath)
+            print(f'    {name:<12}{elapsed:8.3f} s {throughput:10.1f} MB/s')
+
+
+if __name__ == '__main__':
+    main(*[float(arg) for arg in sys.argv[1:2]])
@@ -1,29 +1,34 @@
 # PyQt5 modules
 from math import inf
-from PyQt5.QtWidgets import QMainWindow, QListWidgetItem, QColorDialog, QFileDialog, QDialog, QStyle
-from PyQt5.QtCore import Qt, QCoreApplication
+from PyQt5.QtWidgets import QMainWindow, QListWidgetItem, QColorDialog, QFileDialog, QDialog, QStyle, QInputDialog
+from PyQt5.QtCore import Qt, QCoreApplication, QTimer
 
 # Project modules
 from src.ui.mainwindow import Ui_MainWindow
 from src.package.Dataset import Dataset
+from src.package.Dataline import format_cases, parse_cases
 from src.widgets.tf_dialog import TFDialog
 from src.widgets.case_window import CaseDialog
 from src.widgets.zp_window import ZPWindow
-from src.widgets.response_dialog import ResponseDialog
+from src.widgets.response_dialog import ResponseDialog, SimulationQueue
 from src.widgets.prompt_dialog import PromptDialog
+from src.widgets.import_dialog import ImportDialog
+from src.widgets.variable_dialog import VariableDialog
+from src.package.raw_reader import RawFile
+from src.package.PlotRenderer import PlotRenderer
+from src.package.RenderScheduler import RenderScheduler
+from src.package.pipeline import TransformPipeline, source_pyramid, view_curve
+from src.package.figure import LINE_STYLES, MARKER_STYLES, render_axes
+from src.package.transforms import TRANSFORMS, USER_TRANSFORMS, load_user_transforms
 from copy import copy, deepcopy
+import os
 import re
-from scipy.signal import savgol_filter
-import scipy.signal as signal
-import matplotlib.ticker as ticker
 import copy
 import numpy as np
 import random
 
 import pickle
 
-MARKER_STYLES = { 'None': '', 'Point': '.',  'Pixel': ',',  'Circle': 'o',  'Triangle down': 'v',  'Triangle up': '^',  'Triangle left': '<',  'Triangle right': '>',  'Tri down': '1',  'Tri up': '2',  'Tri left': '3',  'Tri right': '4',  'Octagon': '8',  'Square': 's',  'Pentagon': 'p',  'Plus (filled)': 'P',  'Star': '*',  'Hexagon': 'h',  'Hexagon alt.': 'H',  'Plus': '+',  'x': 'x',  'x (filled)': 'X',  'Diamond': 'D',  'Diamond (thin)': 'd',  'Vline': '|',  'Hline': '_' }
-LINE_STYLES = { 'None': '', 'Solid': '-', 'Dashed': '--', 'Dash-dot': '-.', 'Dotted': ':' }
 DEFAULT_COLORS = ['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd', '#8c564b', '#e377c2']
 CANON_COLORS = [
     '#1f77b4',      # azul, butter
@@ -51,6 +56,28 @@ W_TO_F = 1/F_TO_W
 
 PZ_LIM_SCALING = 1.35
 
+# .raw con más variables que esto abren el diálogo de selección antes de importar
+VARIABLE_PROMPT_THRESHOLD = 100
+
+# Cada cuánto se revisan los archivos de los datasets en modo follow, en ms
+FOLLOW_INTERVAL = 500
+
+# Puntos por columna que se proponen al importar un CSV decimado
+DECIMATION_BUDGET = 200000
+
+# Percentiles que se proponen para la banda de las estadísticas entre casos
+DEFAULT_PERCENTILES = '5, 95'
+
+# Mapas de colores para los datalines dibujados como densidad
+DENSITY_COLORMAPS = ['viridis', 'magma', 'inferno', 'plasma', 'cividis', 'hot', 'Greys', 'Blues']
+
+# Los redibujados pedidos dentro de un frame se hacen juntos, el autoguardado espera a que no haya cambios, en ms
+FRAME_INTERVAL = 16
+AUTOSAVE_IDLE = 1000
+
+# Tiempo sin zoom ni desplazamiento, en ms, tras el que se vuelven a evaluar las transferencias en la vista
+VIEW_SETTLE = 150
+
 def stage_to_str(stage, k):
     stage_str = 'Z={'
     for z in stage.z:
@@ -83,6 +110,8 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         self.zpWindow = type('ZPWindow', (), {})()
         
         self.import_file_btn.clicked.connect(self.importFiles)
+        self.actionImport_decimated.triggered.connect(self.importDecimated)
+        self.actionCase_statistics.triggered.connect(self.caseStatistics)
         
         self.dataset_list.currentItemChanged.connect(self.populateSelectedDatasetDetails)
         self.ds_title_edit.textEdited.connect(self.updateSelectedDatasetName)
@@ -108,12 +137,22 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         self.dl_remove_btn.clicked.connect(self.removeSelectedDataline)
         self.dl_savgol_wlen.valueChanged.connect(self.updateSelectedDataline)
         self.dl_savgol_ord.valueChanged.connect(self.updateSelectedDataline)
+        self.dl_cases_edit.editingFinished.connect(self.updateDatalineCases)
+        self.dl_density_chk.clicked.connect(self.updateSelectedDataline)
+        self.dl_colormap_cb.addItems(DENSITY_COLORMAPS)
+        self.dl_colormap_cb.activated.connect(self.updateSelectedDataline)
+        self.dl_density_log_chk.clicked.connect(self.updateSelectedDataline)
+        self.dl_cases_lb.setVisible(False)
+        self.dl_cases_edit.setVisible(False)
 
         self.dl_color_pickerbtn.clicked.connect(self.openColorPicker)
 
         self.respd = ResponseDialog()
         self.resp_btn.clicked.connect(self.openResponseDialog)
         self.respd.accepted.connect(self.resolveResponseDialog)
+        self.simq = SimulationQueue(self)
+        self.simq.sig_streamed.connect(self.streamResponse)
+        self.simq.sig_finished.connect(self.finishResponse)
 
         self.tfd = TFDialog()
         self.function_btn.clicked.connect(self.openTFDialog)
@@ -123,21 +162,52 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         self.ds_caseadd_btn.clicked.connect(self.openCaseDialog)
         self.csd.accepted.connect(self.resolveCSDialog)
 
+        try:
+            load_user_transforms()
+        except Exception as e:
+            self.statusbar.showMessage(f'Could not load {USER_TRANSFORMS}: {e}', 4000)
+        for combobox in [self.dl_transform_cb, self.csd.case_transform_cb]:
+            for transform in TRANSFORMS.values():
+                combobox.addItem(transform.label, transform.name)
+
         self.ds_caseadd_btn.setVisible(False)
         self.ds_casenum_lb.setVisible(False)
         self.ds_cases_lb.setVisible(False)
         self.ds_info_lb.setVisible(False)
         self.ds_info_tag.setVisible(False)
 
+        self.vard = VariableDialog(self)
+        self.ds_variables_btn.clicked.connect(self.openVariableDialog)
+        self.ds_variables_btn.setVisible(False)
+
+        self.pipeline = TransformPipeline()
+        self.renderer = PlotRenderer(self.computeDatalinePoints, LINE_STYLES, MARKER_STYLES, source_pyramid, view_curve, self.deferReevaluation)
+        self.unsettled = set()
+        self.settle_timer = QTimer(self)
+        self.settle_timer.setSingleShot(True)
+        self.settle_timer.setInterval(VIEW_SETTLE)
+        self.settle_timer.timeout.connect(self.reevaluateViews)
+        self.scheduler = RenderScheduler(self.renderCanvases, self.autosave, FRAME_INTERVAL, AUTOSAVE_IDLE, self)
+        self.ds_follow_chk.clicked.connect(self.updateSelectedDatasetFollow)
+        self.ds_follow_chk.setVisible(False)
+        self.follow_timer = QTimer(self)
+        self.follow_timer.setInterval(FOLLOW_INTERVAL)
+        self.follow_timer.timeout.connect(self.followDatasets)
+        self.follow_timer.start()
+
         self.pmptd = PromptDialog()
+
+        self.importd = ImportDialog(self)
+        self.importd.queue.sig_loaded.connect(self.addImportedDataset)
+        self.importd.queue.sig_done.connect(self.statusbar.clearMessage)
         
-        self.plt_labelsize_sb.valueChanged.connect(self.updatePlots)
-        self.plt_legendsize_sb.valueChanged.connect(self.updatePlots)
-        self.plt_ticksize_sb.valueChanged.connect(self.updatePlots)
-        self.plt_titlesize_sb.valueChanged.connect(self.updatePlots)
+        self.plt_labelsize_sb.valueChanged.connect(self.schedulePlots)
+        self.plt_legendsize_sb.valueChanged.connect(self.schedulePlots)
+        self.plt_ticksize_sb.valueChanged.connect(self.schedulePlots)
+        self.plt_titlesize_sb.valueChanged.connect(self.schedulePlots)
         self.plt_autoscale.clicked.connect(self.autoscalePlots)
-        self.plt_legendpos.activated.connect(self.updatePlots)
-        self.plt_grid.stateChanged.connect(self.updatePlots)
+        self.plt_legendpos.activated.connect(self.schedulePlots)
+        self.plt_grid.stateChanged.connect(self.schedulePlots)
         self.tabbing_plots.currentChanged.connect(self.updatePlots)
         
         self.plots_canvases = [
@@ -216,6 +286,60 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         self.updateSelectedDataline()
         self.updatePlots()
 
+    def caseStatistics(self):
+        """Adds the mean and a percentile band of the selected dataline across the cases of its dataset."""
+        if(not self.selected_dataline_widget):
+            self.statusbar.showMessage('Select a dataline first', 2000)
+            return
+        dl = self.selected_dataline_data
+        ds = dl.dataset
+        if(len(ds.data) < 2):
+            self.statusbar.showMessage(f'{ds.title} has a single case', 2000)
+            return
+        text, ok = QInputDialog.getText(self, 'Case statistics', 'Percentiles of the band (empty for min/max)', text=DEFAULT_PERCENTILES)
+        if(not ok):
+            return
+        try:
+            percentiles = [float(p) for p in text.split(',') if p.strip()]
+            xfield, fields = ds.add_statistics(dl.xsource, dl.ysource, dl.transform, percentiles, dl.family)
+        except ValueError as e:
+            self.statusbar.showMessage(f'Could not compute the statistics: {e}', 4000)
+            return
+
+        band = ds.create_dataline()
+        mean = ds.create_dataline()
+        for new in [band, mean]:
+            new.plots = dl.plots
+            new.xsource = xfield
+            new.xscale = dl.xscale
+            new.xoffset = dl.xoffset
+            new.yscale = dl.yscale
+            new.yoffset = dl.yoffset
+            new.color = dl.color
+            new.linestyle = 'Solid'
+            new.markerstyle = 'None'
+        mean.ysource = fields['mean']
+        mean.name = f'{dl.name} mean'
+        if(percentiles):
+            band.ysource = fields[f'p{min(percentiles):g}']
+            band.fill_to = fields[f'p{max(percentiles):g}']
+            band.name = f'{dl.name} p{min(percentiles):g}-p{max(percentiles):g}'
+        else:
+            band.ysource = fields['min']
+            band.fill_to = fields['max']
+            band.name = f'{dl.name} min-max'
+
+        dsi = [self.dataset_list.item(x).data(Qt.UserRole) for x in range(self.dataset_list.count())].index(ds)
+        dli = sum(len(self.datalines[x]) for x in range(dsi + 1))
+        for new in [band, mean]:
+            qlwt = QListWidgetItem()
+            qlwt.setData(Qt.UserRole, new)
+            qlwt.setText(new.name)
+            self.dataline_list.insertItem(dli, qlwt)
+            self.datalines[dsi].append(new)
+            dli += 1
+        self.updatePlots()
+
     def removeDataline(self, i):        
         try:
             dsi, dli = self.getInternalDataIndexes(i)
@@ -265,20 +389,71 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         files, _ = QFileDialog.getOpenFileNames(self,"Select files", "","All Files (*);;CSV files (*.csv);;SPICE output files (*.raw)", options=options)
         self.processFiles(files)
 
-    def processFiles(self, filenamearray):
+    def getDatasetOrigins(self):
+        return [
+            self.dataset_list.item(x).data(Qt.UserRole).origin
+            for x in range(self.dataset_list.count())
+        ]
+
+    def importDecimated(self):
+        budget, ok = QInputDialog.getInt(self, 'Decimated import', 'Points to keep per column', DECIMATION_BUDGET, 1000, 10**8, 1000)
+        if(not ok):
+            return
+        files, _ = QFileDialog.getOpenFileNames(self, "Select files", "", "CSV files (*.csv)")
+        self.processFiles(files, budget)
+
+    def processFiles(self, filenamearray, budget=None):
+        # Los archivos se parsean en otros procesos, cada dataset se agrega cuando termina (addImportedDataset)
+        skip = self.getDatasetOrigins() + self.importd.queuedFiles()
+        files = []
+        options = {}
         for f in filenamearray:
-            # try:
-            ds = Dataset(filepath=f)
-            dataset_items_origin = [
-                self.dataset_list.item(x).data(Qt.UserRole).origin
-                for x in range(self.dataset_list.count())
-            ]
-            if(ds.origin not in dataset_items_origin):
-                self.droppedFiles.append(ds.origin)
-                self.addDataset(ds)
-            # except(ValueError):
-            #     print('Wrong file config')
-        self.statusbar.clearMessage()
+            if(f in skip or f in files):
+                continue
+            if(f.lower().endswith('.raw')):
+                variables = self.askVariables(f)
+                if(variables is False):
+                    continue
+                options[f] = {'variables': variables}
+            elif(f.lower().endswith('.csv') and budget):
+                options[f] = {'budget': budget}
+            files.append(f)
+        if(not files):
+            self.statusbar.clearMessage()
+            return
+        self.statusbar.showMessage('Loading files')
+        self.importd.addFiles(files, options)
+
+    def askVariables(self, filepath):
+        """Variables to import from a large .raw, None for all of them and False if the import was cancelled."""
+        try:
+            raw = RawFile(filepath, index=False)
+        except (OSError, ValueError):
+            return None
+        if(len(raw.variables) <= VARIABLE_PROMPT_THRESHOLD):
+            return None
+        info = f'{os.path.basename(filepath)}: {len(raw.variables)} variables, {raw.points} points, {raw.mode}'
+        self.vard.populate(raw.variables, info, locked=raw.variables[:1])
+        if(not self.vard.exec()):
+            return False
+        return self.vard.selectedVariables()
+
+    def openVariableDialog(self):
+        ds = self.selected_dataset_data
+        self.vard.populate(ds.available_fields, ds.title, locked=ds.fields)
+        if(self.vard.exec()):
+            ds.load_variables(self.vard.selectedVariables())
+
+    def addImportedDataset(self, ds):
+        if(ds.origin not in self.getDatasetOrigins()):
+            self.droppedFiles.append(ds.origin)
+            self.addDataset(ds)
+
+    def closeEvent(self, event):
+        self.scheduler.flush()
+        self.importd.queue.shutdown()
+        self.simq.shutdown()
+        super().closeEvent(event)
 
     def openTFDialog(self):
         self.tfd.open()
@@ -317,19 +492,27 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         # reemplaza "pi" por "np.pi" evitando que ocurra "np.np.pi"
         expression_piprocessed = re.sub(r'(?<!np\.)\bpi\b', 'np.pi', expression)
 
-        x = eval(expression_piprocessed)
-        response = signal.lsim(self.selected_dataset_data.tf.tf_object , U = x , T = t)[1]
-        
-        self.selected_dataset_data.data[0][time_title] = t
-        self.selected_dataset_data.data[0][input_title] = x
-        self.selected_dataset_data.data[0][ans_title] = response
-
-        self.selected_dataset_data.fields.append(time_title)
-        self.selected_dataset_data.fields.append(input_title)
-        self.selected_dataset_data.fields.append(ans_title)
-        
-        self.populateSelectedDatasetDetails(self.selected_dataset_widget, None)
-        self.updateSelectedDataline()
+        x = np.broadcast_to(np.asarray(eval(expression_piprocessed), dtype=np.float64), t.shape)
+
+        # La simulación corre en otro hilo, las columnas se van llenando a medida que llegan los bloques
+        self.simq.submit(self.selected_dataset_data, [time_title, input_title, ans_title], t, x)
+        self.statusbar.showMessage(f'Simulating {ans_title}')
+
+    def streamResponse(self, job):
+        ds = job.ds
+        added = [name for name in job.names if name not in ds.fields]
+        ds.fields.extend(added)
+        if(added and ds is self.selected_dataset_data):
+            self.populateSelectedDatasetDetails(self.selected_dataset_widget, None)
+            self.updateSelectedDataline()
+        self.refreshDatasetLines(ds, [0])
+        self.statusbar.showMessage(f'Simulating {job.names[2]}: {int(100 * job.progress)}%')
+
+    def finishResponse(self, job):
+        if(job.error):
+            self.statusbar.showMessage(f'Could not simulate the response: {job.error}', 4000)
+        else:
+            self.statusbar.clearMessage()
 
 
     def condition_canvas(self, canvas, xlabel, ylabel, xscale='linear', yscale='linear', grid=True):
@@ -379,45 +562,67 @@ class MainWindow(QMainWindow, Ui_MainWindow):
             dli = dli + len(self.datalines[x])
             if(ds.origin == self.selected_dataset_data.origin):
                 break
+        cases = list(range(first_case, min(last_case + 1, casenum)))
+        colors = []
         color_iter = 0
-        for case in range(first_case, min(last_case + 1, casenum)):
-            dl = self.selected_dataset_data.create_dataline(case)
-            qlwt = QListWidgetItem()
-            dl.plots = self.csd.case_render_cb.currentIndex()
-            dl.transform = self.csd.case_transform_cb.currentIndex()
-            dl.xsource = self.csd.case_xdata_cb.currentText()
-            dl.xscale = self.csd.case_xscale_sb.value()
-            dl.xoffset = self.csd.case_xoffset_sb.value()
-            dl.ysource = self.csd.case_ydata_cb.currentText()
-            dl.yscale = self.csd.case_yscale_sb.value()
-            dl.yoffset = self.csd.case_yoffset_sb.value()
+        for case in cases:
             if(self.csd.case_randomcol_rb.isChecked()):
-                dl.color = ["#"+''.join([random.choice('0123456789ABCDEF') for i in range(6)])][0]
+                colors.append(["#"+''.join([random.choice('0123456789ABCDEF') for i in range(6)])][0])
             elif(self.csd.case_presetcol_rb.isChecked()):
                 colorpalette_i = self.csd.case_palettecol_cb.currentIndex()
                 colorpalette = self.csd.COLOR_LIST[colorpalette_i]
-                dl.color = colorpalette[color_iter]
+                colors.append(colorpalette[color_iter])
                 color_iter += 1
                 if(color_iter == len(colorpalette)):
                     color_iter = 0
             else:
-                dl.color = self.csd.color
-            dl.linestyle = self.csd.case_style_cb.currentText()
-            dl.linewidth = self.csd.case_linewidth_sb.value()
-            dl.markerstyle = self.csd.case_marker_cb.currentText()
-            dl.markersize = self.csd.case_markersize_sb.value()
-            if(self.csd.case_inforname_rb.isChecked()):
-                dstitle = self.selected_dataset_data.title 
-                dscases = self.selected_dataset_data.casenames
-                if(case < len(dscases)):
-                    dl.name = dstitle + ' ' + dscases[case]
-            qlwt.setText(dl.name)
-            dl.name = dl.name if self.csd.case_addlegend_cb.isChecked() else '_' + dl.name
-            qlwt.setData(Qt.UserRole, dl)
-            self.dataline_list.insertItem(dli, qlwt)
-            self.datalines[self.dataset_list.currentRow()].append(dl)
+                colors.append(self.csd.color)
+
+        if(self.csd.case_family_cb.isChecked() and cases):
+            # Una sola dataline dibuja todos los casos como una LineCollection
+            dl = self.selected_dataset_data.create_dataline(cases[0])
+            self.applyCaseTemplate(dl)
+            dl.family = cases
+            dl.family_colors = colors
+            dl.color = colors[0]
+            dl.name = f'{self.selected_dataset_data.title} cases {format_cases(cases)}'
+            self.addCaseDataline(dl, dli)
+        else:
+            for case, color in zip(cases, colors):
+                dl = self.selected_dataset_data.create_dataline(case)
+                self.applyCaseTemplate(dl)
+                dl.color = color
+                if(self.csd.case_inforname_rb.isChecked()):
+                    dstitle = self.selected_dataset_data.title 
+                    dscases = self.selected_dataset_data.casenames
+                    if(case < len(dscases)):
+                        dl.name = dstitle + ' ' + dscases[case]
+                self.addCaseDataline(dl, dli)
         self.updatePlots()
 
+    def applyCaseTemplate(self, dl):
+        """Settings of the case dialog that every dataline it creates shares."""
+        dl.plots = self.csd.case_render_cb.currentIndex()
+        dl.transform = self.csd.case_transform_cb.currentData()
+        dl.xsource = self.csd.case_xdata_cb.currentText()
+        dl.xscale = self.csd.case_xscale_sb.value()
+        dl.xoffset = self.csd.case_xoffset_sb.value()
+        dl.ysource = self.csd.case_ydata_cb.currentText()
+        dl.yscale = self.csd.case_yscale_sb.value()
+        dl.yoffset = self.csd.case_yoffset_sb.value()
+        dl.linestyle = self.csd.case_style_cb.currentText()
+        dl.linewidth = self.csd.case_linewidth_sb.value()
+        dl.markerstyle = self.csd.case_marker_cb.currentText()
+        dl.markersize = self.csd.case_markersize_sb.value()
+
+    def addCaseDataline(self, dl, dli):
+        qlwt = QListWidgetItem()
+        qlwt.setText(dl.name)
+        dl.name = dl.name if self.csd.case_addlegend_cb.isChecked() else '_' + dl.name
+        qlwt.setData(Qt.UserRole, dl)
+        self.dataline_list.insertItem(dli, qlwt)
+        self.datalines[self.dataset_list.currentRow()].append(dl)
+
     def populateSelectedDatasetDetails(self, listitemwidget, qlistwidget):
         if(not listitemwidget):
             self.setDatasetControlsStatus(False)
@@ -440,9 +645,55 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         self.ds_casenum_lb.setVisible(len(self.selected_dataset_data.data) > 1)
         self.ds_cases_lb.setVisible(len(self.selected_dataset_data.data) > 1)
         self.ds_info_lb.setText(self.selected_dataset_data.miscinfo)
+        self.ds_variables_btn.setVisible(self.selected_dataset_data.type == 'spice')
+        self.ds_follow_chk.setVisible(self.selected_dataset_data.tail is not None)
+        self.ds_follow_chk.setChecked(self.selected_dataset_data.follow)
+        logical, actual = self.selected_dataset_data.memory_usage()
+        listitemwidget.setToolTip(f'{actual / 1024**2:.1f} MiB in memory ({logical / 1024**2:.1f} MiB without sharing between cases)')
 
 
     
+    def updateSelectedDatasetFollow(self):
+        self.selected_dataset_data.follow = self.ds_follow_chk.isChecked()
+        if(self.selected_dataset_data.follow):
+            self.followDatasets()
+
+    def followDatasets(self):
+        for x in range(self.dataset_list.count()):
+            ds = self.dataset_list.item(x).data(Qt.UserRole)
+            if(not ds.follow):
+                continue
+            try:
+                changed = ds.read_appended()
+            except ValueError as e:
+                ds.follow = False
+                if(ds is self.selected_dataset_data):
+                    self.ds_follow_chk.setChecked(False)
+                self.statusbar.showMessage(f'Stopped following {ds.title}: {e}', 4000)
+                continue
+            if(changed):
+                self.refreshDatasetLines(ds, changed)
+                if(ds is self.selected_dataset_data):
+                    self.ds_casenum_lb.setText(str(len(ds.data)))
+
+    def refreshDatasetLines(self, ds, cases):
+        """Updates the lines already drawn for the given cases of ds, without rebuilding the plots."""
+        canvases = []
+        for dl in ds.datalines:
+            line = self.renderer.lines.get(dl)
+            if(not set(dl.cases()) & set(cases) or line is None or line.axes is None):
+                continue
+            try:
+                self.renderer.update(line.axes, ds, dl)
+            except ValueError:
+                continue
+            if(line.figure.canvas not in canvases):
+                canvases.append(line.figure.canvas)
+        for canvas in canvases:
+            self.renderer.relim(canvas.ax)
+            canvas.ax.autoscale_view()
+            canvas.draw_idle()
+
     def updateSelectedDatasetName(self):
         new_title = self.ds_title_edit.text()
         self.selected_dataset_widget.setText(new_title)
@@ -472,7 +723,7 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         self.dl_xdata_cb.addItems(self.selected_dataline_data.dataset.fields)
         self.dl_ydata_cb.addItems(self.selected_dataline_data.dataset.fields)
         
-        self.dl_transform_cb.setCurrentIndex(self.selected_dataline_data.transform)
+        self.dl_transform_cb.setCurrentIndex(self.dl_transform_cb.findData(self.selected_dataline_data.transform))
         self.dl_xdata_cb.setCurrentText(self.selected_dataline_data.xsource)
         self.dl_xscale_sb.setValue(self.selected_dataline_data.xscale)
         self.dl_xoffset_sb.setValue(self.selected_dataline_data.xoffset)
@@ -487,6 +738,14 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         self.dl_color_label.setStyleSheet(f'background-color: {self.selected_dataline_data.color}')
         self.dl_savgol_wlen.setValue(self.selected_dataline_data.savgolwindow)
         self.dl_savgol_ord.setValue(self.selected_dataline_data.savgolord)
+        family = self.selected_dataline_data.family
+        self.dl_cases_lb.setVisible(family is not None)
+        self.dl_cases_edit.setVisible(family is not None)
+        if(family is not None):
+            self.dl_cases_edit.setText(format_cases([case for case in family if case not in self.selected_dataline_data.hidden]))
+        self.dl_density_chk.setChecked(self.selected_dataline_data.density)
+        self.dl_colormap_cb.setCurrentText(self.selected_dataline_data.colormap)
+        self.dl_density_log_chk.setChecked(self.selected_dataline_data.density_log)
         
         self.dl_xscale_sb.blockSignals(False)
         self.dl_yscale_sb.blockSignals(False)
@@ -498,20 +757,23 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         self.dl_savgol_ord.blockSignals(False)
 
     def updateSelectedDataline(self):
-        self.saveFile(True)
         if(not self.selected_dataline_widget):
             return
+        previous = self.getPlotFromIndex(self.selected_dataline_data.plots).canvas
         new_name = self.dl_name_edit.text()
         self.selected_dataline_widget.setText(new_name)
         self.selected_dataline_data.name = new_name
         self.selected_dataline_data.plots = self.dl_render_cb.currentIndex()
-        self.selected_dataline_data.transform = self.dl_transform_cb.currentIndex()
+        self.selected_dataline_data.transform = self.dl_transform_cb.currentData()
         self.selected_dataline_data.xsource = self.dl_xdata_cb.currentText()
         self.selected_dataline_data.xscale = self.dl_xscale_sb.value()
         self.selected_dataline_data.xoffset = self.dl_xoffset_sb.value()
         self.selected_dataline_data.ysource = self.dl_ydata_cb.currentText()
         self.selected_dataline_data.yscale = self.dl_yscale_sb.value()
         self.selected_dataline_data.yoffset = self.dl_yoffset_sb.value()
+        if(self.dl_color_edit.text() != self.selected_dataline_data.color):
+            # Un color elegido a mano pinta toda la familia
+            self.selected_dataline_data.family_colors = []
         self.selected_dataline_data.color = self.dl_color_edit.text()
         self.selected_dataline_data.linestyle = self.dl_style_cb.currentText()
         self.selected_dataline_data.linewidth = self.dl_linewidth_sb.value()
@@ -519,10 +781,29 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         self.selected_dataline_data.markersize = self.dl_markersize_sb.value()
         self.selected_dataline_data.savgolwindow = self.dl_savgol_wlen.value()
         self.selected_dataline_data.savgolord = self.dl_savgol_ord.value()
+        self.selected_dataline_data.density = self.dl_density_chk.isChecked()
+        self.selected_dataline_data.colormap = self.dl_colormap_cb.currentText()
+        self.selected_dataline_data.density_log = self.dl_density_log_chk.isChecked()
         self.populateSelectedDatalineDetails(self.selected_dataline_widget, None)
-        self.updatePlots()
+        # Si el dataline cambió de gráfico hay que sacarlo del anterior
+        self.scheduler.request_render([previous, self.getPlotFromIndex(self.selected_dataline_data.plots).canvas])
+        self.scheduler.request_save()
 
     
+    def updateDatalineCases(self):
+        """Shows only the listed cases of a family, the others stay in its collection but transparent."""
+        dl = self.selected_dataline_data
+        if(not self.selected_dataline_widget or dl.family is None):
+            return
+        try:
+            shown = set(parse_cases(self.dl_cases_edit.text()))
+        except ValueError:
+            self.statusbar.showMessage('Cases must be listed like 0-9, 12', 2000)
+            return
+        dl.hidden = [case for case in dl.family if case not in shown]
+        self.scheduler.request_render([self.getPlotFromIndex(dl.plots).canvas])
+        self.scheduler.request_save()
+
     def openColorPicker(self):
         dialog = QColorDialog(self)
         dialog.setCurrentColor(Qt.red)
@@ -534,12 +815,15 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         self.dl_color_edit.setText(color.name())
         self.dl_color_label.setStyleSheet(f'background-color: {color.name()}')
         self.selected_dataline_data.color = color.name()
-        self.updatePlots()
+        self.selected_dataline_data.family_colors = []
+        self.scheduler.request_render([self.getPlotFromIndex(self.selected_dataline_data.plots).canvas])
+        self.scheduler.request_save()
 
     def setDatasetControlsStatus(self, enabled=True):
         self.ds_title_edit.setEnabled(enabled)
         self.ds_addline_btn.setEnabled(enabled)
         self.ds_caseadd_btn.setEnabled(enabled)
+        self.ds_variables_btn.setEnabled(enabled)
         self.ds_remove_btn.setEnabled(enabled)
 
     def setDatalineControlsStatus(self, enabled=True):
@@ -560,7 +844,7 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         processedCanvas = [x.canvas for x in self.plots_canvases[self.tabbing_plots.currentIndex()]]
         for canvas in processedCanvas:
             canvas.ax.margins(self.plt_marginx.value(), self.plt_marginy.value())
-            canvas.ax.relim()
+            self.renderer.relim(canvas.ax)
             canvas.ax.autoscale()
         self.updatePlots()
 
@@ -569,87 +853,54 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         self.updatePlots()
 
     def updatePlots(self):
+        """Redraws the current tab right away, a redraw that was scheduled is not needed anymore."""
+        self.scheduler.cancel_render()
+        self.scheduler.request_save()
+        self.renderCanvases(None)
+
+    def schedulePlots(self):
+        self.scheduler.request_render()
+        self.scheduler.request_save()
+
+    def deferReevaluation(self, ax):
+        """Every zoom, pan or resize restarts the wait, the curves of ax are evaluated once it ends."""
+        self.unsettled.add(ax)
+        self.settle_timer.start()
+
+    def reevaluateViews(self):
+        for ax in self.unsettled:
+            self.renderer.reevaluate(ax)
+        self.unsettled.clear()
+
+    def autosave(self):
         self.saveFile(True)
+
+    def renderCanvases(self, canvases):
+        """Redraws the canvases of the current tab, only the ones in canvases unless it is None."""
         processedCanvas = [x.canvas for x in self.plots_canvases[self.tabbing_plots.currentIndex()]]
+        if(canvases is not None):
+            processedCanvas = [canvas for canvas in processedCanvas if canvas in canvases]
         for canvas in processedCanvas:
-            plotlist = []
-            for artist in canvas.ax.lines + canvas.ax.collections:
-                artist.remove()
+            entries = []
             for x in range(self.dataset_list.count()):
                 ds = self.dataset_list.item(x).data(Qt.UserRole)
                 for dl in ds.datalines:
-                    dl_canvas = self.getPlotFromIndex(dl.plots).canvas
-                    if(dl_canvas == canvas):
-                        
-                        for label in (canvas.ax.get_xticklabels() + canvas.ax.get_yticklabels()):
-                            label.set_fontsize(self.plt_ticksize_sb.value())
-                        canvas.ax.xaxis.label.set_size(self.plt_labelsize_sb.value())
-                        canvas.ax.yaxis.label.set_size(self.plt_labelsize_sb.value())
-                        canvas.ax.title.set_size(self.plt_titlesize_sb.value())
-
-                        x, y = ds.get_datapoints(dl.xsource, dl.ysource, dl.casenum)
-
-                        if(dl.transform == 1):
-                            y = np.abs(y)
-                        elif(dl.transform == 2):
-                            y = np.angle(y, deg=True)
-                        elif(dl.transform == 3):
-                            y = np.unwrap(np.angle(y, deg=True), period=360)
-                        elif(dl.transform == 4):
-                            y = 20 * np.log10(y)
-                        elif(dl.transform == 5):
-                            y = 20 * np.log10(np.abs(y))
-                        elif(dl.transform == 6 or dl.transform == 7):
-                            y = np.unwrap(y, period=360)
-                        else:
-                            y = np.real(y)
-
-                        if(dl.transform in [2,3,6]):
-                            canvas.ax.yaxis.set_major_locator(ticker.MaxNLocator(nbins='auto', steps=[1.8,2.25,4.5,9]))
-                        elif(dl.transform == 7):
-                            canvas.ax.yaxis.set_major_locator(ticker.MaxNLocator(nbins='auto', steps=[4.5,], integer=True))
-                        else:
-                            canvas.ax.yaxis.set_major_locator(ticker.AutoLocator())
-
-                        try:
-                            savgolw = int(dl.savgolwindow)
-                            if(savgolw <= len(x)):
-                                savgolo = int(dl.savgolord)
-                                y = y if savgolw <= savgolo else savgol_filter(y, savgolw, savgolo)
-                        except ValueError:
-                            pass
-
-                        try:
-                            line, = canvas.ax.plot(
-                                x * dl.xscale + dl.xoffset,
-                                y * dl.yscale + dl.yoffset,
-                                linestyle = LINE_STYLES[dl.linestyle],
-                                linewidth = dl.linewidth,
-                                marker = MARKER_STYLES[dl.markerstyle],
-                                markersize = dl.markersize,
-                                color = dl.color,
-                                label = dl.name,
-                            )
-                            if(dl.name != '' and dl.name[0] != '_'):
-                                plotlist.append(line)
-                        except ValueError:
-                            self.statusbar.showMessage('Wrong data source matching', 2000)
-            if(self.plt_legendpos.currentText() == 'None'):
-                if(canvas.ax.get_legend()):
-                    canvas.ax.get_legend().remove()
-            else:
-                canvas.ax.legend(handles=plotlist, fontsize=self.plt_legendsize_sb.value(), loc=self.plt_legendpos.currentIndex())
-            if(self.plt_grid.isChecked()):
-                canvas.ax.grid(True, which="both", linestyle=':')
-            else:
-                canvas.ax.grid(False, which="both")
-                
+                    if(self.getPlotFromIndex(dl.plots).canvas == canvas):
+                        entries.append((ds, dl))
+
+            failed = render_axes(self.renderer, canvas.ax, entries, self.generalConfig())
+            if(failed):
+                self.statusbar.showMessage('Wrong data source matching', 2000)
 
             try:
                 canvas.draw_idle()
             except ValueError:
                 pass
 
+    def computeDatalinePoints(self, ds, dl, case=None, ysource=None):
+        """Data of a dataline (or of one case of its family) as drawn: transformed, smoothed, scaled and offset."""
+        return self.pipeline.run(ds, dl, case, ysource)
+
     def showZPWindow(self):
         zeros = self.selected_dataset_data.zeros[0]
         poles = self.selected_dataset_data.poles[0]
@@ -673,24 +924,33 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         else:
             filename, _ = QFileDialog.getSaveFileName(self,"Save File", "","Plot tool file (*.pto)")
         if(not filename): return
+        # El proyecto guarda los datos, las columnas que todavía están solo en el .raw se leen antes de abrir el archivo
+        try:
+            for ds in self.datasets:
+                ds.data.load_all()
+        except ValueError as e:
+            self.statusbar.showMessage(f'Could not save the project: {e}', 4000)
+            return
         with open(filename, 'wb') as f:
             flat_plots_canvas = [item.canvas for sublist in self.plots_canvases for item in sublist]
             plots_data = []
             for canv in flat_plots_canvas:
                 plots_data.append(canv.get_properties())
-            general_config = {
-                'labelsize_sb': self.plt_labelsize_sb.value(),
-                'legendsize_sb': self.plt_legendsize_sb.value(),
-                'ticksize_sb': self.plt_ticksize_sb.value(),
-                'titlesize_sb': self.plt_titlesize_sb.value(),
-                'legendpos': self.plt_legendpos.currentIndex(),
-                'grid': self.plt_grid.isChecked(),
-                'marginx': self.plt_marginx.value(),
-                'marginy': self.plt_marginy.value()      
-            }
-            d = [self.datasets, self.datalines, plots_data, general_config]
+            d = [self.datasets, self.datalines, plots_data, self.generalConfig()]
             pickle.dump(d, f, pickle.HIGHEST_PROTOCOL)
 
+    def generalConfig(self):
+        return {
+            'labelsize_sb': self.plt_labelsize_sb.value(),
+            'legendsize_sb': self.plt_legendsize_sb.value(),
+            'ticksize_sb': self.plt_ticksize_sb.value(),
+            'titlesize_sb': self.plt_titlesize_sb.value(),
+            'legendpos': self.plt_legendpos.currentIndex(),
+            'grid': self.plt_grid.isChecked(),
+            'marginx': self.plt_marginx.value(),
+            'marginy': self.plt_marginy.value()      
+        }
+
     def loadFile(self):
         filename, _ = QFileDialog.getOpenFileName(self,"Select files", "","Plot tool file (*.pto)")
         if(not filename): return
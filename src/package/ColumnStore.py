@@ -0,0 +1,203 @@
+from collections.abc import MutableMapping
+import hashlib
+import itertools
+import weakref
+import numpy as np
+
+# Número de cada ColumnStore del proceso, con version identifica sus datos en los cachés aunque el objeto se libere
+_serials = itertools.count()
+
+
+class CaseColumns(MutableMapping):
+    """Dict-like view of one case of a ColumnStore, so Dataset.data[case][name] keeps working."""
+    def __init__(self, store, case):
+        self.store = store
+        self.case = case
+
+    def __getitem__(self, name):
+        if(name not in self.store.names[self.case]):
+            raise KeyError(name)
+        return self.store.get(name, self.case)
+
+    def __setitem__(self, name, values):
+        self.store.set(name, self.case, values)
+
+    def __delitem__(self, name):
+        self.store.remove(name, self.case)
+
+    def __iter__(self):
+        return iter(list(self.store.names[self.case]))
+
+    def __len__(self):
+        return len(self.store.names[self.case])
+
+    def __contains__(self, name):
+        return name in self.store.names[self.case]
+
+
+class ColumnStore():
+    """Columnar storage behind Dataset.data, one contiguous array per (column, case) handed out without copies."""
+    def __init__(self, cases=1, loader=None, shared=()):
+        # loader(name, case) produce las columnas declaradas la primera vez que se leen
+        self.loader = loader
+        # Las columnas de shared (el eje x de un .step) que son iguales se guardan una vez, de solo lectura
+        self.shared = set(shared)
+        self.names = [[] for case in range(cases)]
+        self.columns = [{} for case in range(cases)]
+        self.meta = [{} for case in range(cases)]
+        self._interned = weakref.WeakValueDictionary()
+        self._buffers = [{} for case in range(cases)]
+        # version crece con cada cambio, salvo al cargar una columna declarada, los cachés la usan de clave
+        self.version = 0
+        self.serial = next(_serials)
+
+    @classmethod
+    def from_dicts(cls, cases, shared=()):
+        store = cls(len(cases), shared=shared)
+        for i, case in enumerate(cases):
+            for name, values in case.items():
+                store.set(name, i, values)
+        return store
+
+    def __len__(self):
+        return len(self.names)
+
+    def __getstate__(self):
+        # Los buffers de append() tienen capacidad de sobra, no vale la pena guardarlos
+        state = self.__dict__.copy()
+        state['_buffers'] = [{} for case in self.names]
+        state.pop('_interned')
+        state.pop('serial')
+        return state
+
+    def __setstate__(self, state):
+        state.setdefault('_buffers', [{} for case in state['names']])
+        state.setdefault('version', 0)
+        self.__dict__.update(state)
+        self.serial = next(_serials)
+        # Las referencias débiles no se guardan, se vuelven a armar con las columnas compartidas
+        self._interned = weakref.WeakValueDictionary()
+        for case in self.columns:
+            for name, values in case.items():
+                if(name in self.shared and values.ndim == 1):
+                    self.intern(values)
+
+    def __getitem__(self, case):
+        if(case < 0):
+            case += len(self)
+        if(case < 0 or case >= len(self)):
+            raise IndexError(case)
+        return CaseColumns(self, case)
+
+    def __iter__(self):
+        return (CaseColumns(self, case) for case in range(len(self)))
+
+    def add_case(self):
+        self.names.append([])
+        self.columns.append({})
+        self.meta.append({})
+        self._buffers.append({})
+        return len(self) - 1
+
+    def declare(self, name, case=0):
+        """Registers a column that the loader will produce the first time it is read."""
+        if(name not in self.names[case]):
+            self.names[case].append(name)
+            self.meta[case][name] = {'dtype': None, 'length': None, 'nbytes': 0, 'loaded': False}
+
+    def intern(self, values):
+        """Returns the stored array equal to values if there is one, otherwise stores values as the shared copy."""
+        # Referencia débil: cuando ninguna columna usa el array, deja de estar acá
+        key = (values.dtype.str, values.shape, hashlib.sha1(values.view(np.uint8)).hexdigest())
+        stored = self._interned.get(key)
+        if(stored is not None and np.array_equal(stored, values)):
+            return stored
+        if(values.flags.writeable):
+            values.setflags(write=False)
+        self._interned[key] = values
+        return values
+
+    def set(self, name, case, values):
+        return self._put(name, case, self._adopt(name, case, values))
+
+    def _adopt(self, name, case, values):
+        values = np.ascontiguousarray(values)
+        if(name in self.shared and values.ndim == 1):
+            values = self.intern(values)
+        self._buffers[case].pop(name, None)
+        return values
+
+    def set_all(self, name, values):
+        """Stores values once, read-only, as column name of every case."""
+        values = np.ascontiguousarray(values)
+        values.setflags(write=False)
+        self.shared.add(name)
+        for case in range(len(self)):
+            self._buffers[case].pop(name, None)
+            self._put(name, case, values)
+        return values
+
+    def _put(self, name, case, values, changed=True):
+        if(changed):
+            self.version += 1
+        if(name not in self.names[case]):
+            self.names[case].append(name)
+        self.columns[case][name] = values
+        self.meta[case][name] = {'dtype': values.dtype, 'length': len(values), 'nbytes': values.nbytes, 'loaded': True}
+        return values
+
+    def append(self, name, case, values, keep=None):
+        """Appends values to a column after its first keep rows (all of them by default)."""
+        # La columna es el principio de un buffer que duplica su capacidad al llenarse, se copia O(log n) veces
+        values = np.asarray(values)
+        column = self.get(name, case) if name in self.names[case] else np.empty(0, dtype=values.dtype)
+        keep = len(column) if keep is None else min(keep, len(column))
+        length = keep + len(values)
+        dtype = np.result_type(column, values)
+        buffer = self._buffers[case].get(name)
+        if(buffer is None or column.base is not buffer or len(buffer) < length or buffer.dtype != dtype):
+            capacity = max(length, 2 * len(column), 1024)
+            grown = np.empty(capacity, dtype=dtype)
+            grown[:keep] = column[:keep]
+            buffer = grown
+        buffer[keep:length] = values
+        self._buffers[case][name] = buffer
+        return self._put(name, case, buffer[:length])
+
+    def get(self, name, case=0):
+        try:
+            return self.columns[case][name]
+        except KeyError:
+            if(name not in self.names[case] or self.loader is None):
+                raise
+            # Cargar una columna declarada no cambia los datos, version queda igual para no invalidar cachés
+            return self._put(name, case, self._adopt(name, case, self.loader(name, case)), changed=False)
+
+    def load_all(self):
+        """Reads every declared column that is not loaded yet."""
+        for case in range(len(self)):
+            for name in self.names[case]:
+                self.get(name, case)
+
+    def remove(self, name, case=0):
+        self.version += 1
+        self.names[case].remove(name)
+        self.columns[case].pop(name, None)
+        self._buffers[case].pop(name, None)
+        self.meta[case].pop(name, None)
+
+    def is_loaded(self, name, case=0):
+        return name in self.columns[case]
+
+    def info(self, name, case=0):
+        """Metadata of a column: dtype, length, nbytes and whether it is already loaded."""
+        return dict(self.meta[case][name])
+
+    def nbytes(self):
+        """Bytes actually held, columns shared between cases are counted once."""
+        unique = {id(values): values.nbytes for case in self.columns for values in case.values()}
+        return sum(unique.values())
+
+    def logical_nbytes(self):
+        """Bytes the loaded columns would take with a private copy per case."""
+        return sum(meta['nbytes'] for case in self.meta for meta in case.values())
@@ -1,11 +1,12 @@
 from collections import defaultdict
+from src.package.transforms import LEGACY_TRANSFORMS
 
 class Dataline():
     def __init__(self, dataset, name='', casenum=0, color='#CDCDCD', xsource='', ysource=''):
         self.name = name
         self.color = color
         self.plots = 0
-        self.transform = 0
+        self.transform = 'none'
         self.xsource = xsource
         self.xscale = 1
         self.xoffset = 0
@@ -19,4 +20,50 @@ class Dataline():
         self.savgolwindow = 1
         self.savgolord = 0
         self.casenum = casenum
-        self.dataset = dataset
\ No newline at end of file
+        self.family = None
+        self.family_colors = []
+        self.hidden = []
+        self.fill_to = ''
+        self.density = False
+        self.colormap = 'viridis'
+        self.density_log = True
+        self.dataset = dataset
+
+    def cases(self):
+        """Cases drawn by the dataline: every case of its family, or just casenum."""
+        return [self.casenum] if self.family is None else self.family
+    def __setstate__(self, state):
+        # Proyectos viejos guardan el índice del transform en vez del nombre
+        transform = state.get('transform', 'none')
+        if(isinstance(transform, int)):
+            state['transform'] = LEGACY_TRANSFORMS[transform] if 0 <= transform < len(LEGACY_TRANSFORMS) else 'none'
+        state.setdefault('family', None)
+        state.setdefault('family_colors', [])
+        state.setdefault('hidden', [])
+        state.setdefault('fill_to', '')
+        state.setdefault('density', False)
+        state.setdefault('colormap', 'viridis')
+        state.setdefault('density_log', True)
+        self.__dict__.update(state)
+
+
+def format_cases(cases):
+    """[0, 1, 2, 5] -> '0-2, 5'"""
+    ranges = []
+    for case in sorted(cases):
+        if(ranges and case == ranges[-1][1] + 1):
+            ranges[-1][1] = case
+        else:
+            ranges.append([case, case])
+    return ', '.join(str(a) if a == b else f'{a}-{b}' for a, b in ranges)
+
+
+def parse_cases(text):
+    """'0-2, 5' -> [0, 1, 2, 5], raises ValueError on anything else."""
+    cases = []
+    for part in text.replace(' ', '').split(','):
+        if(part == ''):
+            continue
+        first, _, last = part.partition('-')
+        cases.extend(range(int(first), int(last or first) + 1))
+    return cases
@@ -1,18 +1,18 @@
-from unicodedata import name
-import ltspice
-import matplotlib.pyplot as plt
+import os
 import numpy as np
-import csv
-from src.package.transfer_function import TFunction
-from collections import defaultdict
-from PyQt5.QtCore import QFileInfo
+from src.package.transfer_function import TFunction, TimeResponses
 from src.package.Dataline import Dataline
-import scipy.signal as signal
+from src.package.txt_reader import TxtFile
+from src.package.raw_reader import RawFile
+from src.package.ColumnStore import ColumnStore
+from src.package.csv_reader import CsvFile, drop_empty_rows, nonempty_rows, read_csv_decimated, read_csv_rows
+from src.package.cache import dataset_cache
+from src.package.statistics import case_statistics
+from src.package.transforms import apply_transform, get_transform
+from src.package.lod import LOD_THRESHOLD, MinMaxPyramid, is_monotonic, load_pyramid, save_pyramid
 import copy
 class Dataset:
-    def __init__(self, filepath='', title='', origin=''):
-        qfi = QFileInfo(filepath)
-
+    def __init__(self, filepath='', title='', origin='', progress=None, variables=None, budget=None, cached_only=False):
         self.color = 0
         self.data = []
         self.zeros = []
@@ -20,162 +20,224 @@ class Dataset:
         self.type = ''
         self.origin = filepath if origin == '' else origin
         self.tf = TFunction()
-        self.title = qfi.fileName() if title == '' else title
+        self.title = os.path.basename(filepath) if title == '' else title
         self.text = self.title
         self.datalines = []
         self.fields = []
+        self.available_fields = []
         self.miscinfo = ''
         self.casenames = []
         self.suggestedXscale = 1
         self.suggestedYscale = 1
         self.suggestedXsource = ''
         self.suggestedYsource = ''
+        self.tail = None
+        self.follow = False
+        self.decimation = None
+        self.pyramids = {}
 
-        extension = qfi.suffix()
+        extension = os.path.splitext(filepath)[1][1:]
         if(extension == 'raw'):
             self.type = 'spice'
-            self.parse_from_spice(filepath)
+            self.parse_from_spice(filepath, variables)
+        elif(extension == 'csv' and budget):
+            self.type = 'csv'
+            self.parse_from_csv(filepath, progress, budget)
         elif(extension == 'csv'):
             self.type = 'csv'
-            self.parse_from_csv(filepath)
+            self.parse_cached(filepath, None if cached_only else self.parse_from_csv, progress)
         elif(extension == 'txt'):
             self.type = 'txt'
-            self.parse_from_txt(filepath)
+            self.parse_cached(filepath, None if cached_only else self.parse_from_txt, progress)
         elif(filepath == ''):
             self.tf = self.origin
             self.type = 'TF'
             self.parse_from_expression()
         else:
-            raise ValueError
+            raise ValueError(f'Unsupported file type: {filepath}')
         
         for field in self.data[0]:
             self.fields.append(field)
         
-    def parse_from_spice(self, filepath):
-        l = ltspice.Ltspice(filepath)
-        l.parse()
-        self.data = []
-        self.miscinfo += f'Spice simulation, MODE: {l._mode}'
-        for i in range(l.case_count):
-            self.data.append(defaultdict(list))
-            for varname in l.variables:
-                vardata = []
-                if(varname == 'time'):
-                    vardata = l.get_time(case=i)
-                elif(varname == 'frequency'):
-                    vardata = l.get_frequency(case=i)
-                else:
-                    vardata = l.get_data(name=varname, case=i)
-                self.data[i][varname] = vardata
-
-    def parse_from_txt(self, filepath):
-        has_cases = False
-        self.data = [{}]
-        with open(filepath, mode='r') as file:
-            for line in file.readlines():
-                if('Step Information:' in line):
-                    has_cases = True
-                    break
-
-        with open(filepath, mode='r') as file:
-            fields = file.readline().replace('\n', '').split('\t')
-            for field in fields:
-                self.data[0][field] = []
-            case = -1
-            if(has_cases):
-                for line in file.readlines():
-                    if('Step Information:' in line):
-                        self.data.append(defaultdict(list))
-                        if('Run:' in line):
-                            self.casenames.append(line[18:line.index('  (Run: ')])
-                        elif('Step:' in line):
-                            self.casenames.append(line[18:line.index('  (Step: ')])
-                        case += 1
-                    else:
-                        linedata = line.replace('\n', '').split('\t')
-                        for x in range(len(fields)):
-                            if('i' in linedata[x]):
-                                self.data[case][fields[x]].append(np.complex128(linedata[x]))
-                            else:
-                                self.data[case][fields[x]].append(float(linedata[x]))
-            else:
-                for line in file.readlines():
-                    linedata = line.replace('\n', '').split('\t')
-                    for x in range(len(fields)):
-                        if('dB' in linedata[x]):
-                            newlindata = linedata[x][1:-2].split('dB,')
-                            self.data[0][fields[x]].append(float(newlindata[0]))
-                            try:
-                                self.data[0][fields[x] + ' deg'].append(float(newlindata[1]))
-                            except KeyError:
-                                self.data[0][fields[x] + ' deg'] = [float(newlindata[1]),]
-                        elif(',' in linedata[x]):
-                            self.data[0][fields[x]].append(complex(linedata[x].replace(',','+').replace('+-','-') + 'j'))
-                        else:
-                            self.data[0][fields[x]].append(float(linedata[x]))
-                    
-
-
-    def parse_from_csv(self, filepath):
-        with open(filepath, mode='r') as csv_file:
-            i = 0
-            for line in csv_file:
-                if line[0] == '#' or len(line) < 3:
-                    i += len(line)
-                else:
-                    break
-            csv_file.seek(i) #Salteo los comentario y me paro donde esta lo que importa
-            csv_reader = csv.DictReader(csv_file)
-            self.data = [{}]
-            first_row = next(csv_reader)
-            for (field, val) in first_row.items():
-                self.data[0][field] = []
-
-            csv_file.seek(i)
-            csv_reader = csv.DictReader(csv_file)
-
-            for row in csv_reader:
-                #print(row.items())
-                for (field, val) in row.items():
-                    try:
-                        if('i' in val or 'j' in val):
-                            self.data[0][field].append(np.complex128(val))
-                        elif(val != ''):
-                            self.data[0][field].append(float(val))
-                        # else:
-                        #     maxlen = len(self.data[0][field])
-                        #     for (field2, val2) in row.items():
-                        #         self.data[0][field2] = self.data[0][field2][:maxlen]
-                        #     break
-                    except(ValueError):
-                        pass
-                    except(TypeError):
-                        pass
-                    except(KeyError):
-                        pass
-            if('rigol' in filepath.lower()):
-                self.miscinfo += ('- taken from Rigol DSO')
-                self.suggestedXscale = float(self.data[0]['Increment'][0])
-                if('' in self.data[0]):
-                    self.data[0].pop('')
-                self.data[0].pop('Increment')
-                self.data[0].pop('Start')
-                self.suggestedXsource = 'X'
-                for chnum in ['CH4', 'CH3', 'CH2', 'CH1']:
-                    if(chnum in self.data[0]):
-                        self.suggestedYsource = chnum
-            elif('agilent' in filepath.lower()):
-                self.miscinfo += ('- taken from Agilent DSO')
-                self.suggestedXsource = 'x-axis'
-                for chnum in ['4', '3', '2', '1']:
-                    if(chnum in self.data[0]):
-                        self.suggestedYsource = chnum
-            csv_file.close()
+    def parse_cached(self, filepath, parser, progress=None):
+        if(dataset_cache.load(filepath, self)):
+            return
+        if(parser is None):
+            raise ValueError(f'{filepath} is not in the dataset cache')
+        parser(filepath, progress)
+        dataset_cache.store(filepath, self)
+
+    def parse_from_spice(self, filepath, variables=None):
+        """Only the listed variables are declared, the rest stay on disk until load_variables asks for them."""
+        raw = RawFile(filepath)
+        self.miscinfo += f'Spice simulation, MODE: {raw.mode}'
+        self.available_fields = list(raw.variables)
+        selected = raw.variables[1:] if variables is None else [v for v in raw.variables[1:] if v in variables]
+        self.data = ColumnStore(raw.case_count, loader=raw.read, shared=raw.variables[:1])
+        for case in range(raw.case_count):
+            for varname in raw.variables[:1] + selected:
+                self.data.declare(varname, case)
+
+    def load_variables(self, names):
+        """Makes variables of a spice dataset that were left out on import available, they are read on first use."""
+        for name in names:
+            if(name in self.available_fields and name not in self.fields):
+                for case in range(len(self.data)):
+                    self.data.declare(name, case)
+                self.fields.append(name)
+
+    def unloaded_fields(self):
+        return [field for field in self.available_fields if field not in self.fields]
+
+    def parse_from_txt(self, filepath, progress=None):
+        reader = TxtFile(filepath)
+        size = os.path.getsize(filepath)
+        data, self.casenames, _ = reader.read(progress)
+        # Cada caso de un .step repite el eje x, se guarda una sola vez
+        self.data = ColumnStore.from_dicts(data, shared=[next(iter(case), None) for case in data])
+        self.tail = dict(reader.state(), size=size)
+
+    def parse_from_csv(self, filepath, progress=None, budget=None):
+        if(budget):
+            data, self.decimation = read_csv_decimated(filepath, budget, progress=progress)
+            self.data = ColumnStore.from_dicts([data])
+            self.miscinfo += f'- decimated to {len(next(iter(data.values()), []))} of {self.decimation["rows"]} rows '
+        else:
+            reader = CsvFile(filepath)
+            size = os.path.getsize(filepath)
+            data = reader.read(progress)
+            self.data = ColumnStore.from_dicts([data])
+            self.tail = dict(reader.state(), size=size)
+            self.tail['partial'] = self.partial_rows(data, reader.partial)
+        if('rigol' in filepath.lower()):
+            self.miscinfo += ('- taken from Rigol DSO')
+            increment = self.data[0]['Increment']
+            self.suggestedXscale = float(increment[~np.isnan(increment)][0])
+            if('' in self.data[0]):
+                self.data[0].pop('')
+            self.data[0].pop('Increment')
+            self.data[0].pop('Start')
+            self.suggestedXsource = 'X'
+            for chnum in ['CH4', 'CH3', 'CH2', 'CH1']:
+                if(chnum in self.data[0]):
+                    self.suggestedYsource = chnum
+            self.tail = None
+        elif('agilent' in filepath.lower()):
+            self.miscinfo += ('- taken from Agilent DSO')
+            self.tail = None
+            self.suggestedXsource = 'x-axis'
+            for chnum in ['4', '3', '2', '1']:
+                if(chnum in self.data[0]):
+                    self.suggestedYsource = chnum
+        if(self.decimation is not None):
+            # Los puntos que quedan vacíos (Start e Increment de Rigol) salen también del índice
+            self.decimation['point_rows'] = self.decimation['point_rows'][nonempty_rows(self.data[0])]
+        drop_empty_rows(self.data[0])
+
+    def read_full_resolution(self, x0, x1, xsource=None, max_rows=None):
+        """Rows of a decimated CSV dataset behind the points with x in [x0, x1] at full resolution, None past max_rows."""
+        if(self.decimation is None):
+            return {field: self.data.get(field, 0) for field in self.fields}
+        index = self.decimation
+        x = np.real(self.data.get(xsource or self.suggestedXsource or self.fields[0], 0))
+        if(not len(x)):
+            return {field: x[:0] for field in self.fields}
+        point_rows = index['point_rows']
+        inside = np.flatnonzero((x >= min(x0, x1)) & (x <= max(x0, x1)))
+        if(not len(inside)):
+            # Zoom entre dos puntos decimados, se usa el más cercano
+            inside = np.array([np.nanargmin(np.abs(x - (x0 + x1) / 2))])
+        first = max(int(point_rows[inside[0]]) - index['bucket'], 0)
+        last = min(int(point_rows[inside[-1]]) + index['bucket'] + 1, index['rows'])
+        if(max_rows is not None and last - first > max_rows):
+            return None
+        data = read_csv_rows(self.origin, index, first, last)
+        drop_empty_rows(data)
+        return {field: data[field] for field in self.fields if field in data}
+
+    def partial_rows(self, data, partial):
+        """Rows left at the end of the columns by an unterminated last line, once drop_empty_rows has run."""
+        if(not partial or not data):
+            return 0
+        last = [column[-1] for column in data.values() if len(column)]
+        return 0 if all(np.isnan(value) for value in last) else partial
+
+    def read_appended(self):
+        """Parses what was appended to the origin file and returns the cases that changed, a file that shrank is read again."""
+        if(self.tail is None):
+            return []
+        try:
+            size = os.path.getsize(self.origin)
+        except OSError:
+            return []
+        if(size == self.tail['size']):
+            return []
+        if(size < self.tail['size']):
+            self.reload()
+            return list(range(len(self.data)))
+        if(self.type == 'csv'):
+            changed = self.append_csv_tail()
+        else:
+            changed = self.append_txt_tail()
+        self.tail['size'] = size
+        for field in self.data[0]:
+            if(field not in self.fields):
+                self.fields.append(field)
+        return changed
+
+    def append_csv_tail(self):
+        reader = CsvFile.resume(self.origin, self.tail)
+        data = drop_empty_rows(reader.read())
+        partial = self.partial_rows(data, reader.partial)
+        if(not any(len(column) for column in data.values()) and not self.tail['partial']):
+            self.tail.update(reader.state(), partial=partial)
+            return []
+        keep = len(self.data.get(reader.fields[0], 0)) - self.tail['partial']
+        for field, column in data.items():
+            if(field in self.data.names[0]):
+                self.data.append(field, 0, column, keep)
+        self.tail.update(reader.state(), partial=partial)
+        return [0]
+
+    def append_txt_tail(self):
+        reader = TxtFile.resume(self.origin, self.tail)
+        cases, casenames, continues = reader.read()
+        changed = []
+        if(cases and len(self.data) and not any(len(column) for column in self.data[-1].values())):
+            # El último caso está vacío (archivo recién creado), se completa en vez de agregar uno nuevo
+            continues = True
+        if(cases and continues):
+            case = len(self.data) - 1
+            keep = max([len(column) for column in self.data[case].values()] + [0]) - self.tail['partial']
+            for field, column in cases.pop(0).items():
+                self.data.append(field, case, column, keep)
+            changed.append(case)
+        for data in cases:
+            case = self.data.add_case()
+            for field, column in data.items():
+                self.data.set(field, case, column)
+            changed.append(case)
+        self.casenames += casenames
+        self.tail.update(reader.state())
+        return changed
+
+    def reload(self):
+        """Parses the origin file again from the start, skipping the dataset cache."""
+        self.fields = []
+        self.miscinfo = ''
+        self.casenames = []
+        if(self.type == 'csv'):
+            self.parse_from_csv(self.origin)
+        else:
+            self.parse_from_txt(self.origin)
+        for field in self.data[0]:
+            self.fields.append(field)
 
     def parse_from_expression(self):
-        f, g, ph, gd = self.tf.getBode()
+        f, g, ph, gd = self.tf.getBodeAdaptive()
         z, p = self.tf.getZP()
-        self.data = [{}]
+        # Las respuestas temporales se calculan recién cuando alguien las lee
+        self.data = ColumnStore(loader=TimeResponses(self.tf).read, shared=['step_time', 'imp_time'])
         self.zeros = [{}]
         self.poles = [{}]
         self.data[0]['f'] = f
@@ -187,17 +249,18 @@ class Dataset:
         self.suggestedXsource = 'f'
         self.suggestedYsource = 'g'
         if(len(self.tf.D) >= len(self.tf.N)):
-            tstep, stepr = signal.step(self.tf.tf_object, N=5000)
-            timp, impr = signal.impulse(self.tf.tf_object, N=5000)
-            self.data[0]['step_time'] = tstep
-            self.data[0]['step_resp'] = stepr
-            self.data[0]['imp_time'] = timp
-            self.data[0]['imp_resp'] = impr
+            for name in ['step_time', 'step_resp', 'imp_time', 'imp_resp']:
+                self.data.declare(name)
     
+    def evaluate_tf(self, f):
+        """The columns of parse_from_expression at the frequencies f, in Hz."""
+        g, ph, gd = self.tf.getBodeAt(f)
+        return {'f': f, 'g': g, 'ph': ph, 'gd': gd}
+
     def parse_from_filter(self):
         f, g, ph, gd = self.tf.getBode()
         z, p = self.tf.getZP()
-        self.data = [{}]
+        self.data = ColumnStore()
         self.zeros = [{}]
         self.poles = [{}]
         self.data[0]['f'] = f
@@ -210,10 +273,58 @@ class Dataset:
         self.suggestedYsource = 'g'
             
     def get_datapoints(self, xvar_name='time', yvar_name='v', case=0):
-        xdata = np.real(self.data[case][xvar_name])
-        ydata = np.array(self.data[case][yvar_name])
+        xdata = np.real(self.data.get(xvar_name, case))
+        ydata = self.data.get(yvar_name, case)
         return (xdata, ydata)
 
+    def pyramid(self, xsource, ysource, case=0):
+        """Min/max pyramid of a real column against a monotonic x, None where it does not apply."""
+        key = (xsource, ysource, case)
+        version, pyramid = self.pyramids.get(key, (None, None))
+        if(version == self.data.version):
+            return pyramid
+        x, y = self.get_datapoints(xsource, ysource, case)
+        pyramid = None
+        if(len(x) > LOD_THRESHOLD and np.shape(x) == np.shape(y) and not np.iscomplexobj(y) and is_monotonic(x)):
+            persist = self.type in ['csv', 'txt', 'spice'] and self.decimation is None and not self.follow
+            name = f'{case}/{xsource}/{ysource}'
+            pyramid = load_pyramid(self.origin, name, x, y) if persist else None
+            if(pyramid is None):
+                pyramid = MinMaxPyramid(x, y)
+                if(persist):
+                    save_pyramid(self.origin, name, pyramid)
+        self.pyramids[key] = (self.data.version, pyramid)
+        return pyramid
+
+    def add_statistics(self, xsource, ysource, transform='none', percentiles=(), cases=None):
+        """Adds the per x statistics of ysource across cases as fields, returns the x field and the field of each statistic."""
+        cases = range(len(self.data)) if cases is None else cases
+        xs = []
+        ys = []
+        for case in cases:
+            x, y = self.get_datapoints(xsource, ysource, case)
+            xs.append(x)
+            ys.append(apply_transform(x, y, transform))
+        grid, results = case_statistics(xs, ys, percentiles)
+
+        prefix = ysource if transform == 'none' else get_transform(transform).label.replace('.', ysource)
+        xfield = xsource
+        if(grid is not xs[0]):
+            xfield = f'{prefix} x'
+            self.data.set_all(xfield, grid)
+        fields = {}
+        for stat, values in results.items():
+            fields[stat] = f'{prefix} {stat}'
+            self.data.set_all(fields[stat], values)
+        for name in [xfield] + list(fields.values()):
+            if(name not in self.fields):
+                self.fields.append(name)
+        return (xfield, fields)
+
+    def memory_usage(self):
+        """Returns (logical, actual) bytes of the loaded columns, they differ by what the cases share."""
+        return (self.data.logical_nbytes(), self.data.nbytes())
+
     def create_dataline(self, casenum=0):
         name = f'{self.title} {len(self.datalines) + 1}'
         dl = Dataline(self, name=name, casenum=casenum, color='#303030', xsource=self.suggestedXsource, ysource=self.suggestedYsource)
@@ -225,6 +336,23 @@ class Dataset:
         self.datalines.append(dl)
         return dl
     
+    def __setstate__(self, state):
+        # Proyectos guardados antes del ColumnStore tienen data como lista de dicts
+        if(isinstance(state.get('data'), list)):
+            state['data'] = ColumnStore.from_dicts(state['data'])
+        state.setdefault('available_fields', [])
+        state.setdefault('tail', None)
+        state.setdefault('follow', False)
+        state.setdefault('decimation', None)
+        state['pyramids'] = {}
+        self.__dict__.update(state)
+
+    def __getstate__(self):
+        # Las pirámides se vuelven a leer de disco, no van en el proyecto
+        state = self.__dict__.copy()
+        state.pop('pyramids', None)
+        return state
+
     def __deepcopy__(self, memo):
         """Custom deep copy logic for Dataset."""
         # Create a new empty instance without calling __init__
@@ -234,6 +362,9 @@ class Dataset:
 
         # Manually copy each attribute
         for attr, value in self.__dict__.items():
+            if(attr == 'pyramids'):
+                setattr(result, attr, {})
+                continue
             try:
                 setattr(result, attr, copy.deepcopy(value, memo))
             except Exception:
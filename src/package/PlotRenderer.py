@@ -0,0 +1,331 @@
+from collections import OrderedDict
+import numpy as np
+from matplotlib.collections import Collection, LineCollection, PolyCollection
+from matplotlib.colors import LogNorm, Normalize, to_rgba_array
+from matplotlib.image import AxesImage
+from matplotlib.lines import Line2D
+from matplotlib.transforms import nonsingular
+
+from src.package.density import density_histogram
+from src.package.lod import LOD_THRESHOLD, MinMaxPyramid, is_monotonic
+
+# Opacidad de las bandas
+BAND_ALPHA = 0.3
+
+# Puntos por píxel de ancho de las curvas que se vuelven a evaluar en cada vista, y vistas que se recuerdan por curva
+CURVE_POINTS_PER_PIXEL = 2
+CURVE_CACHE_SIZE = 16
+
+
+class PlotRenderer():
+    """Keeps one persistent matplotlib artist per Dataline and only updates what changed since it was drawn."""
+    def __init__(self, points, linestyles, markers, pyramid=None, analytic=None, defer=None):
+        # points(ds, dl, case) son los datos de un caso como se dibujan, pyramid(ds, dl) la pirámide de la columna fuente
+        self.points = points
+        self.pyramid = pyramid
+        # analytic(ds, dl) evalúa dl de nuevo para cada vista (None: los datos de siempre), defer(ax) espera a que la vista se quede quieta
+        self.analytic = analytic
+        self.defer = defer
+        self.linestyles = linestyles
+        self.markers = markers
+        self.lines = {}
+        self.drawn = {}
+        self.full = {}
+        self.traces = {}
+        self.curves = {}
+        self.views = {}
+        self.resizing = False
+        self.watched = set()
+
+    def data_key(self, ds, dl):
+        return (
+            ds.data.serial, ds.data.version, dl.xsource, dl.ysource, dl.fill_to, tuple(dl.cases()), dl.transform,
+            dl.xscale, dl.xoffset, dl.yscale, dl.yoffset, dl.savgolwindow, dl.savgolord,
+            dl.density, tuple(dl.hidden) if dl.density else (),
+        )
+
+    def style_key(self, dl):
+        return (dl.linestyle, dl.linewidth, dl.markerstyle, dl.markersize, dl.color, dl.name, tuple(dl.family_colors), tuple(dl.hidden),
+                dl.density, dl.colormap, dl.density_log)
+
+    def checked_points(self, ds, dl, case=None):
+        x, y = self.points(ds, dl, case)
+        if(np.shape(x) != np.shape(y)):
+            raise ValueError(f'x and y must have the same shape, got {np.shape(x)} and {np.shape(y)}')
+        return (x, y)
+
+    def band_points(self, ds, dl):
+        x, y = self.checked_points(ds, dl)
+        x2, y2 = self.points(ds, dl, None, dl.fill_to)
+        if(np.shape(y2) != np.shape(y)):
+            raise ValueError(f'Both sides of a band must have the same shape, got {np.shape(y)} and {np.shape(y2)}')
+        return (x, y, y2)
+
+    def family_segments(self, ds, dl):
+        """Vertices of every case of a family, one (cases, points, 2) array when all the cases have the same length."""
+        points = [self.checked_points(ds, dl, case) for case in dl.family]
+        if(len(set(len(x) for x, y in points)) != 1):
+            return [np.column_stack(xy) for xy in points]
+        segments = np.empty((len(points), len(points[0][0]), 2))
+        segments[:, :, 0] = [x for x, y in points]
+        segments[:, :, 1] = [y for x, y in points]
+        return segments
+
+    def family_colors(self, dl):
+        """One color per case, hidden cases are made transparent so they can come back without new vertices."""
+        colors = dl.family_colors if len(dl.family_colors) == len(dl.family) else [dl.color] * len(dl.family)
+        colors = to_rgba_array(colors)
+        colors[np.isin(dl.family, dl.hidden), 3] = 0
+        return colors
+
+    def density_traces(self, ds, dl):
+        return [self.checked_points(ds, dl, case) for case in dl.cases() if case not in dl.hidden]
+
+    def density_frame(self, ax, dl, extent=False):
+        """View (x0, x1, y0, y1) and shape in pixels of the histogram of dl, the view of ax or the whole data if extent."""
+        shape = (max(int(ax.bbox.height), 10), max(int(ax.bbox.width), 10))
+        if(not extent):
+            return (ax.get_xlim() + ax.get_ylim(), shape)
+        view = []
+        for axis, log in enumerate((ax.get_xscale() == 'log', ax.get_yscale() == 'log')):
+            values = [np.real(trace[axis]) for trace in self.traces[dl] if len(trace[axis])]
+            values = np.concatenate(values) if values else np.empty(0)
+            values = values[np.isfinite(values) & ((values > 0) if log else True)]
+            view.extend(nonsingular(values.min(), values.max()) if len(values) else (0, 1))
+        return (tuple(view), shape)
+
+    def refresh_density(self, ax, dl, extent=False):
+        # Con autoscale set_extent cambia los límites, los callbacks de eso no tienen nada nuevo que dibujar
+        if(self.resizing):
+            return
+        view, shape = self.density_frame(ax, dl, extent)
+        if(self.views.get(dl) == (view, shape)):
+            return
+        self.views[dl] = (view, shape)
+        hist = density_histogram(self.traces[dl], view, shape, (ax.get_xscale() == 'log', ax.get_yscale() == 'log'))
+        image = self.lines[dl]
+        image.set_data(np.ma.masked_equal(hist, 0))
+        datalim = ax.dataLim.frozen()
+        sticky = (list(image.sticky_edges.x), list(image.sticky_edges.y))
+        self.resizing = True
+        try:
+            image.set_extent(view)
+        finally:
+            self.resizing = False
+        if(not extent):
+            # La vista no es parte de los datos, el autoscale sigue viendo la extensión de todo el histograma
+            ax.dataLim.set(datalim)
+            image.sticky_edges.x[:], image.sticky_edges.y[:] = sticky
+        image.autoscale()
+
+    def drawn_points(self, ax, ds, dl):
+        self.full.pop(dl, None)
+        self.curves.pop(dl, None)
+        curve = self.analytic(ds, dl) if self.analytic else None
+        if(curve is not None):
+            # Los puntos del dataset sirven para la vista completa, con los límites fijos se evalúa la vista
+            self.curves[dl] = (curve, OrderedDict(), self.checked_points(ds, dl))
+            self.watch(ax)
+            return self.curves[dl][2] if ax.get_autoscalex_on() else self.curve_points(ax, dl)
+        pyramid = self.pyramid(ds, dl) if self.pyramid else None
+        if(pyramid is not None):
+            self.full[dl] = (pyramid, (dl.xscale, dl.xoffset, dl.yscale, dl.yoffset))
+        else:
+            x, y = self.checked_points(ds, dl)
+            if(np.ndim(x) != 1 or len(x) <= LOD_THRESHOLD):
+                return (x, y)
+            if(x[-1] < x[0]):
+                x, y = x[::-1], y[::-1]
+            if(not is_monotonic(x)):
+                return (x, y)
+            self.full[dl] = (MinMaxPyramid(x, y), (1, 0, 1, 0))
+        self.watch(ax)
+        return self.view_points(ax, dl, extent=ax.get_autoscalex_on())
+
+    def view_points(self, ax, dl, extent=False):
+        """Decimated data of dl for the current view of ax, or for its whole x range if extent."""
+        pyramid, (xscale, xoffset, yscale, yoffset) = self.full[dl]
+        if(extent):
+            x0, x1 = pyramid.x[0] * xscale + xoffset, pyramid.x[-1] * xscale + xoffset
+        else:
+            x0, x1 = ax.get_xlim()
+        pixels = max(int(ax.bbox.width), 100)
+        return pyramid.query(x0, x1, pixels, ax.get_xscale() == 'log', xscale, xoffset, yscale, yoffset)
+
+    def curve_points(self, ax, dl):
+        """dl evaluated over the x limits of ax, remembered for the last CURVE_CACHE_SIZE views."""
+        curve, cache, full = self.curves[dl]
+        x0, x1 = ax.get_xlim()
+        key = (x0, x1, max(int(ax.bbox.width), 100) * CURVE_POINTS_PER_PIXEL, ax.get_xscale() == 'log')
+        points = cache.get(key)
+        if(points is None):
+            points = curve(*key)
+            if(points is None):
+                points = full
+            cache[key] = points
+            while(len(cache) > CURVE_CACHE_SIZE):
+                cache.popitem(last=False)
+        else:
+            cache.move_to_end(key)
+        return points
+
+    def reevaluate(self, ax):
+        """Evaluates the lines of ax that follow the view (analytic curves, decimated CSVs) for its current view."""
+        changed = False
+        for dl, line in list(self.lines.items()):
+            if(line.axes is ax and dl in self.curves):
+                line.set_data(*self.curve_points(ax, dl))
+                changed = True
+        if(changed):
+            ax.figure.canvas.draw_idle()
+
+    def watch(self, ax):
+        if(ax in self.watched):
+            return
+        self.watched.add(ax)
+        ax.callbacks.connect('xlim_changed', self.view_changed)
+        ax.callbacks.connect('ylim_changed', self.view_changed)
+        ax.figure.canvas.mpl_connect('resize_event', lambda event: self.view_changed(ax))
+
+    def view_changed(self, ax):
+        self.redecimate(ax)
+        self.redensify(ax)
+        if(any(line.axes is ax for dl, line in self.lines.items() if dl in self.curves)):
+            if(self.defer):
+                self.defer(ax)
+            else:
+                self.reevaluate(ax)
+
+    def redecimate(self, ax, extent=False):
+        for dl, line in self.lines.items():
+            if(line.axes is ax and dl in self.full):
+                line.set_data(*self.view_points(ax, dl, extent))
+            elif(line.axes is ax and dl in self.curves and extent):
+                line.set_data(*self.curves[dl][2])
+
+    def redensify(self, ax, extent=False):
+        for dl, line in list(self.lines.items()):
+            if(line.axes is ax and dl in self.traces):
+                self.refresh_density(ax, dl, extent)
+
+    def relim(self, ax):
+        """Like ax.relim, but over the whole x range of the decimated and analytic lines and not only the part in view."""
+        self.redecimate(ax, extent=True)
+        self.redensify(ax, extent=True)
+        ax.relim()
+        # relim no tiene en cuenta las colecciones
+        for line in self.lines.values():
+            if(line.axes is ax and isinstance(line, Collection) and len(line.get_paths())):
+                vertices = np.concatenate([path.vertices for path in line.get_paths()])
+                ax.update_datalim(vertices[np.isfinite(vertices).all(axis=1)])
+
+    def apply_style(self, line, dl):
+        if(isinstance(line, AxesImage)):
+            line.set_cmap(dl.colormap)
+            line.set_norm(LogNorm() if dl.density_log else Normalize())
+            line.autoscale()
+            line.set_label(dl.name)
+            return
+        if(isinstance(line, PolyCollection)):
+            line.set_facecolor(dl.color)
+            line.set_alpha(BAND_ALPHA)
+            line.set_label(dl.name)
+            return
+        if(isinstance(line, LineCollection)):
+            # Una colección no tiene marcadores, una familia sin línea se dibuja con línea sólida
+            line.set_linestyle(self.linestyles[dl.linestyle] or '-')
+            line.set_linewidth(dl.linewidth)
+            line.set_color(self.family_colors(dl))
+            line.set_label(dl.name)
+            return
+        line.set_linestyle(self.linestyles[dl.linestyle])
+        line.set_linewidth(dl.linewidth)
+        line.set_marker(self.markers[dl.markerstyle])
+        line.set_markersize(dl.markersize)
+        line.set_color(dl.color)
+        line.set_label(dl.name)
+
+    def matches(self, line, dl):
+        """Whether line is the kind of artist dl is drawn with, bands are never reused."""
+        if(dl.density):
+            return isinstance(line, AxesImage)
+        if(dl.fill_to):
+            return False
+        if(dl.family is not None):
+            return isinstance(line, LineCollection) and not isinstance(line, PolyCollection)
+        return isinstance(line, Line2D)
+
+    def update(self, ax, ds, dl):
+        """Draws dl on ax, or brings its line up to date, and returns the line."""
+        line = self.lines.get(dl)
+        if(line is not None and line.axes is not ax):
+            self.forget(dl)
+            line = None
+        data_key = self.data_key(ds, dl)
+        style_key = self.style_key(dl)
+        drawn_data, drawn_style = self.drawn.get(dl, (None, None))
+        if(line is not None and drawn_data != data_key and not self.matches(line, dl)):
+            # fill_between no deja cambiar los datos de una banda, se vuelve a crear, lo mismo al cambiar de modo
+            self.forget(dl)
+            line = None
+        if(line is None):
+            if(dl.density):
+                self.traces[dl] = self.density_traces(ds, dl)
+                # imshow cambiaría el aspecto y los límites, la imagen toma su extensión al rasterizarse
+                line = ax.add_image(AxesImage(ax, origin='lower', interpolation='nearest'))
+                self.lines[dl] = line
+                self.watch(ax)
+                self.refresh_density(ax, dl, extent=ax.get_autoscalex_on())
+            elif(dl.fill_to):
+                line = ax.fill_between(*self.band_points(ds, dl), linewidth=0)
+            elif(dl.family is None):
+                line, = ax.plot(*self.drawn_points(ax, ds, dl))
+            else:
+                line = ax.add_collection(LineCollection(self.family_segments(ds, dl)))
+            self.lines[dl] = line
+            self.apply_style(line, dl)
+        else:
+            if(drawn_data != data_key and dl.density):
+                self.traces[dl] = self.density_traces(ds, dl)
+                self.views.pop(dl, None)
+                self.refresh_density(ax, dl, extent=ax.get_autoscalex_on())
+            elif(drawn_data != data_key and dl.family is not None):
+                line.set_segments(self.family_segments(ds, dl))
+            elif(drawn_data != data_key):
+                line.set_data(*self.drawn_points(ax, ds, dl))
+            if(drawn_style != style_key):
+                self.apply_style(line, dl)
+        self.drawn[dl] = (data_key, style_key)
+        return line
+
+    def forget(self, dl):
+        line = self.lines.pop(dl, None)
+        self.drawn.pop(dl, None)
+        self.full.pop(dl, None)
+        self.traces.pop(dl, None)
+        self.curves.pop(dl, None)
+        self.views.pop(dl, None)
+        if(line is not None and line.axes is not None):
+            line.remove()
+
+    def render(self, ax, entries):
+        """Syncs the lines of ax with its (dataset, dataline) entries, returns the lines drawn and the datalines that failed."""
+        wanted = set(dl for ds, dl in entries)
+        for dl, line in list(self.lines.items()):
+            if(line.axes is None or (line.axes is ax and dl not in wanted)):
+                self.forget(dl)
+        # Lo que no es de ningún dataline (por ejemplo de un proyecto anterior) se borra como antes
+        owned = set(id(line) for line in self.lines.values())
+        for artist in ax.lines + ax.collections + ax.images:
+            if(id(artist) not in owned):
+                artist.remove()
+
+        lines = {}
+        failed = []
+        for ds, dl in entries:
+            try:
+                lines[dl] = self.update(ax, ds, dl)
+            except ValueError:
+                self.forget(dl)
+                failed.append(dl)
+        return lines, failed
@@ -0,0 +1,49 @@
+from PyQt5.QtCore import QObject, QTimer
+
+
+class RenderScheduler(QObject):
+    """Coalesces redraws into a single one, frame ms after the first request, and autosaves idle ms after the last."""
+    def __init__(self, render, save, frame, idle, parent=None):
+        super().__init__(parent)
+        self.render = render
+        self.save = save
+        self.dirty = set()
+        self.everything = False
+        self.render_timer = QTimer(self)
+        self.render_timer.setSingleShot(True)
+        self.render_timer.setInterval(frame)
+        self.render_timer.timeout.connect(self.flush_render)
+        self.save_timer = QTimer(self)
+        self.save_timer.setSingleShot(True)
+        self.save_timer.setInterval(idle)
+        self.save_timer.timeout.connect(self.save)
+
+    def request_render(self, canvases=None):
+        if(canvases is None):
+            self.everything = True
+        else:
+            self.dirty.update(canvases)
+        if(not self.render_timer.isActive()):
+            self.render_timer.start()
+
+    def request_save(self):
+        self.save_timer.start()
+
+    def cancel_render(self):
+        """Forgets the pending redraw, for when everything was just drawn."""
+        self.render_timer.stop()
+        self.dirty.clear()
+        self.everything = False
+
+    def flush_render(self):
+        canvases = None if self.everything else set(self.dirty)
+        self.cancel_render()
+        self.render(canvases)
+
+    def flush(self):
+        """Runs whatever is pending right away."""
+        if(self.render_timer.isActive()):
+            self.flush_render()
+        if(self.save_timer.isActive()):
+            self.save_timer.stop()
+            self.save()
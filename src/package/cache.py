@@ -0,0 +1,163 @@
+import hashlib
+import json
+import os
+import shutil
+import numpy as np
+
+from src.package.ColumnStore import ColumnStore
+
+# Cambiar cuando cambie lo que devuelven los parsers, invalida todo lo guardado
+PARSER_VERSION = 2
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.plottool', 'cache')
+DEFAULT_MAX_SIZE = 2 * 1024**3
+HASH_BLOCK = 1 << 20
+
+META_FILE = 'meta.json'
+CACHED_ATTRIBUTES = ['casenames', 'miscinfo', 'suggestedXscale', 'suggestedYscale', 'suggestedXsource', 'suggestedYsource', 'tail']
+
+
+def content_hash(filepath, size):
+    """SHA-1 of the size and of the first, middle and last MiB of the file, cheap even for huge files."""
+    sha = hashlib.sha1(str(size).encode())
+    with open(filepath, mode='rb') as file:
+        for offset in sorted(set([0, max(0, size // 2 - HASH_BLOCK // 2), max(0, size - HASH_BLOCK)])):
+            file.seek(offset)
+            sha.update(file.read(HASH_BLOCK))
+    return sha.hexdigest()
+
+
+def file_key(filepath):
+    """Cache key of a file: its absolute path, size, modification time, content hash and the parser version."""
+    stat = os.stat(filepath)
+    identity = [os.path.abspath(filepath), stat.st_size, stat.st_mtime_ns, content_hash(filepath, stat.st_size), PARSER_VERSION]
+    return hashlib.sha1(json.dumps(identity).encode()).hexdigest()
+
+
+class DatasetCache():
+    """On-disk cache of parsed datasets, one .npy per (case, field) and a meta.json per entry."""
+    # La fecha de meta.json es el último uso, las entradas más viejas se borran al pasar max_size
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_size=DEFAULT_MAX_SIZE, enabled=True):
+        self.directory = directory
+        self.max_size = max_size
+        self.enabled = enabled
+
+    def entry_path(self, key):
+        return os.path.join(self.directory, key)
+
+    def contains(self, filepath):
+        try:
+            return self.enabled and os.path.isfile(os.path.join(self.entry_path(file_key(filepath)), META_FILE))
+        except OSError:
+            return False
+
+    def load(self, filepath, dataset):
+        """Fills dataset with the cached parse of filepath, returns False on a miss."""
+        if(not self.enabled):
+            return False
+        try:
+            key = file_key(filepath)
+        except OSError:
+            return False
+        try:
+            path = self.entry_path(key)
+            meta_path = os.path.join(path, META_FILE)
+            if(not os.path.isfile(meta_path)):
+                return False
+            with open(meta_path, mode='r') as f:
+                meta = json.load(f)
+            data = []
+            columns = {}
+            for case in meta['cases']:
+                for field, filename in case:
+                    if(filename not in columns):
+                        columns[filename] = np.load(os.path.join(path, filename), mmap_mode='r')
+                data.append({field: columns[filename] for field, filename in case})
+            for attr in CACHED_ATTRIBUTES:
+                setattr(dataset, attr, meta[attr])
+            dataset.data = ColumnStore.from_dicts(data, shared=meta.get('shared', []))
+            os.utime(meta_path)
+            return True
+        except (OSError, ValueError, KeyError):
+            self.purge(key)
+            return False
+
+    def store(self, filepath, dataset):
+        """Saves the parsed data of dataset, then evicts old entries if the cache grew past max_size."""
+        if(not self.enabled):
+            return
+        try:
+            key = file_key(filepath)
+        except OSError:
+            return
+        path = self.entry_path(key)
+        tmp = path + '.tmp'
+        try:
+            shutil.rmtree(tmp, ignore_errors=True)
+            os.makedirs(tmp)
+            meta = {attr: getattr(dataset, attr) for attr in CACHED_ATTRIBUTES}
+            meta['origin'] = os.path.abspath(filepath)
+            meta['cases'] = []
+            meta['shared'] = sorted(dataset.data.shared)
+            size = 0
+            saved = {}
+            for i, case in enumerate(dataset.data):
+                files = []
+                for j, (field, column) in enumerate(case.items()):
+                    # Las columnas compartidas entre casos se escriben una vez
+                    if(id(column) not in saved):
+                        saved[id(column)] = f'c{i}_{j}.npy'
+                        np.save(os.path.join(tmp, saved[id(column)]), np.asarray(column))
+                        size += np.asarray(column).nbytes
+                    files.append([field, saved[id(column)]])
+                meta['cases'].append(files)
+            meta['size'] = size
+            with open(os.path.join(tmp, META_FILE), mode='w') as f:
+                json.dump(meta, f)
+            shutil.rmtree(path, ignore_errors=True)
+            os.replace(tmp, path)
+        except (OSError, TypeError, ValueError):
+            shutil.rmtree(tmp, ignore_errors=True)
+            return
+        self.evict()
+
+    def entries(self):
+        """Lists the cache entries, most recently used first."""
+        entries = []
+        if(not os.path.isdir(self.directory)):
+            return entries
+        for key in os.listdir(self.directory):
+            meta_path = os.path.join(self.entry_path(key), META_FILE)
+            try:
+                with open(meta_path, mode='r') as f:
+                    meta = json.load(f)
+                entries.append({
+                    'key': key,
+                    'origin': meta['origin'],
+                    'cases': len(meta['cases']),
+                    'size': meta['size'],
+                    'last_used': os.path.getmtime(meta_path),
+                })
+            except (OSError, ValueError, KeyError):
+                continue
+        entries.sort(key=lambda entry: entry['last_used'], reverse=True)
+        return entries
+
+    def total_size(self):
+        return sum(entry['size'] for entry in self.entries())
+
+    def purge(self, key=None):
+        """Removes one entry, or the whole cache when key is None."""
+        path = self.directory if key is None else self.entry_path(key)
+        shutil.rmtree(path, ignore_errors=True)
+
+    def evict(self):
+        entries = self.entries()
+        size = sum(entry['size'] for entry in entries)
+        while(entries and size > self.max_size):
+            entry = entries.pop()
+            self.purge(entry['key'])
+            size -= entry['size']
+
+
+dataset_cache = DatasetCache()
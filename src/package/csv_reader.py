@@ -0,0 +1,281 @@
+import bisect
+import csv
+import io
+import os
+import numpy as np
+
+from src.package.txt_reader import parse_numbers
+from src.package.decimation import MinMaxDecimator
+
+REAL, COMPLEX, EMPTY = range(3)
+
+SAMPLE_ROWS = 256
+CHUNK_SIZE = 1 << 22
+
+_DELETE = b'"\r '
+
+
+def skip_comments(file):
+    """Moves a binary file past its leading '#' comments and blank lines, returning the new position."""
+    offset = 0
+    for line in file:
+        if(line[:1] == b'#' or len(line.strip()) < 2):
+            offset += len(line)
+        else:
+            break
+    file.seek(offset)
+    return offset
+
+
+def cell_kind(cell):
+    """Returns REAL, COMPLEX or EMPTY for a single cell, text that is not a number counts as EMPTY."""
+    cell = cell.strip()
+    if(cell == ''):
+        return EMPTY
+    try:
+        float(cell)
+        return REAL
+    except ValueError:
+        pass
+    try:
+        complex(cell.replace('i', 'j'))
+        return COMPLEX
+    except ValueError:
+        return EMPTY
+
+
+def infer_kinds(rows, ncols):
+    """Infers the kind of each column from a sample of rows: COMPLEX wins over REAL, which wins over EMPTY."""
+    kinds = [EMPTY] * ncols
+    for row in rows:
+        for i, cell in enumerate(row[:ncols]):
+            kind = cell_kind(cell)
+            if(kind == COMPLEX or (kind == REAL and kinds[i] == EMPTY)):
+                kinds[i] = kind
+    return kinds
+
+
+def to_float(cell):
+    try:
+        return float(cell)
+    except ValueError:
+        return np.nan
+
+
+def fill_empty_cells(chunk):
+    """Writes 'nan' in every empty cell of a chunk of lines."""
+    chunk = b'\n' + chunk + b'\n'
+    while(b',,' in chunk):
+        chunk = chunk.replace(b',,', b',nan,')
+    return chunk.replace(b'\n,', b'\nnan,').replace(b',\n', b',nan\n').strip(b'\n')
+
+
+def parse_fast(chunk, nrows, ncols):
+    """Parses a rectangular chunk of real values in a single np.fromstring call, None if it is not possible."""
+    if(chunk.count(b',') != nrows * (ncols - 1) or b'\n\n' in chunk):
+        return None
+    filled = fill_empty_cells(chunk.rstrip(b'\n'))
+    try:
+        values = parse_numbers(filled.replace(b'\n', b','), sep=',')
+    except ValueError:
+        return None
+    if(values.size != nrows * ncols):
+        return None
+    table = values.reshape(nrows, ncols)
+    return [np.ascontiguousarray(table[:, i]) for i in range(ncols)]
+
+
+def parse_chunk(chunk, kinds):
+    """Parses a chunk of complete lines into one array per column, padding missing cells with NaN."""
+    ncols = len(kinds)
+    chunk = chunk.translate(None, _DELETE)
+    nrows = chunk.count(b'\n')
+    if(COMPLEX not in kinds):
+        columns = parse_fast(chunk, nrows, ncols)
+        if(columns is not None):
+            return columns
+
+    # Camino lento: filas irregulares, texto o números complejos. Se arreglan las filas, nunca las celdas
+    lines = [line for line in chunk.split(b'\n') if line != b'']
+    for i, line in enumerate(lines):
+        commas = line.count(b',')
+        if(commas < ncols - 1):
+            lines[i] = line + b',' * (ncols - 1 - commas)
+        elif(commas > ncols - 1):
+            lines[i] = b','.join(line.split(b',')[:ncols])
+    table = np.array(b','.join(lines).split(b','), dtype=np.bytes_).reshape(-1, ncols)
+    table[table == b''] = b'nan'
+
+    columns = []
+    for i, kind in enumerate(kinds):
+        column = table[:, i]
+        if(kind == COMPLEX):
+            column = np.char.replace(column, b'i', b'j').astype(np.str_)
+            try:
+                columns.append(column.astype(np.complex128))
+            except ValueError:
+                columns.append(np.array([complex(to_float(c)) if 'j' not in c else complex(c) for c in column]))
+        else:
+            try:
+                columns.append(column.astype(np.float64))
+            except ValueError:
+                columns.append(np.array([to_float(c) for c in column], dtype=np.float64))
+    return columns
+
+
+class CsvFile():
+    """Reads a CSV file in chunks of whole lines into typed columns, and keeps reading it as it grows."""
+    def __init__(self, filepath, chunk_size=CHUNK_SIZE):
+        self.filepath = filepath
+        self.chunk_size = chunk_size
+        self.fields = None
+        self.kinds = None
+        # read() sigue desde el fin de la última línea completa, una línea sin terminar se cuenta en partial y se relee
+        self.offset = 0
+        self.partial = 0
+
+    def state(self):
+        return {'fields': self.fields, 'kinds': self.kinds, 'offset': self.offset, 'partial': self.partial}
+
+    @classmethod
+    def resume(cls, filepath, state, chunk_size=CHUNK_SIZE):
+        reader = cls(filepath, chunk_size)
+        reader.fields = state['fields']
+        reader.kinds = state['kinds']
+        reader.offset = state['offset']
+        reader.partial = state['partial']
+        return reader
+
+    def read_header(self, file):
+        skip_comments(file)
+        header = file.readline().decode('utf-8', errors='replace')
+        self.fields = next(csv.reader([header]), [])
+        self.offset = file.tell()
+
+        sample = file.read(self.chunk_size).decode('utf-8', errors='replace')
+        sample_rows = [row for row, _ in zip(csv.reader(io.StringIO(sample)), range(SAMPLE_ROWS)) if row]
+        self.kinds = infer_kinds(sample_rows, len(self.fields))
+
+    def chunks(self, progress=None):
+        """Parses the file from offset on, yielding the byte offset and the columns of every chunk of lines."""
+        size = os.path.getsize(self.filepath)
+        with open(self.filepath, mode='rb') as file:
+            if(self.fields is None):
+                self.read_header(file)
+            file.seek(self.offset)
+
+            self.partial = 0
+            rest = b''
+            while True:
+                start = self.offset
+                block = file.read(self.chunk_size)
+                if(not block):
+                    if(rest.strip()):
+                        block = rest + b'\n'
+                        self.partial = 1
+                    else:
+                        break
+                else:
+                    block = rest + block
+                    cut = block.rfind(b'\n') + 1
+                    block, rest = block[:cut], block[cut:]
+                    if(not block):
+                        continue
+                    self.offset += len(block)
+                yield start, parse_chunk(block, self.kinds)
+                if(self.partial):
+                    break
+                if(progress):
+                    progress(file.tell() / size if size else 1)
+
+    def read(self, progress=None):
+        """Dict with the rows added since the previous read, missing or non numeric cells are NaN."""
+        parts = []
+        for start, columns in self.chunks(progress):
+            parts.append(columns)
+        return self.join(parts)
+
+    def join(self, parts):
+        data = {}
+        for i, (field, kind) in enumerate(zip(self.fields, self.kinds)):
+            dtype = np.complex128 if kind == COMPLEX else np.float64
+            data[field] = np.concatenate([part[i] for part in parts]).astype(dtype, copy=False) if parts else np.empty(0, dtype=dtype)
+        return data
+
+
+def read_csv(filepath, chunk_size=CHUNK_SIZE, progress=None):
+    """Reads a whole CSV file into a dict of equal length columns, see CsvFile."""
+    return CsvFile(filepath, chunk_size).read(progress)
+
+
+def read_csv_decimated(filepath, budget, chunk_size=CHUNK_SIZE, progress=None):
+    """Reads a CSV file decimated to about budget points, and the index read_csv_rows needs to seek in it."""
+    reader = CsvFile(filepath, chunk_size)
+    size = os.path.getsize(filepath)
+    decimator = None
+    seek_rows = []
+    seek_offsets = []
+    rows = 0
+    for start, columns in reader.chunks(progress):
+        count = len(columns[0]) if columns else 0
+        if(decimator is None):
+            # El tamaño de bucket sale del largo estimado del archivo, así casi nunca hace falta fusionar buckets
+            estimate = count * (size - start) / max(reader.offset - start, 1)
+            bucket = 1
+            while(2 * estimate / bucket > budget):
+                bucket *= 2
+            decimator = MinMaxDecimator(len(columns), budget, bucket)
+        seek_rows.append(rows)
+        seek_offsets.append(start)
+        keep = np.zeros(count, dtype=bool)
+        for column in columns:
+            keep |= ~np.isnan(column)
+        decimator.add([column[keep] for column in columns], np.flatnonzero(keep) + rows)
+        rows += count
+
+    columns, point_rows = decimator.finish() if decimator else ([np.empty(0) for field in reader.fields], np.empty(0, dtype=np.int64))
+    data = reader.join([columns])
+    index = {
+        'reader': reader.state(),
+        'rows': rows,
+        'seek_rows': seek_rows,
+        'seek_offsets': seek_offsets,
+        'bucket': decimator.size if decimator else 1,
+        'point_rows': point_rows,
+    }
+    return data, index
+
+
+def read_csv_rows(filepath, index, first, last):
+    """Reads rows [first, last) of a CSV file at full resolution, seeking with an index from read_csv_decimated."""
+    k = max(bisect.bisect_right(index['seek_rows'], first) - 1, 0)
+    reader = CsvFile.resume(filepath, dict(index['reader'], offset=index['seek_offsets'][k], partial=0))
+    parts = []
+    row = index['seek_rows'][k]
+    for start, columns in reader.chunks():
+        parts.append(columns)
+        row += len(columns[0]) if columns else 0
+        if(row >= last):
+            break
+    data = reader.join(parts)
+    skip = first - index['seek_rows'][k]
+    return {field: column[skip:skip + last - first] for field, column in data.items()}
+
+
+def nonempty_rows(data):
+    """Mask of the rows that are not NaN in every column."""
+    keep = np.zeros(len(next(iter(data.values()), ())), dtype=bool)
+    for column in data.values():
+        keep |= ~np.isnan(column)
+    return keep
+
+
+def drop_empty_rows(data):
+    """Removes, in place, the rows that are NaN in every column (units rows, trailing blank lines...)."""
+    if(not data):
+        return data
+    keep = nonempty_rows(data)
+    if(not keep.all()):
+        for field in data:
+            data[field] = data[field][keep]
+    return data
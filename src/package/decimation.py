@@ -0,0 +1,93 @@
+import numpy as np
+
+
+class MinMaxDecimator():
+    """Streaming min/max decimation within a point budget, every bucket keeps the rows with the extremes of y."""
+    # Con más de budget puntos los buckets vecinos se fusionan de a pares y size se duplica
+    def __init__(self, ncols, budget, size=1):
+        self.budget = max(int(budget), 2)
+        self.size = size
+        # Filas candidatas por bucket: la del mínimo y la del máximo de cada columna y
+        self.width = 2 * max(ncols - 1, 1)
+        self.rows = []
+        self.values = [[] for i in range(ncols)]
+        self.count = 0
+        self.kept = 0
+        self.pending = None
+        self.pending_rows = None
+
+    def points(self):
+        return self.kept
+
+    @staticmethod
+    def distinct(rows):
+        """Number of different rows among the candidates of every bucket, the points they will become."""
+        rows = np.sort(rows, axis=1)
+        return len(rows) + int(np.count_nonzero(np.diff(rows, axis=1)))
+
+    def select(self, rows, values):
+        """Keeps, out of the candidate rows of every bucket (one per row), the extremes of the y columns."""
+        if(rows.shape[1] <= self.width):
+            return rows, values
+        picks = []
+        for column in values[1:] or values:
+            nan = np.isnan(column)
+            low = np.where(nan, np.inf, column).argmin(axis=1)
+            high = np.where(nan, -np.inf, column).argmax(axis=1)
+            if(picks):
+                # Una columna sin datos en el bucket repite las filas de la primera, no suma puntos
+                empty = nan.all(axis=1)
+                low = np.where(empty, picks[0], low)
+                high = np.where(empty, picks[1], high)
+            picks += [low, high]
+        picks = np.stack(picks, axis=1)
+        return np.take_along_axis(rows, picks, axis=1), [np.take_along_axis(v, picks, axis=1) for v in values]
+
+    def add(self, columns, rows):
+        """Adds a chunk of equal length columns, rows are their original row numbers."""
+        if(self.pending is not None):
+            columns = [np.concatenate([p, c]) for p, c in zip(self.pending, columns)]
+            rows = np.concatenate([self.pending_rows, rows])
+        full = len(rows) // self.size * self.size
+        if(full):
+            buckets, values = self.select(rows[:full].reshape(-1, self.size), [c[:full].reshape(-1, self.size) for c in columns])
+            self.rows.append(buckets)
+            for i, value in enumerate(values):
+                self.values[i].append(value)
+            self.count += full // self.size
+            self.kept += self.distinct(buckets)
+        self.pending = [column[full:] for column in columns]
+        self.pending_rows = rows[full:]
+        while(self.points() > self.budget and self.count > 1):
+            self.merge()
+
+    def merge(self):
+        even = self.count - self.count % 2
+        rows = np.concatenate(self.rows)
+        values = [np.concatenate(v) for v in self.values]
+        width = rows.shape[1]
+        pairs, merged = self.select(rows[:even].reshape(-1, 2 * width), [v[:even].reshape(-1, 2 * width) for v in values])
+        # El bucket impar del final repite sus candidatas para tener el mismo ancho que los fusionados
+        pad = ((0, 0), (0, pairs.shape[1] - width))
+        self.rows = [pairs, np.pad(rows[even:], pad, mode='edge')]
+        self.values = [[m, np.pad(v[even:], pad, mode='edge')] for m, v in zip(merged, values)]
+        self.count = even // 2 + self.count % 2
+        self.kept = sum(self.distinct(r) for r in self.rows)
+        self.size *= 2
+
+    def finish(self):
+        """Closes the last, incomplete bucket and returns the decimated columns and the original row of each point."""
+        if(self.pending is not None and len(self.pending_rows)):
+            buckets, values = self.select(self.pending_rows[None, :], [column[None, :] for column in self.pending])
+            self.rows.append(buckets)
+            for i, value in enumerate(values):
+                self.values[i].append(value)
+            self.count += 1
+            self.pending = None
+            self.pending_rows = None
+        if(not self.rows):
+            return [np.empty(0) for values in self.values], np.empty(0, dtype=np.int64)
+        # Las filas crecen de un bucket al siguiente, ordenarlas deja cada punto en su lugar y quita las repetidas
+        rows, first = np.unique(np.concatenate([r.ravel() for r in self.rows]), return_index=True)
+        columns = [np.concatenate([v.ravel() for v in values])[first] for values in self.values]
+        return columns, rows
@@ -0,0 +1,71 @@
+import numpy as np
+
+# Muestras de segmentos que se rasterizan a la vez
+DENSITY_CHUNK = 1 << 22
+
+
+def to_pixels(values, v0, v1, n, log=False):
+    """Pixel coordinate of values on an axis that shows [v0, v1] in n pixels, nan where a log axis has no place for them."""
+    if(log):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            values = np.log10(values)
+            v0 = np.log10(v0)
+            v1 = np.log10(v1)
+    return (np.asarray(values, dtype=float) - v0) * (n / (v1 - v0))
+
+
+def density_histogram(traces, view, shape, log=(False, False)):
+    """How many times the traces cross every pixel of a view (x0, x1, y0, y1) split in shape (rows, columns) pixels."""
+    rows, cols = shape
+    x0, x1, y0, y1 = view
+    hist = np.zeros(rows * cols, dtype=np.int64)
+    traces = [(x, y) for x, y in traces if len(x)]
+    if(not traces):
+        return hist.reshape(rows, cols)
+    # Todas las trazas juntas, separadas por un nan que corta el segmento entre una y otra
+    px = np.concatenate([np.append(np.repeat(np.real(x), 2) if len(x) == 1 else np.real(x), np.nan) for x, y in traces])
+    py = np.concatenate([np.append(np.repeat(np.real(y), 2) if len(y) == 1 else np.real(y), np.nan) for x, y in traces])
+    px = to_pixels(px, x0, x1, cols, log[0])
+    py = to_pixels(py, y0, y1, rows, log[1])
+    out = (
+        ((px[:-1] < 0) & (px[1:] < 0)) | ((px[:-1] >= cols) & (px[1:] >= cols)) |
+        ((py[:-1] < 0) & (py[1:] < 0)) | ((py[:-1] >= rows) & (py[1:] >= rows))
+    )
+    keep = ~out & np.isfinite(px[:-1]) & np.isfinite(px[1:]) & np.isfinite(py[:-1]) & np.isfinite(py[1:])
+    # El segmento sigue al anterior de la misma traza, su primer píxel puede ser el último de ese
+    joined = np.append(False, keep[:-1])[keep]
+    sx = px[:-1][keep]
+    sy = py[:-1][keep]
+    dx = px[1:][keep] - sx
+    dy = py[1:][keep] - sy
+    # Una muestra por píxel recorrido, un segmento nunca recorre más que el borde de la vista
+    steps = np.clip(np.ceil(np.maximum(np.abs(dx), np.abs(dy))), 1, rows + cols).astype(np.int64)
+    ends = np.cumsum(steps)
+    first = 0
+    before = -1
+    while(first < len(steps)):
+        last = max(np.searchsorted(ends, (ends[first - 1] if first else 0) + DENSITY_CHUNK, side='right'), first + 1)
+        counts, before = rasterize(sx[first:last], sy[first:last], dx[first:last], dy[first:last], steps[first:last], joined[first:last], rows, cols, before)
+        hist += counts
+        first = last
+    return hist.reshape(rows, cols)
+
+
+def rasterize(sx, sy, dx, dy, steps, joined, rows, cols, before=-1):
+    """Pixel counts of a run of segments and the pixel of its last sample, before is that of the previous run."""
+    segment = np.repeat(np.arange(len(steps)), steps)
+    starts = np.cumsum(steps) - steps
+    # Posición de cada muestra dentro de su segmento: 0, 1, ..., steps - 1 (el extremo es del segmento siguiente)
+    t = np.arange(len(segment)) - np.repeat(starts, steps)
+    t = t / steps[segment]
+    qx = np.floor(sx[segment] + t * dx[segment]).astype(np.int64)
+    qy = np.floor(sy[segment] + t * dy[segment]).astype(np.int64)
+    inside = (qx >= 0) & (qx < cols) & (qy >= 0) & (qy < rows)
+    pixel = np.where(inside, qy * cols + qx, -1)
+    # Una muestra cuenta si cae en otro píxel que la anterior, salvo al empezar una traza o después de un corte
+    previous = np.empty_like(pixel)
+    previous[0] = before
+    previous[1:] = pixel[:-1]
+    previous[starts[~joined]] = -1
+    new = inside & (pixel != previous)
+    return np.bincount(pixel[new], minlength=rows * cols), pixel[-1]
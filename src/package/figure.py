@@ -0,0 +1,78 @@
+import matplotlib.ticker as ticker
+
+from src.package.transforms import get_transform
+
+MARKER_STYLES = { 'None': '', 'Point': '.',  'Pixel': ',',  'Circle': 'o',  'Triangle down': 'v',  'Triangle up': '^',  'Triangle left': '<',  'Triangle right': '>',  'Tri down': '1',  'Tri up': '2',  'Tri left': '3',  'Tri right': '4',  'Octagon': '8',  'Square': 's',  'Pentagon': 'p',  'Plus (filled)': 'P',  'Star': '*',  'Hexagon': 'h',  'Hexagon alt.': 'H',  'Plus': '+',  'x': 'x',  'x (filled)': 'X',  'Diamond': 'D',  'Diamond (thin)': 'd',  'Vline': '|',  'Hline': '_' }
+LINE_STYLES = { 'None': '', 'Solid': '-', 'Dashed': '--', 'Dash-dot': '-.', 'Dotted': ':' }
+
+# Estilo de las figuras, el mismo en la interfaz y al exportar por línea de comandos
+FIGURE_RC = {
+    "pgf.texsystem": "pdflatex",
+    'font.family': 'serif',
+    # 'text.usetex': True,
+    'pgf.rcfonts': False,
+    'legend.fancybox': False,
+    'legend.edgecolor': 'black',
+    'savefig.format': 'pdf',
+    'path.simplify_threshold': 0.2
+}
+
+# Índice de 'None' en el combo box de posición de la leyenda
+LEGEND_NONE = 11
+
+# Índices de los gráficos (dl.plots) de cada pestaña, de arriba hacia abajo
+PLOT_TABS = [[0], [1, 2], [3], [4, 5], [6]]
+
+
+def axes_properties(ax):
+    return {
+        "xlabel": ax.get_xlabel(),
+        "ylabel": ax.get_ylabel(),
+        "title": ax.get_title(),
+        "xlim": ax.get_xlim(),
+        "ylim": ax.get_ylim(),
+        "xscale": ax.get_xscale(),
+        "yscale": ax.get_yscale()
+    }
+
+
+def restore_axes_properties(ax, props):
+    ax.set_xlabel(props['xlabel'])
+    ax.set_ylabel(props['ylabel'])
+    ax.set_title(props['title'])
+    ax.set_xlim(props['xlim'])
+    ax.set_ylim(props['ylim'])
+    ax.set_xscale(props['xscale'])
+    ax.set_yscale(props['yscale'])
+
+
+def render_axes(renderer, ax, entries, config):
+    """Draws the (dataset, dataline) entries of ax with the fonts, legend and grid of config, returns the failed ones."""
+    if(entries):
+        for label in (ax.get_xticklabels() + ax.get_yticklabels()):
+            label.set_fontsize(config['ticksize_sb'])
+        ax.xaxis.label.set_size(config['labelsize_sb'])
+        ax.yaxis.label.set_size(config['labelsize_sb'])
+        ax.title.set_size(config['titlesize_sb'])
+
+        # El último dataline del canvas decide los ticks, como cuando se replotéaba todo
+        locator = get_transform(entries[-1][1].transform).locator
+        if(locator):
+            ax.yaxis.set_major_locator(ticker.MaxNLocator(nbins='auto', **locator))
+        else:
+            ax.yaxis.set_major_locator(ticker.AutoLocator())
+
+    # Solo se tocan las líneas de los datalines que cambiaron
+    lines, failed = renderer.render(ax, entries)
+    # Las densidades no tienen entrada en la leyenda
+    plotlist = [lines[dl] for ds, dl in entries if dl in lines and dl.name != '' and dl.name[0] != '_' and not dl.density]
+    if(config['legendpos'] == LEGEND_NONE):
+        if(ax.get_legend()):
+            ax.get_legend().remove()
+    else:
+        ax.legend(handles=plotlist, fontsize=config['legendsize_sb'], loc=config['legendpos'])
+    if(config['grid']):
+        ax.grid(True, which="both", linestyle=':')
+    else:
+        ax.grid(False, which="both")
+    return failed
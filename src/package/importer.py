@@ -0,0 +1,32 @@
+# Worker side of the background import, it must not import anything from the GUI
+from src.package.Dataset import Dataset
+from src.package.cache import dataset_cache
+
+CANCEL = 'cancel'
+
+
+class ImportCancelled(Exception):
+    pass
+
+
+class ImportProgress():
+    """Progress callback for the parsers, publishes the parsed fraction in a shared dict and aborts when cancelled."""
+    def __init__(self, shared, key):
+        self.shared = shared
+        self.key = key
+
+    def __call__(self, fraction):
+        if(self.shared.get((CANCEL, self.key), False)):
+            raise ImportCancelled(self.key)
+        self.shared[self.key] = fraction
+
+
+def import_file(filepath, key, shared, options={}, mapped=True):
+    """Parses a file inside a worker process, None when mapped and the result is in the dataset cache for the GUI to map."""
+    progress = ImportProgress(shared, key)
+    progress(0)
+    ds = Dataset(filepath=filepath, progress=progress, **options)
+    progress(1)
+    if(mapped and ds.type in ['csv', 'txt'] and ds.decimation is None and dataset_cache.contains(filepath)):
+        return None
+    return ds
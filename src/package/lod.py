@@ -0,0 +1,153 @@
+import json
+import os
+import shutil
+import numpy as np
+
+from src.package.cache import file_key
+
+# Por debajo de esta cantidad de puntos una traza se dibuja entera
+LOD_THRESHOLD = 10000
+
+SIDECAR_META = 'meta.json'
+
+
+def is_monotonic(x):
+    """True if x never decreases, the only case a pyramid can be searched with binary searches."""
+    return len(x) < 2 or bool(np.all(x[1:] >= x[:-1]))
+
+
+def level_lengths(n):
+    """Lengths of the levels of a pyramid over n samples, level k reduces blocks of 2**k samples."""
+    lengths = []
+    while(n > 1):
+        n = (n + 1) // 2
+        lengths.append(n)
+    return lengths
+
+
+class MinMaxPyramid():
+    """Min/max envelopes of y over a monotonic x, level k reduces blocks of 2**k samples and is built on first use."""
+    def __init__(self, x, y, levels=None):
+        self.x = x
+        self.y = y
+        self.levels = [] if levels is None else levels
+
+    def level(self, k):
+        while(len(self.levels) < k):
+            mins, maxs = self.levels[-1] if self.levels else (self.y, self.y)
+            even = len(mins) - len(mins) % 2
+            self.levels.append((
+                np.concatenate([np.fmin(mins[0:even:2], mins[1:even:2]), mins[even:]]),
+                np.concatenate([np.fmax(maxs[0:even:2], maxs[1:even:2]), maxs[even:]]),
+            ))
+        return self.levels[k - 1] if k else (self.y, self.y)
+
+    def build(self):
+        self.level(len(level_lengths(len(self.y))))
+        return self
+
+    def query(self, x0, x1, pixels, log=False, xscale=1, xoffset=0, yscale=1, yoffset=0):
+        """Points to draw for a view [x0, x1] (after scale and offset) that is pixels wide."""
+        # Cada columna de píxeles queda en su primera muestra, el mínimo, el máximo y la última, unos 4 * pixels vértices
+        x = self.x
+        n = len(x)
+        r0, r1 = sorted(((x0 - xoffset) / xscale, (x1 - xoffset) / xscale))
+        lo = max(np.searchsorted(x, r0, side='left') - 1, 0)
+        hi = min(np.searchsorted(x, r1, side='right') + 1, n)
+        if(hi - lo <= 4 * pixels):
+            return (x[lo:hi] * xscale + xoffset, self.y[lo:hi] * yscale + yoffset)
+
+        x0, x1 = sorted((x0, x1))
+        if(log):
+            # En ejes logarítmicos los píxeles son de igual ancho en log(x), los x <= 0 no se ven
+            zero = -xoffset / xscale
+            i = np.searchsorted(x, zero, side='right') if xscale > 0 else np.searchsorted(x, zero, side='left') - 1
+            if(0 <= i < n):
+                x0 = max(x0, x[i] * xscale + xoffset)
+        if(log and 0 < x0 < x1):
+            edges = np.geomspace(x0, x1, pixels + 1)
+        else:
+            edges = np.linspace(x0, x1, pixels + 1)
+        edges = np.sort((edges - xoffset) / xscale)
+
+        k = max(int(np.log2((hi - lo) / (2 * pixels))), 0)
+        size = 1 << k
+        mins, maxs = self.level(k)
+        blo = lo // size
+        bhi = (hi - 1) // size + 1
+        blocks = np.unique(np.concatenate([[blo], np.clip(np.searchsorted(x, edges) // size, blo, bhi - 1)]))
+        mins = np.fmin.reduceat(mins[blo:bhi], blocks - blo)
+        maxs = np.fmax.reduceat(maxs[blo:bhi], blocks - blo)
+        first = np.maximum(blocks * size, lo)
+        last = np.minimum(np.append(blocks[1:] * size, hi), hi) - 1
+
+        out_x = np.empty(4 * len(blocks), dtype=np.result_type(x.dtype, float))
+        out_y = np.empty(4 * len(blocks), dtype=np.result_type(mins.dtype, float))
+        out_x[0::4] = x[first]
+        out_x[1::4] = x[first]
+        out_x[2::4] = x[last]
+        out_x[3::4] = x[last]
+        out_y[0::4] = self.y[first]
+        out_y[1::4] = mins
+        out_y[2::4] = maxs
+        out_y[3::4] = self.y[last]
+        return (out_x * xscale + xoffset, out_y * yscale + yoffset)
+
+
+def sidecar_path(filepath):
+    """Pyramids of a file are kept in a hidden directory next to it."""
+    directory, name = os.path.split(os.path.abspath(filepath))
+    return os.path.join(directory, f'.{name}.lod')
+
+
+def read_sidecar(path):
+    with open(os.path.join(path, SIDECAR_META), mode='r') as f:
+        return json.load(f)
+
+
+def load_pyramid(filepath, name, x, y):
+    """Pyramid of column name saved next to filepath, None if there is none or the file changed since."""
+    path = sidecar_path(filepath)
+    try:
+        meta = read_sidecar(path)
+        column = meta['columns'][name]
+        if(meta['key'] != file_key(filepath) or column['length'] != len(y)):
+            return None
+        envelopes = np.load(os.path.join(path, column['file']), mmap_mode='r')
+    except (OSError, ValueError, KeyError):
+        return None
+    levels = []
+    start = 0
+    for length in level_lengths(len(y)):
+        levels.append((envelopes[0, start:start + length], envelopes[1, start:start + length]))
+        start += length
+    return MinMaxPyramid(x, y, levels)
+
+
+def save_pyramid(filepath, name, pyramid):
+    """Saves the levels of pyramid next to filepath, quietly gives up where the directory is not writable."""
+    path = sidecar_path(filepath)
+    try:
+        key = file_key(filepath)
+        try:
+            meta = read_sidecar(path)
+        except (OSError, ValueError):
+            meta = {}
+        if(meta.get('key') != key):
+            shutil.rmtree(path, ignore_errors=True)
+            meta = {'key': key, 'columns': {}}
+        os.makedirs(path, exist_ok=True)
+        filename = meta['columns'].get(name, {}).get('file', f'{len(meta["columns"])}.npy')
+        pyramid.build()
+        envelopes = np.empty((2, sum(len(mins) for mins, maxs in pyramid.levels)), dtype=np.result_type(pyramid.y.dtype, float))
+        start = 0
+        for mins, maxs in pyramid.levels:
+            envelopes[0, start:start + len(mins)] = mins
+            envelopes[1, start:start + len(maxs)] = maxs
+            start += len(mins)
+        np.save(os.path.join(path, filename), envelopes)
+        meta['columns'][name] = {'file': filename, 'length': len(pyramid.y)}
+        with open(os.path.join(path, SIDECAR_META), mode='w') as f:
+            json.dump(meta, f)
+    except OSError:
+        shutil.rmtree(path, ignore_errors=True)
@@ -0,0 +1,174 @@
+from collections import OrderedDict
+import numpy as np
+from scipy.signal import savgol_filter
+
+from src.package.lod import LOD_THRESHOLD, MinMaxPyramid, is_monotonic
+from src.package.transforms import apply_transform
+
+# Memoria máxima de los resultados intermedios de todos los datalines
+STAGE_CACHE_SIZE = 256 * 1024**2
+
+# Filas de un CSV decimado que se releen como mucho para una vista, con más alcanzan los puntos decimados
+FULL_RESOLUTION_ROWS = 1 << 18
+
+
+def apply_savgol(y, window, order):
+    """Savitzky-Golay smoothing, y is returned as is when the window does not filter or does not fit."""
+    try:
+        window = int(window)
+        order = int(order)
+        if(window > len(y) or window <= order):
+            return y
+        return savgol_filter(y, window, order)
+    except ValueError:
+        return y
+
+
+def apply_affine(v, scale, offset):
+    if(scale == 1 and offset == 0):
+        return v
+    return v * scale + offset
+
+
+def source_pyramid(ds, dl):
+    """Pyramid of the source column of dl, when dl draws it only scaled and offset."""
+    try:
+        # Una ventana de savgol de orden window - 1 ajusta cada punto exacto, no filtra
+        if(dl.transform != 'none' or int(dl.savgolwindow) > int(dl.savgolord) + 1):
+            return None
+    except ValueError:
+        return None
+    return ds.pyramid(dl.xsource, dl.ysource, dl.casenum)
+
+
+def analytic_curve(ds, dl):
+    """Function (x0, x1, n, log) that evaluates dl as drawn from its transfer function, None if dl is not a Bode curve."""
+    if(ds.type != 'TF' or dl.xsource != 'f' or dl.ysource not in ['g', 'ph', 'gd'] or dl.xscale == 0):
+        return None
+    if(dl.family is not None or dl.fill_to or dl.density):
+        return None
+    # Savitzky-Golay depende del espaciado de los puntos, una curva suavizada no se reevalúa
+    try:
+        if(int(dl.savgolwindow) > int(dl.savgolord) + 1):
+            return None
+    except ValueError:
+        return None
+
+    def curve(x0, x1, n, log):
+        f0, f1 = sorted(((x0 - dl.xoffset) / dl.xscale, (x1 - dl.xoffset) / dl.xscale))
+        # Las frecuencias negativas no están en el dataset
+        f0 = max(f0, f1 * 1e-9 if log else 0)
+        f = np.geomspace(f0, f1, n) if log and f1 > 0 else np.linspace(f0, max(f1, f0), n)
+        y = ds.evaluate_tf(f)[dl.ysource]
+        return (apply_affine(f, dl.xscale, dl.xoffset), apply_affine(apply_transform(f, y, dl.transform), dl.yscale, dl.yoffset))
+    return curve
+
+
+def full_resolution_curve(ds, dl):
+    """Function (x0, x1, n, log) that reads dl again at full resolution for views of a decimated CSV dataset."""
+    if(ds.decimation is None or dl.xsource not in ds.fields or dl.ysource not in ds.fields or dl.xscale == 0):
+        return None
+    if(dl.family is not None or dl.fill_to or dl.density):
+        return None
+
+    def curve(x0, x1, n, log):
+        r0, r1 = sorted(((x0 - dl.xoffset) / dl.xscale, (x1 - dl.xoffset) / dl.xscale))
+        try:
+            data = ds.read_full_resolution(r0, r1, dl.xsource, FULL_RESOLUTION_ROWS)
+        except (OSError, ValueError):
+            data = None
+        # None: vista muy ancha o archivo que ya no está, se dibujan los puntos decimados
+        if(data is None or dl.xsource not in data or dl.ysource not in data):
+            return None
+        x = np.real(data[dl.xsource])
+        y = apply_savgol(apply_transform(x, data[dl.ysource], dl.transform), dl.savgolwindow, dl.savgolord)
+        if(len(x) > LOD_THRESHOLD and not np.iscomplexobj(y) and is_monotonic(x)):
+            return MinMaxPyramid(x, y).query(x0, x1, n, log, dl.xscale, dl.xoffset, dl.yscale, dl.yoffset)
+        return (apply_affine(x, dl.xscale, dl.xoffset), apply_affine(y, dl.yscale, dl.yoffset))
+    return curve
+
+
+def view_curve(ds, dl):
+    """Function (x0, x1, n, log) that draws dl again for every view, see analytic_curve and full_resolution_curve."""
+    return analytic_curve(ds, dl) or full_resolution_curve(ds, dl)
+
+
+class StageCache():
+    """Least recently used cache of pipeline stage outputs, bounded to max_size bytes, stored read-only."""
+    def __init__(self, max_size=STAGE_CACHE_SIZE):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.size = 0
+
+    def get(self, key):
+        value = self.entries.get(key)
+        if(value is None):
+            return None
+        self.entries.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        if(value.nbytes > self.max_size):
+            return
+        if(key in self.entries):
+            self.size -= self.entries.pop(key).nbytes
+        value.flags.writeable = False
+        self.entries[key] = value
+        self.size += value.nbytes
+        while(self.size > self.max_size):
+            self.size -= self.entries.popitem(last=False)[1].nbytes
+
+    def clear(self):
+        self.entries.clear()
+        self.size = 0
+
+
+stage_cache = StageCache()
+
+
+class TransformPipeline():
+    """Data of a dataline as drawn: source columns, transform, Savitzky-Golay, scale and offset."""
+    def __init__(self, cache=stage_cache):
+        self.cache = cache
+
+    def run(self, ds, dl, case=None, ysource=None):
+        case = dl.casenum if case is None else case
+        ysource = ysource or dl.ysource
+        x, y = ds.get_datapoints(dl.xsource, ysource, case)
+        xstages = [
+            (('affine', dl.xscale, dl.xoffset), lambda v: apply_affine(v, dl.xscale, dl.xoffset)),
+        ]
+        ystages = [
+            (('transform', dl.transform), lambda v: apply_transform(x, v, dl.transform)),
+            (('savgol', dl.savgolwindow, dl.savgolord), lambda v: apply_savgol(v, dl.savgolwindow, dl.savgolord)),
+            (('affine', dl.yscale, dl.yoffset), lambda v: apply_affine(v, dl.yscale, dl.yoffset)),
+        ]
+        # Las columnas van como (serial, version, nombre, caso), un id() se puede reusar. Hay transforms que dependen
+        # de x, x es parte de la fuente de y
+        xkey = ((ds.data.serial, ds.data.version, dl.xsource, case),)
+        ykey = xkey + ((ds.data.serial, ds.data.version, ysource, case),)
+        return (self.evaluate(x, xkey, xstages), self.evaluate(y, ykey, ystages))
+
+    def evaluate(self, value, sources, stages):
+        """Runs stages on value, sources is the key of value."""
+        # Cada etapa suma sus parámetros a la clave de la anterior, un cambio recalcula solo las que siguen
+        keys = []
+        key = (sources,)
+        for params, function in stages:
+            key = key + (params,)
+            keys.append(key)
+
+        # Se arranca de la última etapa guardada, las anteriores no hacen falta
+        start = 0
+        for i in reversed(range(len(keys))):
+            cached = self.cache.get(keys[i])
+            if(cached is not None):
+                start = i + 1
+                value = cached
+                break
+        for i in range(start, len(stages)):
+            result = stages[i][1](value)
+            if(result is not value):
+                self.cache.put(keys[i], result)
+            value = result
+        return value
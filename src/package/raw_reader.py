@@ -0,0 +1,185 @@
+import fnmatch
+import mmap
+import os
+import numpy as np
+
+from src.package.txt_reader import parse_numbers
+
+MODES = [
+    ('FFT', 'FFT'),
+    ('Transient', 'Transient'),
+    ('AC', 'AC'),
+    ('DC', 'DC'),
+    ('Noise', 'Noise'),
+    ('Operating Point', 'Operating Point'),
+]
+
+
+def match_variables(names, patterns):
+    """Names matching any of the shell-style patterns, e.g. V(out*) or I(R*), ignoring case like LTspice does."""
+    patterns = [p.lower() for p in patterns]
+    return [name for name in names if any(fnmatch.fnmatchcase(name.lower(), p) for p in patterns)]
+
+
+def file_signature(filepath):
+    try:
+        stat = os.stat(filepath)
+    except OSError:
+        return None
+    return (stat.st_size, stat.st_mtime_ns)
+
+
+class RawFile():
+    """Binary LTspice .raw reader, read() decodes one (variable, case) column straight from the file."""
+    def __init__(self, filepath, index=True):
+        self.filepath = filepath
+        self.title = ''
+        self.plotname = ''
+        self.mode = ''
+        self.flags = []
+        self.variables = []
+        self.types = []
+        self.points = 0
+        self.fastaccess = False
+        self.ascii = False
+        self.data_offset = 0
+        self.dtypes = []
+        self.offsets = []
+        self.stride = 0
+        self.case_starts = [0]
+        self._table = None
+        # Tamaño y fecha del archivo que se indexó, las columnas de otra corrida no se mezclan con las ya leídas
+        self.signature = file_signature(self.filepath)
+
+        self.read_header()
+        # Con index=False solo se lee el encabezado, alcanza para listar las variables
+        if(index):
+            self.build_index()
+
+    @property
+    def case_count(self):
+        return len(self.case_starts) - 1
+
+    def read_header(self):
+        with open(self.filepath, mode='rb') as file:
+            head = file.read(2)
+            encoding = 'utf-16-le' if len(head) == 2 and head[1] == 0 else 'utf-8'
+            file.seek(0)
+            text = ''
+            raw_len = 0
+            while True:
+                line = file.readline()
+                if(encoding == 'utf-16-le'):
+                    line += file.read(1) #el '\n' en utf-16 son dos bytes
+                if(not line):
+                    raise ValueError('Not an LTspice raw file')
+                raw_len += len(line)
+                line = line.decode(encoding, errors='replace').rstrip()
+                if(line in ['Binary:', 'Values:']):
+                    self.ascii = line == 'Values:'
+                    break
+                text += line + '\n'
+        self.data_offset = raw_len
+
+        lines = text.splitlines()
+        var_start = lines.index('Variables:') if 'Variables:' in lines else len(lines)
+        for line in lines[:var_start]:
+            tag, _, value = line.partition(':')
+            value = value.strip()
+            if(tag == 'Title'):
+                self.title = value
+            elif(tag == 'Plotname'):
+                self.plotname = value
+            elif(tag == 'Flags'):
+                self.flags = value.lower().split()
+            elif(tag == 'No. Points'):
+                self.points = int(value)
+        for line in lines[var_start + 1:]:
+            parts = line.split()
+            if(len(parts) >= 3):
+                self.variables.append(parts[1])
+                self.types.append(parts[2])
+
+        self.mode = self.plotname
+        for (key, mode) in MODES:
+            if(key in self.plotname):
+                self.mode = mode
+                break
+        self.fastaccess = 'fastaccess' in self.flags
+
+        is_complex = 'complex' in self.flags
+        double = 'double' in self.flags
+        if(not self.ascii and not is_complex and not double):
+            # Algunas versiones guardan todo en double sin marcarlo en los flags
+            size = os.path.getsize(self.filepath) - self.data_offset
+            double = size == self.points * 8 * len(self.variables) and len(self.variables) > 1
+        for i in range(len(self.variables)):
+            if(is_complex):
+                self.dtypes.append(np.dtype('<c16'))
+            elif(i == 0 or double):
+                self.dtypes.append(np.dtype('<f8'))
+            else:
+                self.dtypes.append(np.dtype('<f4'))
+        if(self.fastaccess):
+            offset = 0
+            for dtype in self.dtypes:
+                self.offsets.append(offset)
+                offset += self.points * dtype.itemsize
+        else:
+            offset = 0
+            for dtype in self.dtypes:
+                self.offsets.append(offset)
+                offset += dtype.itemsize
+            self.stride = offset
+
+    def build_index(self):
+        if(self.ascii):
+            self.read_ascii_table()
+        x = self.read_rows(0, 0, self.points)
+        if(self.mode in ['Transient', 'AC', 'FFT', 'Noise']):
+            x = np.abs(x)
+        splits = np.flatnonzero(x[1:] == x[0]) + 1 if len(x) > 0 else []
+        self.case_starts = [0] + [int(i) for i in splits] + [self.points]
+
+    def read_ascii_table(self):
+        with open(self.filepath, mode='rb') as file:
+            file.seek(self.data_offset)
+            values = parse_numbers(file.read().replace(b',', b' '))
+        width = len(self.variables) * (2 if self.dtypes[0].kind == 'c' else 1) + 1
+        table = values[:self.points * width].reshape(-1, width)[:, 1:]
+        if(self.dtypes[0].kind == 'c'):
+            table = table[:, 0::2] + 1j * table[:, 1::2]
+        self._table = table
+        self.dtypes = [table.dtype] * len(self.dtypes)
+
+    def read_rows(self, var, first, last):
+        """Decodes the rows [first, last) of a variable into a new contiguous array."""
+        if(self._table is not None):
+            return np.array(self._table[first:last, var])
+        dtype = self.dtypes[var]
+        if(self.fastaccess):
+            offset = self.data_offset + self.offsets[var] + first * dtype.itemsize
+            strides = (dtype.itemsize,)
+        else:
+            offset = self.data_offset + first * self.stride + self.offsets[var]
+            strides = (self.stride,)
+        # El mapa dura lo que dura la lectura, abierto bloquearía el .raw en Windows y LTspice no podría sobrescribirlo
+        with open(self.filepath, mode='rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if(last > first and offset + (last - first - 1) * strides[0] + dtype.itemsize > len(mm)):
+                raise ValueError(f'{self.filepath} is truncated')
+            view = np.ndarray(shape=(last - first,), dtype=dtype, buffer=mm, offset=offset, strides=strides)
+            column = np.array(view, dtype=dtype.newbyteorder('='))
+            del view
+        return column
+
+    def read(self, name, case=0):
+        signature = file_signature(self.filepath)
+        if(signature is None):
+            raise ValueError(f'{self.filepath} is no longer available')
+        if(signature != self.signature):
+            raise ValueError(f'{self.filepath} changed since it was imported, import it again')
+        var = self.variables.index(name)
+        column = self.read_rows(var, self.case_starts[case], self.case_starts[case + 1])
+        if(var == 0 and self.mode in ['Transient', 'AC', 'FFT', 'Noise']):
+            column = np.abs(column)
+        return column
@@ -0,0 +1,135 @@
+import numpy as np
+import scipy.linalg as linalg
+import scipy.signal as signal
+from scipy import fft
+
+# Muestras de entrada que se simulan por bloque, cada bloque se entrega apenas está listo
+SIM_CHUNK = 1 << 16
+
+# La respuesta al impulso se corta cuando el polo más lento cayó a esta fracción, y no se usa si es más larga que FFT_MAX_TAPS
+IMPULSE_TOL = 1e-12
+FFT_MAX_TAPS = 1 << 22
+
+# Costo por muestra de cada sección de segundo orden y de cada log2 del largo de las FFT, en ns (sosfilt y scipy.fft)
+SOS_COST = 1.6
+FFT_COST = 0.85
+
+
+def cascade_realization(z, p, k):
+    """State space realization of the analog z, p, k as a cascade of sections of similar gain."""
+    # La forma compañera del polinomio entero queda mal condicionada en órdenes altos
+    if(len(z) > len(p)):
+        raise ValueError('The transfer function is improper')
+    sos = signal.zpk2sos(z, p, 1, analog=True)
+    # Ganancia de cada sección en una frecuencia lejos de sus polos, el total se reparte en partes iguales
+    mags = []
+    for section in sos:
+        b, a = np.trim_zeros(section[:3], 'f'), np.trim_zeros(section[3:], 'f')
+        wmax = np.max(np.abs(np.roots(a)), initial=0)
+        w = 1j * (wmax * np.sqrt(2) if wmax > 0 else 1)
+        mags.append(abs(np.polyval(b, w) / np.polyval(a, w)))
+    scale = np.exp((np.log(abs(k)) + np.sum(np.log(mags))) / len(sos))
+
+    A, B, C, D = np.zeros((0, 0)), np.zeros((0, 1)), np.zeros((1, 0)), np.ones((1, 1))
+    for i, section in enumerate(sos):
+        b = section[:3] * scale / mags[i] * (np.sign(k) if i == 0 else 1)
+        a = np.trim_zeros(section[3:], 'f')
+        b = np.trim_zeros(b[3 - len(a):], 'f')
+        if(len(a) > 1):
+            As, Bs, Cs, Ds = signal.tf2ss(b, a)
+        else:
+            As, Bs, Cs, Ds = np.zeros((0, 0)), np.zeros((0, 1)), np.zeros((1, 0)), np.array([[b[-1] / a[-1]]])
+        # Conexión en serie: la salida de lo anterior es la entrada de la sección
+        n, m = len(A), len(As)
+        A = np.block([[A, np.zeros((n, m))], [Bs @ C, As]])
+        B = np.vstack([B, Bs @ D])
+        C = np.hstack([Ds @ C, Cs])
+        D = Ds @ D
+    return A, B, C, D
+
+
+def discretize_zoh(z, p, k, dt):
+    """Zero order hold discretization of the analog z, p, k with step dt, as second order sections and samples of delay."""
+    # zpk2sos completa los ceros que faltan con ceros en el origen, ese retardo sosfilt no lo puede expresar
+    z, p, k = np.asarray(z, dtype=np.complex128), np.asarray(p, dtype=np.complex128), np.real(k)
+    if(k == 0):
+        return np.array([[0., 0., 0., 1., 0., 0.]]), 0
+    A, B, C, D = cascade_realization(z, p, k)
+    n = len(A)
+    M = np.zeros((n + 1, n + 1))
+    M[:n, :n] = A * dt
+    M[:n, n:] = B * dt
+    E = linalg.expm(M)
+    Ad, Bd = E[:n, :n], E[:n, n:]
+    # Los polos son exactos, los ceros salen de los autovalores finitos del pencil de Rosenbrock
+    pd = np.exp(p * dt)
+    P = np.block([[Ad, Bd], [C, D]])
+    Q = np.zeros_like(P)
+    Q[:n, :n] = np.eye(n)
+    zd = linalg.eigvals(P, Q) if n else np.array([])
+    zd = zd[np.isfinite(zd)]
+    delay = n - len(zd)
+    # La ganancia se ajusta en un punto del círculo unitario que no cae sobre polos ni ceros típicos
+    z0 = np.exp(0.5j)
+    h = (C @ np.linalg.solve(z0 * np.eye(n) - Ad, Bd))[0, 0] + D[0, 0] if n else D[0, 0]
+    kd = np.real(h * np.prod(z0 - pd) / np.prod(z0 - zd))
+    return signal.zpk2sos(np.append(zd, np.zeros(delay)), pd, kd), delay
+
+
+def impulse_length(p, dt, tol=IMPULSE_TOL):
+    """Samples until the impulse response of a stable system falls below tol, None if it never does."""
+    p = np.asarray(p, dtype=np.complex128)
+    if(not len(p)):
+        return 1
+    if(np.max(p.real) >= 0):
+        return None
+    return int(np.ceil(np.log(1 / tol) / (np.min(-p.real) * dt))) + 1
+
+
+class Simulation():
+    """Response of an analog z, p, k to an input sampled every dt with zero order hold, fed a block at a time."""
+    def __init__(self, z, p, k, dt, length=None, chunk=SIM_CHUNK):
+        self.sos, self.delay = discretize_zoh(z, p, k, dt)
+        self.zi = np.zeros((len(self.sos), 2))
+        self.pending = np.zeros(self.delay)
+        self.method = 'sos'
+        self.chunk = chunk
+
+        # Overlap-add con la respuesta al impulso truncada cuando las FFT cuestan menos que la recursión
+        taps = impulse_length(p, dt)
+        if(taps is not None and taps <= FFT_MAX_TAPS and (length is None or taps < length)):
+            block = max(chunk, int(2**np.ceil(np.log2(taps))))
+            size = fft.next_fast_len(block + taps - 1, real=True)
+            if(FFT_COST * np.log2(size) * size / block < SOS_COST * len(self.sos)):
+                impulse = np.zeros(taps)
+                impulse[0] = 1
+                self.taps = self.filter(impulse)
+                self.H = fft.rfft(self.taps, size)
+                self.size = size
+                self.tail = np.zeros(taps - 1)
+                self.chunk = block
+                self.method = 'fft'
+
+    def filter(self, u):
+        y, self.zi = signal.sosfilt(self.sos, u, zi=self.zi)
+        if(self.delay):
+            y = np.concatenate([self.pending, y])
+            self.pending = y[len(u):]
+            y = y[:len(u)]
+        return y
+
+    def convolve(self, u):
+        y = fft.irfft(fft.rfft(u, self.size) * self.H, self.size)[:len(u) + len(self.tail)]
+        y[:len(self.tail)] += self.tail
+        self.tail = y[len(u):]
+        return y[:len(u)]
+
+    def run(self, u):
+        """Response to the next block of input."""
+        u = np.asarray(u, dtype=np.float64)
+        return self.convolve(u) if self.method == 'fft' else self.filter(u)
+
+    def blocks(self, u):
+        """Yields (start, response) for consecutive blocks of u."""
+        for start in range(0, len(u), self.chunk):
+            yield start, self.run(u[start:start + self.chunk])
@@ -0,0 +1,43 @@
+import numpy as np
+
+# Elementos (casos x puntos) que se apilan a la vez
+STATISTICS_CHUNK = 1 << 22
+
+
+def common_grid(xs):
+    """x axis shared by every case and whether the cases have to be resampled onto it."""
+    first = xs[0]
+    if(all(x is first or (len(x) == len(first) and np.array_equal(x, first)) for x in xs[1:])):
+        return (first, False)
+    lo = max(np.min(x) for x in xs)
+    hi = min(np.max(x) for x in xs)
+    if(not lo < hi):
+        raise ValueError('The cases do not overlap in x')
+    # Tantos puntos como el caso más largo, en escala log si el rango pasa de dos décadas (análisis AC)
+    n = max(len(x) for x in xs)
+    if(lo > 0 and hi / lo > 100):
+        return (np.geomspace(lo, hi, n), True)
+    return (np.linspace(lo, hi, n), True)
+
+
+def case_statistics(xs, ys, percentiles=(), chunk=STATISTICS_CHUNK):
+    """Common x grid and per x mean, std, min, max and p<percentile> of ys across cases, a chunk of x at a time."""
+    grid, resample = common_grid(xs)
+    n = len(grid)
+    names = ['mean', 'std', 'min', 'max'] + [f'p{p:g}' for p in percentiles]
+    results = {name: np.empty(n) for name in names}
+    step = max(chunk // len(ys), 1)
+    for start in range(0, n, step):
+        stop = min(start + step, n)
+        if(resample):
+            stack = np.stack([np.interp(grid[start:stop], x, y) for x, y in zip(xs, ys)])
+        else:
+            stack = np.stack([y[start:stop] for y in ys])
+        results['mean'][start:stop] = stack.mean(axis=0)
+        results['std'][start:stop] = stack.std(axis=0)
+        results['min'][start:stop] = stack.min(axis=0)
+        results['max'][start:stop] = stack.max(axis=0)
+        if(len(percentiles)):
+            for name, values in zip(names[4:], np.percentile(stack, percentiles, axis=0)):
+                results[name][start:stop] = values
+    return (grid, results)
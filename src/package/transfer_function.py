@@ -2,19 +2,174 @@ import sympy as sym
 import scipy.signal as signal
 from scipy.optimize import basinhopping
 import numpy as np
-from numpy.polynomial import Polynomial
+from scipy.special import factorial
 from .Parser import ExprParser
 import traceback
 
 LPN, HPN, LP2, HP2, LP1, HP1, BP, BR = range(8)
 
-# Evaluate a polynomial in reverse order using Horner's Rule,
-# for example: a3*x^3+a2*x^2+a1*x+a0 = ((a3*x+a2)x+a1)x+a0
-def poly_at(p, x):
-    total = 0
-    for a in p:
-        total = total * x + a
-    return total
+# Elementos de la matriz frecuencias x raíces que se evalúan a la vez
+ZPK_CHUNK = 1 << 20
+
+# Grilla adaptiva: puntos por década de la grilla inicial, error de interpolación tolerado y tope de puntos
+ADAPTIVE_POINTS_PER_DECADE = 20
+ADAPTIVE_TOL_DB = 0.05
+ADAPTIVE_TOL_DEG = 0.5
+ADAPTIVE_MAX_POINTS = 20000
+# Décadas antes de la primera y después de la última singularidad
+ADAPTIVE_MARGIN = 2
+# Rango en décadas de Hz cuando no hay singularidades fuera del origen, el mismo de getBode
+DEFAULT_DECADES = (-2, 6)
+
+# Respuestas temporales: constantes de tiempo del polo más lento hasta considerar la respuesta establecida,
+# períodos de la oscilación más lenta, puntos por constante de tiempo del polo más rápido, y topes de puntos
+RESPONSE_SETTLE_TAUS = 7
+RESPONSE_PERIODS = 3
+RESPONSE_POINTS_PER_TAU = 10
+RESPONSE_MIN_POINTS = 500
+RESPONSE_MAX_POINTS = 100000
+# tf2zpk separa los polos repetidos en pares casi complejos, se los agrupa dentro de esta fracción de |p|
+RESPONSE_REPEATED_TOL = 1e-3
+# Constantes de tiempo extra por cada repetición del polo más lento (t^k e^(pt) tarda más en caer)
+RESPONSE_TAUS_PER_REPEAT = 2
+
+def zpk_response(z, p, k, w, chunk=ZPK_CHUNK):
+    """Gain in dB, phase in degrees and group delay in s of k*prod(s - z)/prod(s - p) at s = jw."""
+    w = np.asarray(w, dtype=np.float64)
+    roots = np.concatenate([np.asarray(z, dtype=np.complex128).ravel(), np.asarray(p, dtype=np.complex128).ravel()])
+    sign = np.concatenate([np.ones(np.size(z)), -np.ones(np.size(p))])
+    g = np.empty(len(w))
+    ph = np.empty(len(w))
+    gd = np.empty(len(w))
+    rows = max(chunk // max(len(roots), 1), 1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for start in range(0, len(w), rows):
+            d = 1j * w[start:start + rows, None] - roots
+            mag2 = d.real**2 + d.imag**2
+            # Suma de logaritmos, no desborda en órdenes altos. La fase deja afuera el signo de k, como getBode
+            g[start:start + rows] = np.log(mag2) @ sign
+            angle = np.arctan2(d.imag, d.real)
+            # Raíces del semiplano derecho con Im > 0: jw - r cruza el semieje real negativo en w = Im r y
+            # arctan2 salta de -pi a pi, se sigue por la rama continua desde w = 0
+            angle -= 2 * np.pi * ((d.real < 0) & (d.imag >= 0) & (roots.imag > 0))
+            ph[start:start + rows] = angle @ sign
+            # -dphase/dw: Re(r)/|jw - r|^2 de los ceros menos el de los polos
+            gd[start:start + rows] = (roots.real / mag2) @ sign
+        # ln|.|^2 -> dB
+        g *= 10 / np.log(10)
+        g += 20 * np.log10(np.abs(k))
+    return g, np.degrees(ph, out=ph), gd
+
+
+def singularity_decades(z, p, margin=ADAPTIVE_MARGIN):
+    """Range of log10(w) that spans the zeros and poles off the origin with margin decades to spare, None without any."""
+    w0 = np.abs(np.concatenate([np.ravel(z), np.ravel(p)]))
+    w0 = w0[np.isfinite(w0) & (w0 > 0)]
+    if(not len(w0)):
+        return None
+    return (np.log10(w0.min()) - margin, np.log10(w0.max()) + margin)
+
+
+def seed_frequencies(z, p):
+    """Frequencies around every zero and pole off the origin, over a few times their bandwidth w0/Q but not at w0."""
+    roots = np.concatenate([np.ravel(z), np.ravel(p)]).astype(np.complex128)
+    roots = roots[np.isfinite(roots) & (roots != 0)]
+    w0 = np.abs(roots)
+    with np.errstate(divide='ignore'):
+        # Una raíz sobre el eje tiene Q infinito, se la trata como Q = 1e6
+        q = np.minimum(w0 / (2 * np.abs(roots.real)), 1e6)
+    u = np.linspace(-4, 4, 16)
+    return (w0[:, None] * np.exp(u / (2 * q[:, None]))).ravel()
+
+
+def adaptive_response(z, p, k, decades=None, tol_db=ADAPTIVE_TOL_DB, tol_deg=ADAPTIVE_TOL_DEG, max_points=ADAPTIVE_MAX_POINTS):
+    """w, g (dB), ph and gd of zpk_response on a log grid refined where the interpolation misses by tol_db or tol_deg."""
+    if(decades is None):
+        decades = singularity_decades(z, p) or tuple(d + np.log10(2 * np.pi) for d in DEFAULT_DECADES)
+    start, stop = decades
+    w = np.logspace(start, stop, max(int((stop - start) * ADAPTIVE_POINTS_PER_DECADE) + 1, 2))
+    seeds = seed_frequencies(z, p)
+    w = np.unique(np.concatenate([w, seeds[(seeds > w[0]) & (seeds < w[-1])]]))
+    g, ph, gd = zpk_response(z, p, k, w)
+
+    ws, gs, phs, gds = [w], [g], [ph], [gd]
+    count = len(w)
+    wa, wb, ga, gb, pa, pb = w[:-1], w[1:], g[:-1], g[1:], ph[:-1], ph[1:]
+    while(len(wa) and count < max_points):
+        wm = np.sqrt(wa * wb)
+        gm, pm, dm = zpk_response(z, p, k, wm)
+        ws.append(wm)
+        gs.append(gm)
+        phs.append(pm)
+        gds.append(dm)
+        count += len(wm)
+        # Se parten las mitades de los intervalos donde la recta se aleja de la curva
+        with np.errstate(invalid='ignore'):
+            bad = (np.abs(gm - (ga + gb) / 2) > tol_db) | (np.abs(pm - (pa + pb) / 2) > tol_deg)
+        bad &= wb / wa > 1 + 1e-9
+        wa, wb = np.concatenate([wa[bad], wm[bad]]), np.concatenate([wm[bad], wb[bad]])
+        ga, gb = np.concatenate([ga[bad], gm[bad]]), np.concatenate([gm[bad], gb[bad]])
+        pa, pb = np.concatenate([pa[bad], pm[bad]]), np.concatenate([pm[bad], pb[bad]])
+
+    w = np.concatenate(ws)
+    order = np.argsort(w)
+    return w[order], np.concatenate(gs)[order], np.concatenate(phs)[order], np.concatenate(gds)[order]
+
+
+def response_time(p):
+    """Time axis for the step and impulse responses of a system with poles p."""
+    p = np.asarray(p, dtype=np.complex128)
+    p = p[np.isfinite(p) & (np.abs(p) > 0)]
+    if(not len(p)):
+        return np.linspace(0, 1, RESPONSE_MIN_POINTS)
+    # Largo para que el polo más lento se asiente y la oscilación más lenta se repita, paso corto para el más rápido
+    span = 0
+    decaying = p[p.real < 0]
+    if(len(decaying)):
+        repeats = np.sum(np.abs(decaying[:, None] - p) <= RESPONSE_REPEATED_TOL * np.abs(decaying)[:, None], axis=1) - 1
+        span = np.max((RESPONSE_SETTLE_TAUS + RESPONSE_TAUS_PER_REPEAT * repeats) / -decaying.real)
+    oscillating = p[np.abs(p.imag) > RESPONSE_REPEATED_TOL * np.abs(p)]
+    if(len(oscillating)):
+        span = max(span, RESPONSE_PERIODS * 2 * np.pi / np.min(np.abs(oscillating.imag)))
+    if(span == 0):
+        # Solo polos reales inestables, se muestran unas constantes de tiempo del más lento
+        span = RESPONSE_SETTLE_TAUS / np.min(np.abs(p))
+    dt = 1 / (np.max(np.abs(p)) * RESPONSE_POINTS_PER_TAU)
+    return np.linspace(0, span, int(np.clip(np.ceil(span / dt) + 1, RESPONSE_MIN_POINTS, RESPONSE_MAX_POINTS)))
+
+
+def residue_response(b, a, t, chunk=ZPK_CHUNK):
+    """Inverse Laplace transform of b(s)/a(s) at the times t from its partial fractions, without the impulse at t = 0."""
+    r, p, direct = signal.residue(b, a)
+    # residue da los polos repetidos seguidos, con potencias crecientes
+    power = np.zeros(len(p), dtype=int)
+    for i in range(1, len(p)):
+        if(p[i] == p[i - 1]):
+            power[i] = power[i - 1] + 1
+    # Cada término r/(s - p)^j es r t^(j-1)/(j-1)! e^(pt)
+    coef = r / factorial(power)
+    t = np.asarray(t, dtype=np.float64)
+    y = np.empty(len(t))
+    rows = max(chunk // max(len(p), 1), 1)
+    for start in range(0, len(t), rows):
+        tc = t[start:start + rows, None]
+        y[start:start + rows] = np.real((np.exp(tc * p) * tc**power) @ coef)
+    return y
+
+
+class TimeResponses():
+    """ColumnStore loader of the step and impulse response columns of a TF dataset."""
+    def __init__(self, tf):
+        self.tf = tf
+
+    def read(self, name, case=0):
+        t = response_time(self.tf.p)
+        if(name == 'step_resp'):
+            return residue_response(self.tf.N, np.append(self.tf.D, 0), t)
+        if(name == 'imp_resp'):
+            return residue_response(self.tf.N, self.tf.D, t)
+        return t
+
 
 class TFunction():
     def __init__(self, *args, normalize=False):
@@ -27,8 +182,6 @@ class TFunction():
         self.gain = 1 #ganancia verdadera
         self.N = []
         self.D = []
-        self.dN = []
-        self.dD = []
 
         if(len(args) == 1):
             self.setExpression(args[0], normalize=normalize)
@@ -58,7 +211,6 @@ class TFunction():
         if normalize:
             self.normalize()
         self.tf_object = signal.TransferFunction(self.N, self.D)
-        self.computedDerivatives = False
     
     def getND(self):
         return self.N, self.D
@@ -74,7 +226,6 @@ class TFunction():
         self.N, self.D = np.array(np.real(N), dtype=np.float64), np.array(np.real(D), dtype=np.float64)
         if normalize:
             self.normalize()
-        self.computedDerivatives = False
         self.tf_object = signal.ZerosPolesGain(self.z, self.p, self.k)
 
     
@@ -86,7 +237,6 @@ class TFunction():
         self.N, self.D = np.array(N, dtype=np.float64), np.array(D, dtype=np.float64)
         self.z, self.p, self.k = z, p, k      
         self.tf_object = signal.ZerosPolesGain(self.z, self.p, self.k)
-        self.computedDerivatives = False
 
     def getZPK(self, in_hz=False):
         if(in_hz):
@@ -94,13 +244,6 @@ class TFunction():
         else:
             return self.z, self.p, self.k
 
-    def getDerivatives(self):
-        N = Polynomial(np.flip(self.N))
-        D = Polynomial(np.flip(self.D))
-        self.dN = np.flip(N.deriv().coef)
-        self.dD = np.flip(D.deriv().coef)
-        self.computedDerivatives = True
-
     def multiplyGain(self, k):
         self.gain *= k
         self.k *= k
@@ -118,7 +261,6 @@ class TFunction():
                 a = -a/pole
         self.k = self.k/a
         self.N = self.N/a
-        self.computedDerivatives = False
     
     def denormalize(self):
         a = 1+0j
@@ -128,12 +270,9 @@ class TFunction():
             a /= -pole
         self.k = self.k*a
         self.N = self.N*a
-        self.computedDerivatives = False
 
     def at(self, s):
-        # return poly_at(self.N, s) / poly_at(self.D, s)
         arr = np.array([s])
-        # print(signal.freqresp(self.tf_object, arr)[1][0], poly_at(self.N, s) / poly_at(self.D, s))
         # print(signal.freqresp(self.tf_object, arr)[1])
         return signal.freqresp(self.tf_object, arr)[1][0]
     
@@ -143,13 +282,6 @@ class TFunction():
     def maxFunctionMod(self, w):
         return -abs(self.at(1j*w))
     
-    #como ln(H) = ln(G) + j phi --> H'/H = G'/G + j phi'
-    def gd_at(self, w0):
-        if not self.computedDerivatives:
-            self.getDerivatives()
-        with np.errstate(divide='ignore'): 
-            return -np.imag(1j*(poly_at(self.dN, 1j*w0)/poly_at(self.N, 1j*w0) - poly_at(self.dD, 1j*w0)/poly_at(self.D, 1j*w0))) #'1j*..' --> regla de la cadena
-        
     def getZP(self, in_hz=False):
         if(in_hz):
             return self.z/(2*np.pi), self.p/(2*np.pi)
@@ -161,7 +293,7 @@ class TFunction():
             ws = np.linspace(start, stop, num) * (2 * np.pi if use_hz else 1)
         else:
             ws = np.logspace(start, stop, num) * (2 * np.pi if use_hz else 1)
-        w, g, ph = signal.bode(self.tf_object, w=ws)
+        g, ph, gd = zpk_response(self.z, self.p, self.k, ws)
         f = ws / (2 * np.pi)
         return f if use_hz else ws, g if db else 10**(g/20), ph
 
@@ -170,16 +302,22 @@ class TFunction():
             ws = np.linspace(start, stop, num) * (2 * np.pi if use_hz else 1)
         else:
             ws = np.logspace(start, stop, num) * (2 * np.pi if use_hz else 1)
-        #h = self.at(1j*ws)
-        w, g, ph = signal.bode(self.tf_object, w=ws)
-        for i, wi in enumerate(w):
-            ph[i] = 0
-            for p in self.p:
-                ph[i] -= np.angle(1j*wi - p, True)
-            for z in self.z:
-                ph[i] += np.angle(1j*wi - z, True)
-
-        gd = self.gd_at(ws) #/ (2 * np.pi) #--> no hay que hacer regla de cadena porque se achica tmb la escala de w
+        # gd queda en s, no hay que hacer regla de cadena porque se achica tmb la escala de w
+        g, ph, gd = zpk_response(self.z, self.p, self.k, ws)
+        f = ws / (2 * np.pi)
+        return f if use_hz else ws, g if db else 10**(g/20), ph, gd
+
+    def getBodeAt(self, ws, db=False, use_hz=True):
+        """Gain, phase and group delay at the frequencies ws, in Hz unless use_hz is False."""
+        g, ph, gd = zpk_response(self.z, self.p, self.k, np.asarray(ws) * (2 * np.pi if use_hz else 1))
+        return g if db else 10**(g/20), ph, gd
+
+    def getBodeAdaptive(self, start=None, stop=None, db=False, use_hz=True):
+        """getBode on the adaptive grid of adaptive_response, start and stop in decades like getBode or None to follow the singularities."""
+        decades = None
+        if(start is not None and stop is not None):
+            decades = tuple(d + (np.log10(2 * np.pi) if use_hz else 0) for d in (start, stop))
+        ws, g, ph, gd = adaptive_response(self.z, self.p, self.k, decades)
         f = ws / (2 * np.pi)
         return f if use_hz else ws, g if db else 10**(g/20), ph, gd
 
@@ -280,15 +418,12 @@ class TFunction():
         return "Invalid"
 
     def getEdgeGainsInRange(self, isReject, bpw, db=True):
-        if isReject:
-            f1, g1, ph1, gd1 = self.getBode(linear=True, start=bpw[0][0], stop=bpw[0][1], num=1000, db=db, use_hz=False)
-            f2, g2, ph2, gd2 = self.getBode(linear=True, start=bpw[1][0], stop=bpw[1][1], num=1000, db=db, use_hz=False)
-            
-            minGain, maxGain = min(np.append(g1,g2)), max(np.append(g1,g2))
-        else:
-            f, g, ph, gd = self.getBode(linear=True, start=bpw[0], stop=bpw[1], num=1000, db=db, use_hz=False)
-            minGain, maxGain = min(g), max(g)
-        return minGain, maxGain
+        # Las dos bandas de un rechazo se evalúan juntas
+        bands = bpw if isReject else [bpw]
+        ws = np.concatenate([np.linspace(band[0], band[1], 1000) for band in bands])
+        g, ph, gd = zpk_response(self.z, self.p, self.k, ws)
+        g = g if db else 10**(g/20)
+        return min(g), max(g)
 
     def getPoleQ(self):
         if(len(self.p) == 2):
@@ -0,0 +1,127 @@
+import os
+import runpy
+import numpy as np
+
+USER_TRANSFORMS = os.path.join(os.path.expanduser('~'), '.plottool', 'transforms.py')
+
+# Ticks de a 45°/90° para las fases
+DEGREE_TICKS = {'steps': [1.8, 2.25, 4.5, 9]}
+
+
+class Transform():
+    """A named transform of the y data of a dataline."""
+    def __init__(self, name, label, kernel, locator=None):
+        self.name = name
+        self.label = label
+        # kernel(x, y, out) puede llenar out (vacío, del largo de y) y devolverlo para no crear temporales
+        self.kernel = kernel
+        # Argumentos de MaxNLocator que le quedan bien al eje y, None para el locator por defecto
+        self.locator = locator
+
+
+# En el orden de los combo boxes
+TRANSFORMS = {}
+
+
+def register_transform(name, label, kernel, locator=None):
+    """Adds a transform to the registry, or replaces the one with the same name."""
+    TRANSFORMS[name] = Transform(name, label, kernel, locator)
+    return TRANSFORMS[name]
+
+
+def get_transform(name):
+    return TRANSFORMS.get(name, TRANSFORMS['none'])
+
+
+def apply_transform(x, y, name):
+    out = np.empty(len(y), dtype=np.result_type(np.real(y).dtype, np.float16))
+    return get_transform(name).kernel(x, y, out)
+
+
+def load_user_transforms(path=USER_TRANSFORMS):
+    """Runs path, if it exists, with register_transform at hand so it can add its own kernels."""
+    if(os.path.isfile(path)):
+        runpy.run_path(path, init_globals={'register_transform': register_transform, 'np': np})
+
+
+def none(x, y, out):
+    return np.real(y)
+
+
+def magnitude(x, y, out):
+    return np.abs(y, out=out)
+
+
+def phase(x, y, out):
+    np.arctan2(np.imag(y), np.real(y), out=out)
+    return np.degrees(out, out=out)
+
+
+def unwrapped_phase(x, y, out):
+    out[:] = np.unwrap(phase(x, y, out), period=360)
+    return out
+
+
+def db(x, y, out):
+    # La parte real de 20log(.) de un complejo es 20log(|.|)
+    np.log10(np.abs(y, out=out) if np.iscomplexobj(y) else y, out=out)
+    out *= 20
+    return out
+
+
+def db_magnitude(x, y, out):
+    np.log10(np.abs(y, out=out), out=out)
+    out *= 20
+    return out
+
+
+def unwrap(x, y, out):
+    out[:] = np.unwrap(np.real(y), period=360)
+    return out
+
+
+def group_delay(x, y, out):
+    """-dArg/dω, with x in Hz."""
+    # Las columnas de fase son reales y en grados (ph de las TF, V(x) deg de LTspice), solo las complejas tienen argumento
+    if(np.iscomplexobj(y)):
+        np.arctan2(np.imag(y), np.real(y), out=out)
+    else:
+        np.radians(y, out=out)
+    out[:] = np.unwrap(out)
+    out[:] = np.gradient(out, 2 * np.pi * np.real(x))
+    return np.negative(out, out=out)
+
+
+def derivative(x, y, out):
+    out[:] = np.gradient(np.real(y), np.real(x))
+    return out
+
+
+def integral(x, y, out):
+    """Cumulative trapezoidal integral, 0 at the first sample."""
+    y = np.real(y)
+    if(len(out)):
+        out[0] = 0
+        np.cumsum((y[1:] + y[:-1]) * np.diff(np.real(x)) / 2, out=out[1:])
+    return out
+
+
+def normalized(x, y, out):
+    return np.divide(np.real(y), np.nanmax(np.abs(y)), out=out)
+
+
+register_transform('none', 'None', none)
+register_transform('magnitude', '|.|', magnitude)
+register_transform('phase', 'Arg(.)', phase, DEGREE_TICKS)
+register_transform('unwrapped_phase', 'unwrap Arg(.)', unwrapped_phase, DEGREE_TICKS)
+register_transform('db', '20log(.)', db)
+register_transform('db_magnitude', '20log(|.|)', db_magnitude)
+register_transform('unwrap', 'unwrap(.)', unwrap, DEGREE_TICKS)
+register_transform('unwrap_intticks', 'unwrap(.) intticks', unwrap, {'steps': [4.5], 'integer': True})
+register_transform('group_delay', '-dArg(.)/dω', group_delay)
+register_transform('derivative', 'd(.)/dx', derivative)
+register_transform('integral', '∫(.)dx', integral)
+register_transform('normalized', '(.)/max|.|', normalized)
+
+# Los proyectos viejos guardan el índice del combo box
+LEGACY_TRANSFORMS = ['none', 'magnitude', 'phase', 'unwrapped_phase', 'db', 'db_magnitude', 'unwrap', 'unwrap_intticks']
@@ -0,0 +1,281 @@
+import mmap
+import re
+import warnings
+import numpy as np
+
+REAL, POLAR, CARTESIAN = range(3)
+
+_STEP = b'Step Information:'
+_CASENAME_RE = re.compile(r'Step Information:\s*(.*?)\s+\((?:Run|Step): ')
+
+# Todo lo que no es un número en "(-3.01dB,-45.2°)" o en "1.2e-3,-4.5e-1" se borra o pasa a ser un espacio,
+# así cada bloque queda como una tira de floats separados por whitespace que numpy lee de una sola vez
+_DELETE = b'()dB\xb0\xc2'
+_SEPARATORS = bytes.maketrans(b',\t\r', b'   ')
+
+# Bytes de texto que se convierten a la vez en parse_scientific
+PARSE_CHUNK = 1 << 24
+
+# Potencias de 10 exactas en float64, hasta acá mantisa * 10^k redondea bien (camino rápido de Clinger)
+_POW10 = 10.0 ** np.arange(23)
+
+
+def token_bounds(a):
+    """Start and end of every run of non whitespace bytes of a."""
+    word = np.empty(len(a) + 2, dtype=bool)
+    word[0] = word[-1] = False
+    np.greater(a, 32, out=word[1:-1])
+    edges = np.flatnonzero(word[1:] != word[:-1])
+    return edges[::2], edges[1::2]
+
+
+def swar_digits(block):
+    """Value of rows of 16 ASCII digits, 8 per uint64, None if any byte is not a digit."""
+    words = block.view('<u8')
+    # Un byte menor a '0' se lleva el bit alto al restar, uno mayor a '9' al sumar 0x46
+    if(np.any((words - np.uint64(0x3030303030303030) | words + np.uint64(0x4646464646464646)) & np.uint64(0x8080808080808080))):
+        return None
+    x = words - np.uint64(0x3030303030303030)
+    x = (x * np.uint64(10) + (x >> np.uint64(8))) & np.uint64(0x00FF00FF00FF00FF)
+    x = (x * np.uint64(100) + (x >> np.uint64(16))) & np.uint64(0x0000FFFF0000FFFF)
+    x = (x * np.uint64(10000) + (x >> np.uint64(32))) & np.uint64(0xFFFFFFFF)
+    return x[:, 0] * np.uint64(10**8) + x[:, 1]
+
+
+def parse_scientific(raw):
+    """Floats written like LTspice does, [-]d.ddd...e[+-]dd, read from fixed byte offsets. None for other layouts."""
+    a = np.frombuffer(raw, dtype=np.uint8)
+    starts, ends = token_bounds(a)
+    if(not len(ends)):
+        return np.empty(0)
+    first = bytes(a[starts[0]:ends[0]])
+    e, dot = first.lower().rfind(b'e'), first.find(b'.')
+    if(e < 0 or dot < 1 or dot > e):
+        return None
+    # Posiciones contadas desde el final del número, todos tienen el mismo largo salvo el signo
+    pe, pd, nf = len(first) - e, len(first) - dot, e - dot - 1
+    width = pd + 2
+    if(pe < 3 or nf > 16):
+        return None
+    lengths = ends - starts
+    if(not np.all((lengths == pd + 1) | (lengths == width))):
+        return None
+
+    # Los últimos width bytes de cada número, como filas de una ventana deslizante sobre el texto
+    pad = max(width, pe + 16)
+    padded = np.concatenate([np.full(pad, 32, dtype=np.uint8), a])
+    window = np.lib.stride_tricks.as_strided(padded, shape=(len(padded) - width + 1, width), strides=(1, 1), writeable=False)
+    rows = window[ends + pad - width]
+    sign, esign, integer = rows[:, 0], rows[:, width - pe + 1], rows[:, width - pd - 1] - np.uint8(ord('0'))
+    signed = sign[lengths == width]
+    if(not np.all((signed == ord('-')) | (signed == ord('+'))) or not np.all((esign == ord('-')) | (esign == ord('+')))):
+        return None
+    if(not np.all(rows[:, width - pe] | 32 == ord('e')) or not np.all(rows[:, width - pd] == ord('.'))):
+        return None
+    # Los decimales, completados con ceros a la izquierda hasta 16 dígitos
+    window = np.lib.stride_tricks.as_strided(padded, shape=(len(padded) - 15, 16), strides=(1, 1), writeable=False)
+    fraction = window[ends + pad - pe - 16]
+    fraction[:, :16 - nf] = ord('0')
+    fraction = swar_digits(fraction)
+    if(fraction is None or np.any(integer > 9)):
+        return None
+    mantissa = integer * np.uint64(10**nf) + fraction
+    exponent = np.zeros(len(ends), dtype=np.int64)
+    for col in range(width - pe + 2, width):
+        digit = rows[:, col] - np.uint8(ord('0'))
+        if(np.any(digit > 9)):
+            return None
+        exponent *= 10
+        exponent += digit
+    np.negative(exponent, out=exponent, where=esign == ord('-'))
+    exponent -= nf
+
+    # Camino rápido de Clinger: mantisa y potencia de 10 exactas en float64, una sola operación redondeada
+    fast = (mantissa < np.uint64(2**53)) & (np.abs(exponent) < len(_POW10))
+    scale = _POW10[np.minimum(np.abs(exponent), len(_POW10) - 1)]
+    values = mantissa.astype(np.float64)
+    np.multiply(values, scale, out=values, where=fast & (exponent >= 0))
+    np.divide(values, scale, out=values, where=fast & (exponent < 0))
+    np.negative(values, out=values, where=fast & (sign == ord('-')))
+    # El resto (mantisas de más de 53 bits, exponentes grandes) sí pasa por strtod, con el whitespace que le sigue
+    slow = np.flatnonzero(~fast)
+    if(len(slow)):
+        sizes = ends[slow] - starts[slow] + 1
+        offsets = np.repeat(starts[slow] - np.cumsum(sizes) + sizes, sizes)
+        chars = np.append(a, np.uint8(32))[offsets + np.arange(len(offsets))]
+        values[slow] = np.fromstring(chars.tobytes(), sep=' ')
+    return values
+
+
+def parse_numbers(raw, sep=' '):
+    """Parses a separated blob of floats, raising ValueError if it is not read to its end."""
+    if(sep == ' '):
+        parts = []
+        start = 0
+        while(start < len(raw)):
+            # Cortes en whitespace, para no partir un número
+            stop = min(start + PARSE_CHUNK, len(raw))
+            while(stop < len(raw) and raw[stop] > 32):
+                stop += 1
+            values = parse_scientific(raw[start:stop])
+            if(values is None):
+                break
+            parts.append(values)
+            start = stop
+        else:
+            return np.concatenate(parts) if parts else np.empty(0)
+    with warnings.catch_warnings():
+        warnings.simplefilter('error', DeprecationWarning)
+        try:
+            return np.fromstring(raw, sep=sep)
+        except DeprecationWarning as e:
+            raise ValueError(str(e))
+
+
+def row_layout(line):
+    """Returns the kind of each tab separated cell of a data row (REAL, POLAR or CARTESIAN)."""
+    layout = []
+    for cell in line.rstrip(b'\r\n').split(b'\t'):
+        if(b'dB' in cell):
+            layout.append(POLAR)
+        elif(b',' in cell):
+            layout.append(CARTESIAN)
+        else:
+            layout.append(REAL)
+    return layout
+
+
+def parse_block(block, fields, layout):
+    """Parses all the rows of a case at once into a dict of float64/complex128 arrays."""
+    width = sum(1 if kind == REAL else 2 for kind in layout)
+    values = parse_numbers(block.translate(_SEPARATORS, _DELETE))
+    if(values.size % width != 0):
+        raise ValueError(f'Malformed LTspice export: {values.size} values for rows of {width}')
+    table = values.reshape(-1, width)
+    rows = table.shape[0]
+
+    case = {}
+    col = 0
+    for field, kind in zip(fields, layout):
+        if(kind == REAL):
+            case[field] = np.empty(rows, dtype=np.float64)
+            case[field][:] = table[:, col]
+            col += 1
+        elif(kind == POLAR):
+            case[field] = np.empty(rows, dtype=np.float64)
+            case[field][:] = table[:, col]
+            case[field + ' deg'] = np.empty(rows, dtype=np.float64)
+            case[field + ' deg'][:] = table[:, col + 1]
+            col += 2
+        else:
+            case[field] = np.empty(rows, dtype=np.complex128)
+            case[field].real = table[:, col]
+            case[field].imag = table[:, col + 1]
+            col += 2
+    return case
+
+
+def step_lines(mm, start):
+    """Start and end (after the newline, if there is one) of every "Step Information:" line from start on."""
+    pos = mm.find(_STEP, start)
+    while(pos != -1):
+        if(pos == 0 or mm[pos - 1] == ord('\n')):
+            end = mm.find(b'\n', pos)
+            end = len(mm) if end == -1 else end + 1
+            yield pos, end
+            pos = mm.find(_STEP, end)
+        else:
+            pos = mm.find(_STEP, pos + 1)
+
+
+class TxtFile():
+    """Reads an LTspice "Export data as text" file one case at a time, and keeps reading it as it grows."""
+    def __init__(self, filepath):
+        self.filepath = filepath
+        self.fields = None
+        self.layout = None
+        # Como en CsvFile, read() sigue desde el fin de la última línea completa y una línea sin terminar se relee
+        self.offset = 0
+        self.partial = 0
+
+    def state(self):
+        return {'fields': self.fields, 'layout': self.layout, 'offset': self.offset, 'partial': self.partial}
+
+    @classmethod
+    def resume(cls, filepath, state):
+        reader = cls(filepath)
+        reader.fields = state['fields']
+        reader.layout = state['layout']
+        reader.offset = state['offset']
+        reader.partial = state['partial']
+        return reader
+
+    def read(self, progress=None):
+        """Cases after offset, their names, and whether the first one continues the last case of the previous read."""
+        with open(self.filepath, mode='rb') as file:
+            if(self.fields is None):
+                header = file.readline()
+                self.fields = header.decode('utf-8', errors='replace').rstrip('\r\n').split('\t')
+                self.offset = len(header)
+                if(file.seek(0, 2) == self.offset):
+                    return [{field: np.empty(0) for field in self.fields}], [], False
+                continues = False
+            else:
+                continues = True
+            if(file.seek(0, 2) <= self.offset):
+                return [], [], continues
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                start = self.offset
+                limit = len(mm)
+                blocks = []
+                casenames = []
+                for (step_start, step_end) in step_lines(mm, start):
+                    if(mm[step_end - 1] != ord('\n')):
+                        # "Step Information:" a medio escribir, queda para el próximo read()
+                        limit = step_start
+                        break
+                    if(step_start > start):
+                        blocks.append((start, step_start))
+                    elif(not blocks):
+                        continues = False
+                    start = step_end
+                    name = _CASENAME_RE.match(mm[step_start:step_end].decode('utf-8', errors='replace'))
+                    if(name):
+                        casenames.append(name.group(1))
+                if(limit > start or not blocks):
+                    blocks.append((start, max(start, limit)))
+
+                last_line = mm.rfind(b'\n', start, limit) + 1
+                self.offset = max(start, last_line)
+                self.partial = 1 if mm[self.offset:limit].strip() else 0
+
+                data = []
+                for (begin, end) in blocks:
+                    first_row_end = mm.find(b'\n', begin, end)
+                    if(self.layout is None and (not mm[begin:end].strip() or (first_row_end == -1 and self.partial))):
+                        # Sin ninguna fila completa todavía no se conoce el formato de las columnas
+                        data.append({field: np.empty(0) for field in self.fields})
+                        if(end == limit):
+                            self.partial = 0
+                        continue
+                    if(self.layout is None):
+                        self.layout = row_layout(mm[begin:end if first_row_end == -1 else first_row_end])
+                        if(len(self.layout) != len(self.fields)):
+                            raise ValueError(f'Malformed LTspice export: {len(self.layout)} values for {len(self.fields)} fields')
+                    try:
+                        data.append(parse_block(mm[begin:end], self.fields, self.layout))
+                    except ValueError:
+                        if(not self.partial or end != limit):
+                            raise
+                        # La última línea todavía se está escribiendo, se lee en el próximo read()
+                        data.append(parse_block(mm[begin:self.offset], self.fields, self.layout))
+                        self.partial = 0
+                    if(progress):
+                        progress(end / len(mm))
+        return data, casenames, continues
+
+
+def read_txt(filepath, progress=None):
+    """Reads a whole LTspice text export, returns the list of cases (dicts of arrays) and their names."""
+    data, casenames, continues = TxtFile(filepath).read(progress)
+    return data, casenames
@@ -86,13 +86,6 @@ class Ui_case_dialog(object):
         font.setPointSize(9)
         self.case_transform_cb.setFont(font)
         self.case_transform_cb.setObjectName("case_transform_cb")
-        self.case_transform_cb.addItem("")
-        self.case_transform_cb.addItem("")
-        self.case_transform_cb.addItem("")
-        self.case_transform_cb.addItem("")
-        self.case_transform_cb.addItem("")
-        self.case_transform_cb.addItem("")
-        self.case_transform_cb.addItem("")
         self.gridLayout.addWidget(self.case_transform_cb, 4, 4, 1, 1)
         self.label = QtWidgets.QLabel(case_dialog)
         font = QtGui.QFont()
@@ -328,6 +321,13 @@ class Ui_case_dialog(object):
         self.case_addlegend_cb.setFont(font)
         self.case_addlegend_cb.setObjectName("case_addlegend_cb")
         self.gridLayout_4.addWidget(self.case_addlegend_cb, 1, 0, 1, 1)
+        self.case_family_cb = QtWidgets.QCheckBox(self.groupBox_2)
+        font = QtGui.QFont()
+        font.setFamily("Arial")
+        font.setPointSize(9)
+        self.case_family_cb.setFont(font)
+        self.case_family_cb.setObjectName("case_family_cb")
+        self.gridLayout_4.addWidget(self.case_family_cb, 1, 1, 1, 1)
         self.case_inforname_rb = QtWidgets.QRadioButton(self.groupBox_2)
         font = QtGui.QFont()
         font.setFamily("Arial")
@@ -425,13 +425,6 @@ class Ui_case_dialog(object):
         self.case_style_cb.setItemText(2, _translate("case_dialog", "Dashed"))
         self.case_style_cb.setItemText(3, _translate("case_dialog", "Dash-dot"))
         self.case_style_cb.setItemText(4, _translate("case_dialog", "Dotted"))
-        self.case_transform_cb.setItemText(0, _translate("case_dialog", "None"))
-        self.case_transform_cb.setItemText(1, _translate("case_dialog", "|.|"))
-        self.case_transform_cb.setItemText(2, _translate("case_dialog", "Arg(.)"))
-        self.case_transform_cb.setItemText(3, _translate("case_dialog", "unwrap Arg(.)"))
-        self.case_transform_cb.setItemText(4, _translate("case_dialog", "20log(.)"))
-        self.case_transform_cb.setItemText(5, _translate("case_dialog", "20log(|.|)"))
-        self.case_transform_cb.setItemText(6, _translate("case_dialog", "unwrap(.)"))
         self.label.setText(_translate("case_dialog", "First case:"))
         self.label_3.setText(_translate("case_dialog", "X data"))
         self.label_7.setText(_translate("case_dialog", "Line width"))
@@ -490,6 +483,8 @@ class Ui_case_dialog(object):
         self.case_pickcol_btn.setText(_translate("case_dialog", "Pick"))
         self.groupBox_2.setTitle(_translate("case_dialog", "Naming"))
         self.case_addlegend_cb.setText(_translate("case_dialog", "Add labels to legend"))
+        self.case_family_cb.setToolTip(_translate("case_dialog", "Draw all the cases as a single dataline"))
+        self.case_family_cb.setText(_translate("case_dialog", "One family"))
         self.case_inforname_rb.setText(_translate("case_dialog", "Case info"))
         self.case_numname_rb.setText(_translate("case_dialog", "Numbered"))
         self.label_6.setText(_translate("case_dialog", "Line style"))
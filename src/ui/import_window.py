@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+
+# Form implementation generated from reading ui file 'designer/import_window.ui'
+#
+# Created by: PyQt5 UI code generator 5.15.11
+#
+# WARNING: Any manual changes made to this file will be lost when pyuic5 is
+# run again.  Do not edit this file unless you know what you are doing.
+
+
+from PyQt5 import QtCore, QtGui, QtWidgets
+
+
+class Ui_ImportDialog(object):
+    def setupUi(self, ImportDialog):
+        ImportDialog.setObjectName("ImportDialog")
+        ImportDialog.resize(560, 320)
+        self.gridLayout = QtWidgets.QGridLayout(ImportDialog)
+        self.gridLayout.setObjectName("gridLayout")
+        self.import_table = QtWidgets.QTableWidget(ImportDialog)
+        font = QtGui.QFont()
+        font.setFamily("Arial")
+        font.setPointSize(9)
+        self.import_table.setFont(font)
+        self.import_table.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.import_table.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+        self.import_table.setColumnCount(3)
+        self.import_table.setObjectName("import_table")
+        self.import_table.setRowCount(0)
+        item = QtWidgets.QTableWidgetItem()
+        self.import_table.setHorizontalHeaderItem(0, item)
+        item = QtWidgets.QTableWidgetItem()
+        self.import_table.setHorizontalHeaderItem(1, item)
+        item = QtWidgets.QTableWidgetItem()
+        self.import_table.setHorizontalHeaderItem(2, item)
+        self.import_table.horizontalHeader().setStretchLastSection(True)
+        self.import_table.verticalHeader().setVisible(False)
+        self.gridLayout.addWidget(self.import_table, 0, 0, 1, 3)
+        self.cancel_sel_btn = QtWidgets.QPushButton(ImportDialog)
+        font = QtGui.QFont()
+        font.setFamily("Arial")
+        font.setPointSize(9)
+        self.cancel_sel_btn.setFont(font)
+        self.cancel_sel_btn.setObjectName("cancel_sel_btn")
+        self.gridLayout.addWidget(self.cancel_sel_btn, 1, 0, 1, 1)
+        self.cancel_all_btn = QtWidgets.QPushButton(ImportDialog)
+        font = QtGui.QFont()
+        font.setFamily("Arial")
+        font.setPointSize(9)
+        self.cancel_all_btn.setFont(font)
+        self.cancel_all_btn.setObjectName("cancel_all_btn")
+        self.gridLayout.addWidget(self.cancel_all_btn, 1, 1, 1, 1)
+        self.close_btn = QtWidgets.QDialogButtonBox(ImportDialog)
+        font = QtGui.QFont()
+        font.setFamily("Arial")
+        font.setPointSize(9)
+        self.close_btn.setFont(font)
+        self.close_btn.setOrientation(QtCore.Qt.Horizontal)
+        self.close_btn.setStandardButtons(QtWidgets.QDialogButtonBox.Close)
+        self.close_btn.setObjectName("close_btn")
+        self.gridLayout.addWidget(self.close_btn, 1, 2, 1, 1)
+
+        self.retranslateUi(ImportDialog)
+        self.close_btn.rejected.connect(ImportDialog.reject) # type: ignore
+        QtCore.QMetaObject.connectSlotsByName(ImportDialog)
+
+    def retranslateUi(self, ImportDialog):
+        _translate = QtCore.QCoreApplication.translate
+        ImportDialog.setWindowTitle(_translate("ImportDialog", "Importing files"))
+        item = self.import_table.horizontalHeaderItem(0)
+        item.setText(_translate("ImportDialog", "File"))
+        item = self.import_table.horizontalHeaderItem(1)
+        item.setText(_translate("ImportDialog", "Status"))
+        item = self.import_table.horizontalHeaderItem(2)
+        item.setText(_translate("ImportDialog", "Progress"))
+        self.cancel_sel_btn.setText(_translate("ImportDialog", "Cancel selected"))
+        self.cancel_all_btn.setText(_translate("ImportDialog", "Cancel all"))
@@ -117,9 +117,15 @@ class Ui_MainWindow(object):
         self.ds_casenum_lb.setObjectName("ds_casenum_lb")
         self.cases_hl.addWidget(self.ds_casenum_lb)
         self.gridLayout_5.addLayout(self.cases_hl, 2, 0, 1, 1)
+        self.ds_variables_btn = QtWidgets.QPushButton(self.dataset_gb)
+        self.ds_variables_btn.setObjectName("ds_variables_btn")
+        self.gridLayout_5.addWidget(self.ds_variables_btn, 7, 0, 1, 1)
+        self.ds_follow_chk = QtWidgets.QCheckBox(self.dataset_gb)
+        self.ds_follow_chk.setObjectName("ds_follow_chk")
+        self.gridLayout_5.addWidget(self.ds_follow_chk, 8, 0, 1, 1)
         self.ds_remove_btn = QtWidgets.QPushButton(self.dataset_gb)
         self.ds_remove_btn.setObjectName("ds_remove_btn")
-        self.gridLayout_5.addWidget(self.ds_remove_btn, 7, 0, 1, 1)
+        self.gridLayout_5.addWidget(self.ds_remove_btn, 9, 0, 1, 1)
         self.horizontalLayout_3 = QtWidgets.QHBoxLayout()
         self.horizontalLayout_3.setObjectName("horizontalLayout_3")
         self.ds_info_tag = QtWidgets.QLabel(self.dataset_gb)
@@ -510,6 +516,29 @@ class Ui_MainWindow(object):
         self.label_10 = QtWidgets.QLabel(self.dataline_gb)
         self.label_10.setObjectName("label_10")
         self.gridLayout_6.addWidget(self.label_10, 1, 0, 1, 1)
+        self.label_density = QtWidgets.QLabel(self.dataline_gb)
+        self.label_density.setObjectName("label_density")
+        self.gridLayout_6.addWidget(self.label_density, 18, 0, 1, 1)
+        self.horizontalLayout_4 = QtWidgets.QHBoxLayout()
+        self.horizontalLayout_4.setObjectName("horizontalLayout_4")
+        self.dl_density_chk = QtWidgets.QCheckBox(self.dataline_gb)
+        self.dl_density_chk.setText("")
+        self.dl_density_chk.setObjectName("dl_density_chk")
+        self.horizontalLayout_4.addWidget(self.dl_density_chk)
+        self.dl_colormap_cb = QtWidgets.QComboBox(self.dataline_gb)
+        self.dl_colormap_cb.setMaximumSize(QtCore.QSize(16777215, 24))
+        self.dl_colormap_cb.setObjectName("dl_colormap_cb")
+        self.horizontalLayout_4.addWidget(self.dl_colormap_cb)
+        self.dl_density_log_chk = QtWidgets.QCheckBox(self.dataline_gb)
+        self.dl_density_log_chk.setObjectName("dl_density_log_chk")
+        self.horizontalLayout_4.addWidget(self.dl_density_log_chk)
+        self.gridLayout_6.addLayout(self.horizontalLayout_4, 18, 1, 1, 1)
+        self.dl_cases_lb = QtWidgets.QLabel(self.dataline_gb)
+        self.dl_cases_lb.setObjectName("dl_cases_lb")
+        self.gridLayout_6.addWidget(self.dl_cases_lb, 2, 0, 1, 1)
+        self.dl_cases_edit = QtWidgets.QLineEdit(self.dataline_gb)
+        self.dl_cases_edit.setObjectName("dl_cases_edit")
+        self.gridLayout_6.addWidget(self.dl_cases_edit, 2, 1, 1, 1)
         self.dl_name_edit = QtWidgets.QLineEdit(self.dataline_gb)
         self.dl_name_edit.setMinimumSize(QtCore.QSize(50, 0))
         self.dl_name_edit.setObjectName("dl_name_edit")
@@ -517,14 +546,6 @@ class Ui_MainWindow(object):
         self.dl_transform_cb = QtWidgets.QComboBox(self.dataline_gb)
         self.dl_transform_cb.setMaximumSize(QtCore.QSize(16777215, 24))
         self.dl_transform_cb.setObjectName("dl_transform_cb")
-        self.dl_transform_cb.addItem("")
-        self.dl_transform_cb.addItem("")
-        self.dl_transform_cb.addItem("")
-        self.dl_transform_cb.addItem("")
-        self.dl_transform_cb.addItem("")
-        self.dl_transform_cb.addItem("")
-        self.dl_transform_cb.addItem("")
-        self.dl_transform_cb.addItem("")
         self.gridLayout_6.addWidget(self.dl_transform_cb, 3, 1, 1, 1)
         self.dl_yoffset_sb = ScienDSpinBox(self.dataline_gb)
         self.dl_yoffset_sb.setMaximumSize(QtCore.QSize(16777215, 24))
@@ -564,6 +585,10 @@ class Ui_MainWindow(object):
         self.actionLoad.setObjectName("actionLoad")
         self.actionSave = QtWidgets.QAction(MainWindow)
         self.actionSave.setObjectName("actionSave")
+        self.actionImport_decimated = QtWidgets.QAction(MainWindow)
+        self.actionImport_decimated.setObjectName("actionImport_decimated")
+        self.actionCase_statistics = QtWidgets.QAction(MainWindow)
+        self.actionCase_statistics.setObjectName("actionCase_statistics")
         self.actionLoad_2 = QtWidgets.QAction(MainWindow)
         self.actionLoad_2.setObjectName("actionLoad_2")
         self.actionSave_2 = QtWidgets.QAction(MainWindow)
@@ -590,6 +615,9 @@ class Ui_MainWindow(object):
         self.actionColorsRandom.setObjectName("actionColorsRandom")
         self.menuProject.addAction(self.actionLoad_2)
         self.menuProject.addAction(self.actionSave_2)
+        self.menuProject.addSeparator()
+        self.menuProject.addAction(self.actionImport_decimated)
+        self.menuProject.addAction(self.actionCase_statistics)
         self.menubar.addAction(self.menuProject.menuAction())
 
         self.retranslateUi(MainWindow)
@@ -604,7 +632,9 @@ class Ui_MainWindow(object):
         MainWindow.setTabOrder(self.ds_title_edit, self.ds_addline_btn)
         MainWindow.setTabOrder(self.ds_addline_btn, self.ds_caseadd_btn)
         MainWindow.setTabOrder(self.ds_caseadd_btn, self.ds_poleszeros_btn)
-        MainWindow.setTabOrder(self.ds_poleszeros_btn, self.ds_remove_btn)
+        MainWindow.setTabOrder(self.ds_poleszeros_btn, self.ds_variables_btn)
+        MainWindow.setTabOrder(self.ds_variables_btn, self.ds_follow_chk)
+        MainWindow.setTabOrder(self.ds_follow_chk, self.ds_remove_btn)
         MainWindow.setTabOrder(self.ds_remove_btn, self.plt_labelsize_sb)
         MainWindow.setTabOrder(self.plt_labelsize_sb, self.plt_titlesize_sb)
         MainWindow.setTabOrder(self.plt_titlesize_sb, self.plt_ticksize_sb)
@@ -648,6 +678,9 @@ class Ui_MainWindow(object):
         self.ds_poleszeros_btn.setText(_translate("MainWindow", "Show poles and zeros"))
         self.ds_cases_lb.setText(_translate("MainWindow", "Cases:"))
         self.ds_casenum_lb.setText(_translate("MainWindow", "0"))
+        self.ds_variables_btn.setText(_translate("MainWindow", "Variables..."))
+        self.ds_follow_chk.setToolTip(_translate("MainWindow", "Read the rows appended to the file while it is being written"))
+        self.ds_follow_chk.setText(_translate("MainWindow", "Follow file"))
         self.ds_remove_btn.setText(_translate("MainWindow", "Remove dataset"))
         self.ds_info_tag.setText(_translate("MainWindow", "Info:"))
         self.ds_info_lb.setText(_translate("MainWindow", "?"))
@@ -739,20 +772,21 @@ class Ui_MainWindow(object):
         self.label_6.setText(_translate("MainWindow", "Y scale"))
         self.label_22.setText(_translate("MainWindow", "Transform"))
         self.label_10.setText(_translate("MainWindow", "Render"))
-        self.dl_transform_cb.setItemText(0, _translate("MainWindow", "None"))
-        self.dl_transform_cb.setItemText(1, _translate("MainWindow", "|.|"))
-        self.dl_transform_cb.setItemText(2, _translate("MainWindow", "Arg(.)"))
-        self.dl_transform_cb.setItemText(3, _translate("MainWindow", "unwrap Arg(.)"))
-        self.dl_transform_cb.setItemText(4, _translate("MainWindow", "20log(.)"))
-        self.dl_transform_cb.setItemText(5, _translate("MainWindow", "20log(|.|)"))
-        self.dl_transform_cb.setItemText(6, _translate("MainWindow", "unwrap(.)"))
-        self.dl_transform_cb.setItemText(7, _translate("MainWindow", "unwrap(.) intticks"))
+        self.label_density.setText(_translate("MainWindow", "Density"))
+        self.dl_density_chk.setToolTip(_translate("MainWindow", "Draw the cases as a 2D histogram of the pixels they cross"))
+        self.dl_density_log_chk.setText(_translate("MainWindow", "log"))
+        self.dl_cases_lb.setText(_translate("MainWindow", "Cases"))
+        self.dl_cases_edit.setToolTip(_translate("MainWindow", "Cases of the family that are shown, e.g. 0-9, 12"))
         self.label_23.setText(_translate("MainWindow", "Y offset"))
         self.dl_remove_btn.setText(_translate("MainWindow", "Remove"))
         self.tabWidget.setTabText(self.tabWidget.indexOf(self.tab), _translate("MainWindow", "Plotting"))
         self.menuProject.setTitle(_translate("MainWindow", "Project"))
         self.actionLoad.setText(_translate("MainWindow", "Load"))
         self.actionSave.setText(_translate("MainWindow", "Save"))
+        self.actionImport_decimated.setText(_translate("MainWindow", "Import decimated CSV..."))
+        self.actionImport_decimated.setToolTip(_translate("MainWindow", "Import large CSV captures keeping the min/max envelope within a point budget"))
+        self.actionCase_statistics.setText(_translate("MainWindow", "Case statistics..."))
+        self.actionCase_statistics.setToolTip(_translate("MainWindow", "Mean and percentile band of the selected dataline across the cases of its dataset"))
         self.actionLoad_2.setText(_translate("MainWindow", "Load..."))
         self.actionSave_2.setText(_translate("MainWindow", "Save..."))
         self.actionSet_size.setText(_translate("MainWindow", "Set size"))
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+
+# Form implementation generated from reading ui file 'designer/variable_window.ui'
+#
+# Created by: PyQt5 UI code generator 5.15.11
+#
+# WARNING: Any manual changes made to this file will be lost when pyuic5 is
+# run again.  Do not edit this file unless you know what you are doing.
+
+
+from PyQt5 import QtCore, QtGui, QtWidgets
+
+
+class Ui_VariableDialog(object):
+    def setupUi(self, VariableDialog):
+        VariableDialog.setObjectName("VariableDialog")
+        VariableDialog.resize(420, 520)
+        self.gridLayout = QtWidgets.QGridLayout(VariableDialog)
+        self.gridLayout.setObjectName("gridLayout")
+        self.var_info_lb = QtWidgets.QLabel(VariableDialog)
+        font = QtGui.QFont()
+        font.setFamily("Arial")
+        font.setPointSize(9)
+        self.var_info_lb.setFont(font)
+        self.var_info_lb.setText("")
+        self.var_info_lb.setWordWrap(True)
+        self.var_info_lb.setObjectName("var_info_lb")
+        self.gridLayout.addWidget(self.var_info_lb, 0, 0, 1, 3)
+        self.label = QtWidgets.QLabel(VariableDialog)
+        font = QtGui.QFont()
+        font.setFamily("Arial")
+        font.setPointSize(9)
+        self.label.setFont(font)
+        self.label.setObjectName("label")
+        self.gridLayout.addWidget(self.label, 1, 0, 1, 1)
+        self.var_filter_edit = QtWidgets.QLineEdit(VariableDialog)
+        font = QtGui.QFont()
+        font.setFamily("Arial")
+        font.setPointSize(9)
+        self.var_filter_edit.setFont(font)
+        self.var_filter_edit.setObjectName("var_filter_edit")
+        self.gridLayout.addWidget(self.var_filter_edit, 1, 1, 1, 2)
+        self.var_list = QtWidgets.QListWidget(VariableDialog)
+        font = QtGui.QFont()
+        font.setFamily("Arial")
+        font.setPointSize(9)
+        self.var_list.setFont(font)
+        self.var_list.setUniformItemSizes(True)
+        self.var_list.setObjectName("var_list")
+        self.gridLayout.addWidget(self.var_list, 2, 0, 1, 3)
+        self.var_check_btn = QtWidgets.QPushButton(VariableDialog)
+        font = QtGui.QFont()
+        font.setFamily("Arial")
+        font.setPointSize(9)
+        self.var_check_btn.setFont(font)
+        self.var_check_btn.setObjectName("var_check_btn")
+        self.gridLayout.addWidget(self.var_check_btn, 3, 0, 1, 2)
+        self.var_uncheck_btn = QtWidgets.QPushButton(VariableDialog)
+        font = QtGui.QFont()
+        font.setFamily("Arial")
+        font.setPointSize(9)
+        self.var_uncheck_btn.setFont(font)
+        self.var_uncheck_btn.setObjectName("var_uncheck_btn")
+        self.gridLayout.addWidget(self.var_uncheck_btn, 3, 2, 1, 1)
+        self.var_save_chk = QtWidgets.QCheckBox(VariableDialog)
+        font = QtGui.QFont()
+        font.setFamily("Arial")
+        font.setPointSize(9)
+        self.var_save_chk.setFont(font)
+        self.var_save_chk.setObjectName("var_save_chk")
+        self.gridLayout.addWidget(self.var_save_chk, 4, 0, 1, 3)
+        self.OK_btn = QtWidgets.QDialogButtonBox(VariableDialog)
+        font = QtGui.QFont()
+        font.setFamily("Arial")
+        font.setPointSize(9)
+        self.OK_btn.setFont(font)
+        self.OK_btn.setOrientation(QtCore.Qt.Horizontal)
+        self.OK_btn.setStandardButtons(QtWidgets.QDialogButtonBox.Cancel|QtWidgets.QDialogButtonBox.Ok)
+        self.OK_btn.setObjectName("OK_btn")
+        self.gridLayout.addWidget(self.OK_btn, 5, 0, 1, 3)
+
+        self.retranslateUi(VariableDialog)
+        self.OK_btn.accepted.connect(VariableDialog.accept) # type: ignore
+        self.OK_btn.rejected.connect(VariableDialog.reject) # type: ignore
+        QtCore.QMetaObject.connectSlotsByName(VariableDialog)
+
+    def retranslateUi(self, VariableDialog):
+        _translate = QtCore.QCoreApplication.translate
+        VariableDialog.setWindowTitle(_translate("VariableDialog", "Select variables"))
+        self.label.setText(_translate("VariableDialog", "Filter"))
+        self.var_filter_edit.setToolTip(_translate("VariableDialog", "Patterns separated by spaces, e.g. V(out*) I(R*)"))
+        self.var_filter_edit.setPlaceholderText(_translate("VariableDialog", "V(out*) I(R*)"))
+        self.var_check_btn.setText(_translate("VariableDialog", "Check matching"))
+        self.var_uncheck_btn.setText(_translate("VariableDialog", "Uncheck all"))
+        self.var_save_chk.setText(_translate("VariableDialog", "Use this filter by default"))
+
+
+if __name__ == "__main__":
+    import sys
+    app = QtWidgets.QApplication(sys.argv)
+    VariableDialog = QtWidgets.QDialog()
+    ui = Ui_VariableDialog()
+    ui.setupUi(VariableDialog)
+    VariableDialog.show()
+    sys.exit(app.exec_())
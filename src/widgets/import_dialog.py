@@ -0,0 +1,190 @@
+# Python modules
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from PyQt5 import QtWidgets, QtCore
+
+# Project modules
+from src.ui.import_window import Ui_ImportDialog
+from src.package.Dataset import Dataset
+from src.package.importer import import_file, ImportCancelled, CANCEL
+
+POLL_INTERVAL = 100
+
+QUEUED, LOADING, DONE, FAILED, CANCELLED = 'Queued', 'Loading', 'Done', 'Failed', 'Cancelled'
+
+
+class ImportJob():
+    def __init__(self, key, filepath, options, future):
+        self.key = key
+        self.filepath = filepath
+        self.options = options
+        self.future = future
+        self.status = QUEUED
+        self.progress = 0
+        self.cancelled = False
+        self.error = ''
+
+
+class ImportQueue(QtCore.QObject):
+    """Parses files in a pool of worker processes, the GUI only polls the finished ones with a timer."""
+
+    sig_loaded = QtCore.pyqtSignal(object)
+    sig_changed = QtCore.pyqtSignal(object)
+    sig_done = QtCore.pyqtSignal()
+
+    def __init__(self, parent=None, max_workers=None):
+        QtCore.QObject.__init__(self, parent)
+        self.max_workers = max_workers or max(1, (os.cpu_count() or 2) - 1)
+        self.jobs = []
+        self._next_key = 0
+        self._pool = None
+        self._manager = None
+        self._shared = None
+        self.timer = QtCore.QTimer(self)
+        self.timer.setInterval(POLL_INTERVAL)
+        self.timer.timeout.connect(self.poll)
+
+    def start_pool(self):
+        if(self._pool is None):
+            # spawn: los workers no heredan el estado de Qt de este proceso
+            context = multiprocessing.get_context('spawn')
+            self._manager = context.Manager()
+            self._shared = self._manager.dict()
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=context)
+
+    def submit(self, filepath, options={}):
+        self.start_pool()
+        key = self._next_key
+        self._next_key += 1
+        job = ImportJob(key, filepath, options, self._pool.submit(import_file, filepath, key, self._shared, options))
+        self.jobs.append(job)
+        self.sig_changed.emit(job)
+        self.timer.start()
+        return job
+
+    def pending(self):
+        return [job for job in self.jobs if job.status in [QUEUED, LOADING]]
+
+    def cancel(self, job):
+        if(job.status not in [QUEUED, LOADING]):
+            return
+        job.cancelled = True
+        if(job.future.cancel()):
+            self.finish(job, CANCELLED)
+        else:
+            self._shared[(CANCEL, job.key)] = True
+
+    def cancel_all(self):
+        for job in self.pending():
+            self.cancel(job)
+
+    def finish(self, job, status):
+        job.status = status
+        self._shared.pop(job.key, None)
+        self._shared.pop((CANCEL, job.key), None)
+        self.sig_changed.emit(job)
+
+    def poll(self):
+        for job in self.pending():
+            if(job.future.done()):
+                if(job.future.cancelled() or job.cancelled):
+                    self.finish(job, CANCELLED)
+                    continue
+                try:
+                    ds = job.future.result()
+                    if(ds is None):
+                        ds = self.mapped(job)
+                    if(ds is None):
+                        continue
+                    job.progress = 1
+                    self.finish(job, DONE)
+                    self.sig_loaded.emit(ds)
+                except ImportCancelled:
+                    self.finish(job, CANCELLED)
+                except Exception as e:
+                    job.error = str(e) or type(e).__name__
+                    self.finish(job, FAILED)
+            else:
+                progress = self._shared.get(job.key, None)
+                if(progress is not None and (job.status != LOADING or progress != job.progress)):
+                    job.status = LOADING
+                    job.progress = progress
+                    self.sig_changed.emit(job)
+        if(not self.pending()):
+            self.timer.stop()
+            self.sig_done.emit()
+
+    def mapped(self, job):
+        """Dataset of job mapped from the dataset cache, on a miss the job goes back to the pool and None is returned."""
+        try:
+            return Dataset(filepath=job.filepath, cached_only=True)
+        except ValueError:
+            # El cache se borró después del worker, en el GUI no se lee el archivo
+            job.future = self._pool.submit(import_file, job.filepath, job.key, self._shared, job.options, False)
+            return None
+
+    def shutdown(self):
+        self.cancel_all()
+        if(self._pool is not None):
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._manager.shutdown()
+        self._pool = None
+        self._manager = None
+
+
+class ImportDialog(QtWidgets.QDialog, Ui_ImportDialog):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setupUi(self)
+        self.setModal(False)
+        self.queue = ImportQueue(self)
+        self.rows = {}
+        self.import_table.horizontalHeader().setSectionResizeMode(0, QtWidgets.QHeaderView.Stretch)
+        self.queue.sig_changed.connect(self.updateJob)
+        self.queue.sig_done.connect(self.closeIfClean)
+        self.cancel_sel_btn.clicked.connect(self.cancelSelected)
+        self.cancel_all_btn.clicked.connect(self.queue.cancel_all)
+        self.rejected.connect(self.clearFinished)
+
+    def addFiles(self, filepaths, options={}):
+        # options: argumentos para Dataset de cada archivo (variables elegidas, presupuesto de puntos)
+        for f in filepaths:
+            self.queue.submit(f, options.get(f, {}))
+        if(filepaths):
+            self.show()
+
+    def queuedFiles(self):
+        return [job.filepath for job in self.queue.pending()]
+
+    def updateJob(self, job):
+        if(job.key not in self.rows):
+            row = self.import_table.rowCount()
+            self.import_table.insertRow(row)
+            self.import_table.setItem(row, 0, QtWidgets.QTableWidgetItem(os.path.basename(job.filepath)))
+            self.import_table.item(row, 0).setToolTip(job.filepath)
+            self.import_table.setItem(row, 1, QtWidgets.QTableWidgetItem())
+            bar = QtWidgets.QProgressBar()
+            bar.setRange(0, 100)
+            self.import_table.setCellWidget(row, 2, bar)
+            self.rows[job.key] = row
+        row = self.rows[job.key]
+        self.import_table.item(row, 1).setText(job.status if job.status != FAILED else f'{FAILED}: {job.error}')
+        self.import_table.cellWidget(row, 2).setValue(int(100 * job.progress))
+
+    def cancelSelected(self):
+        selected = set(index.row() for index in self.import_table.selectionModel().selectedRows())
+        for job in self.queue.jobs:
+            if(self.rows.get(job.key) in selected):
+                self.queue.cancel(job)
+
+    def closeIfClean(self):
+        if(all(job.status == DONE for job in self.queue.jobs)):
+            self.hide()
+            self.clearFinished()
+
+    def clearFinished(self):
+        if(not self.queue.pending()):
+            self.import_table.setRowCount(0)
+            self.rows = {}
+            self.queue.jobs = []
@@ -8,18 +8,11 @@ from matplotlib.figure import Figure
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as Canvas
 from matplotlib.backends.backend_qt5agg import NavigationToolbar2QT as NavigationToolbar
 
+from src.package.figure import FIGURE_RC, axes_properties, restore_axes_properties
+
 # Ensure using PyQt5 backend
 # matplotlib.use('pgf')
-matplotlib.rcParams.update({
-    "pgf.texsystem": "pdflatex",
-    'font.family': 'serif',
-    # 'text.usetex': True,
-    'pgf.rcfonts': False,
-    'legend.fancybox': False,
-    'legend.edgecolor': 'black',
-    'savefig.format': 'pdf',
-    'path.simplify_threshold': 0.2
-})
+matplotlib.rcParams.update(FIGURE_RC)
 
 class CustomNavigationToolbar(NavigationToolbar):
     toolitems = [t for t in NavigationToolbar.toolitems if
@@ -37,24 +30,10 @@ class MplCanvas(Canvas):
         # self.cursor = Cursor(self.ax, useblit=True, color='red', linewidth=0.3, linestyle='--')
     
     def get_properties(self):
-        return {
-            "xlabel": self.ax.get_xlabel(),
-            "ylabel": self.ax.get_ylabel(),
-            "title": self.ax.get_title(),
-            "xlim": self.ax.get_xlim(),
-            "ylim": self.ax.get_ylim(),
-            "xscale": self.ax.get_xscale(),
-            "yscale": self.ax.get_yscale()
-        }
+        return axes_properties(self.ax)
 
     def restore_properties(self, props):
-        self.ax.set_xlabel(props['xlabel'])
-        self.ax.set_ylabel(props['ylabel'])
-        self.ax.set_title(props['title'])
-        self.ax.set_xlim(props['xlim'])
-        self.ax.set_ylim(props['ylim'])
-        self.ax.set_xscale(props['xscale'])
-        self.ax.set_yscale(props['yscale'])
+        restore_axes_properties(self.ax, props)
         
 # Matplotlib widget
 class MplWidget(QtWidgets.QWidget):
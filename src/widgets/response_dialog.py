@@ -1,14 +1,108 @@
 # Python modules
 import sys
-from PyQt5 import QtWidgets
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from PyQt5 import QtWidgets, QtCore
 
 # Project modules
 from src.ui.response_window import Ui_ResponseDialog
+from src.package.simulation import Simulation
 
 import ast
 import numpy as np
 import scipy.signal as signal
 
+POLL_INTERVAL = 100
+
+
+class SimulationJob():
+    def __init__(self, ds, names, t, x):
+        self.ds = ds
+        self.names = names
+        self.t = t
+        self.x = x
+        self.blocks = deque()
+        self.streamed = 0
+        self.cancelled = False
+        self.error = ''
+        self.future = None
+
+    @property
+    def progress(self):
+        return self.streamed / max(len(self.t), 1)
+
+
+class SimulationQueue(QtCore.QObject):
+    """Simulates the response of TF datasets to long inputs in a worker thread, the GUI polls the finished blocks."""
+    # sosfilt y las FFT sueltan el GIL, un thread alcanza para no trabar la GUI
+
+    sig_streamed = QtCore.pyqtSignal(object)
+    sig_finished = QtCore.pyqtSignal(object)
+
+    def __init__(self, parent=None):
+        QtCore.QObject.__init__(self, parent)
+        self.jobs = []
+        self._pool = ThreadPoolExecutor(max_workers=1)
+        self.timer = QtCore.QTimer(self)
+        self.timer.setInterval(POLL_INTERVAL)
+        self.timer.timeout.connect(self.poll)
+
+    def submit(self, ds, names, t, x):
+        # Una simulación nueva sobre las mismas columnas reemplaza a la que estaba en curso
+        for job in self.jobs:
+            if(job.ds is ds and job.names == names):
+                job.cancelled = True
+        job = SimulationJob(ds, names, t, x)
+        job.future = self._pool.submit(self.simulate, job)
+        self.jobs.append(job)
+        self.timer.start()
+        return job
+
+    @staticmethod
+    def simulate(job):
+        tf = job.ds.tf
+        dt = job.t[1] - job.t[0] if len(job.t) > 1 else 1
+        simulation = Simulation(tf.z, tf.p, tf.k, dt, len(job.x))
+        for start, y in simulation.blocks(job.x):
+            if(job.cancelled):
+                return
+            job.blocks.append((start, y))
+
+    def stream(self, job):
+        blocks = []
+        while(job.blocks):
+            blocks.append(job.blocks.popleft())
+        if(not blocks or job.cancelled):
+            return False
+        start, stop = blocks[0][0], blocks[-1][0] + len(blocks[-1][1])
+        time_name, input_name, response_name = job.names
+        # El primer bloque pisa lo que hubiera de una simulación anterior con el mismo nombre
+        keep = 0 if start == 0 else None
+        job.ds.data.append(time_name, 0, job.t[start:stop], keep)
+        job.ds.data.append(input_name, 0, job.x[start:stop], keep)
+        job.ds.data.append(response_name, 0, np.concatenate([y for _, y in blocks]), keep)
+        job.streamed = stop
+        return True
+
+    def poll(self):
+        for job in list(self.jobs):
+            done = job.future.done()
+            if(self.stream(job)):
+                self.sig_streamed.emit(job)
+            if(done):
+                self.jobs.remove(job)
+                if(job.future.exception() is not None):
+                    job.error = str(job.future.exception()) or type(job.future.exception()).__name__
+                if(not job.cancelled):
+                    self.sig_finished.emit(job)
+        if(not self.jobs):
+            self.timer.stop()
+
+    def shutdown(self):
+        for job in self.jobs:
+            job.cancelled = True
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
 class ResponseDialog(QtWidgets.QDialog, Ui_ResponseDialog):
     def __init__(self, parent=None):
         super().__init__()
@@ -0,0 +1,73 @@
+from PyQt5 import QtWidgets, QtCore
+
+from src.ui.variable_window import Ui_VariableDialog
+from src.package.raw_reader import match_variables
+
+PATTERNS_KEY = 'variable_patterns'
+
+
+class VariableDialog(QtWidgets.QDialog, Ui_VariableDialog):
+    """Picks which variables of a spice .raw file get decoded, the filter can be saved as the default."""
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setupUi(self)
+        self.settings = QtCore.QSettings('tc2', 'plottool')
+        self.var_filter_edit.textChanged.connect(self.filterList)
+        self.var_check_btn.clicked.connect(self.checkMatching)
+        self.var_uncheck_btn.clicked.connect(self.uncheckAll)
+        self.accepted.connect(self.savePatterns)
+
+    def savedPatterns(self):
+        return self.settings.value(PATTERNS_KEY, '', type=str)
+
+    def patterns(self):
+        return self.var_filter_edit.text().split()
+
+    def populate(self, names, info='', locked=[]):
+        """Lists names, the ones in locked are already loaded and can't be unchecked."""
+        self.var_list.clear()
+        self.var_info_lb.setText(info)
+        self.var_save_chk.setChecked(False)
+        self.var_filter_edit.blockSignals(True)
+        self.var_filter_edit.setText(self.savedPatterns())
+        self.var_filter_edit.blockSignals(False)
+        matching = set(match_variables(names, self.patterns())) if self.patterns() else set(names)
+        for name in names:
+            item = QtWidgets.QListWidgetItem(name)
+            if(name in locked):
+                item.setFlags(item.flags() & ~QtCore.Qt.ItemIsUserCheckable & ~QtCore.Qt.ItemIsEnabled)
+                item.setCheckState(QtCore.Qt.Checked)
+            else:
+                item.setCheckState(QtCore.Qt.Checked if name in matching else QtCore.Qt.Unchecked)
+            self.var_list.addItem(item)
+        self.filterList()
+
+    def filterList(self):
+        patterns = self.patterns()
+        names = [self.var_list.item(i).text() for i in range(self.var_list.count())]
+        visible = set(match_variables(names, patterns)) if patterns else set(names)
+        for i in range(self.var_list.count()):
+            self.var_list.item(i).setHidden(names[i] not in visible)
+
+    def checkMatching(self):
+        for i in range(self.var_list.count()):
+            item = self.var_list.item(i)
+            if(not item.isHidden() and item.flags() & QtCore.Qt.ItemIsUserCheckable):
+                item.setCheckState(QtCore.Qt.Checked)
+
+    def uncheckAll(self):
+        for i in range(self.var_list.count()):
+            item = self.var_list.item(i)
+            if(item.flags() & QtCore.Qt.ItemIsUserCheckable):
+                item.setCheckState(QtCore.Qt.Unchecked)
+
+    def selectedVariables(self):
+        return [
+            self.var_list.item(i).text()
+            for i in range(self.var_list.count())
+            if self.var_list.item(i).checkState() == QtCore.Qt.Checked
+        ]
+
+    def savePatterns(self):
+        if(self.var_save_chk.isChecked()):
+            self.settings.setValue(PATTERNS_KEY, self.var_filter_edit.text())